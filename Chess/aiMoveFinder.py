@@ -1,89 +1,487 @@
+import multiprocessing
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-global next_move
-
-piece_score = {
-    "K": 0,
-    "Q": 9,
-    "R": 5,
-    "B": 3,
-    "N": 3,
-    "p": 1
-}
-
-# create score arrays for all pieces
-
-knight_scores = [[1, 1, 1, 1, 1, 1, 1, 1],
-                 [1, 2, 2, 2, 2, 2, 2, 1],
-                 [1, 2, 3, 3, 3, 3, 2, 1],
-                 [1, 2, 3, 4, 4, 3, 2, 1],
-                 [1, 2, 3, 4, 4, 3, 2, 1],
-                 [1, 2, 3, 3, 3, 3, 2, 1],
-                 [1, 2, 2, 2, 2, 2, 2, 1],
-                 [1, 1, 1, 1, 1, 1, 1, 1]
-                 ]
-
-bishop_scores = [[4, 3, 2, 1, 1, 2, 3, 4],
-                 [3, 4, 3, 2, 2, 3, 4, 3],
-                 [2, 3, 4, 3, 3, 4, 3, 2],
-                 [1, 2, 3, 4, 4, 3, 2, 1],
-                 [1, 2, 3, 4, 4, 3, 2, 1],
-                 [2, 3, 4, 3, 3, 4, 3, 2],
-                 [3, 4, 3, 2, 2, 3, 4, 3],
-                 [4, 3, 2, 1, 1, 2, 3, 4]
-                 ]
-
-queen_scores = [[1, 1, 1, 3, 1, 1, 1, 1],
-                [1, 2, 3, 3, 3, 1, 1, 1],
-                [1, 4, 3, 3, 3, 4, 2, 1],
-                [1, 2, 3, 3, 3, 2, 2, 1],
-                [1, 2, 3, 3, 3, 2, 2, 1],
-                [1, 4, 3, 3, 3, 4, 2, 1],
-                [1, 1, 2, 3, 3, 1, 1, 1],
-                [1, 1, 1, 3, 1, 1, 1, 1]
-                ]
-
-rook_scores = [[4, 3, 4, 4, 4, 4, 3, 4],
-               [4, 4, 4, 4, 4, 4, 4, 4],
-               [1, 1, 2, 3, 3, 2, 1, 1],
-               [1, 2, 3, 3, 3, 3, 2, 1],
-               [1, 2, 3, 3, 3, 3, 2, 1],
-               [1, 1, 2, 2, 2, 2, 1, 1],
-               [4, 4, 4, 4, 4, 4, 4, 4],
-               [4, 3, 4, 4, 4, 4, 3, 4]
-               ]
-
-white_pawn_scores = [[8, 8, 8, 8, 8, 8, 8, 8],
-                     [8, 8, 8, 8, 8, 8, 8, 8],
-                     [5, 6, 6, 7, 7, 6, 6, 5],
-                     [2, 3, 3, 5, 5, 3, 3, 2],
-                     [1, 2, 3, 4, 4, 3, 2, 1],
-                     [1, 1, 2, 3, 3, 2, 1, 1],
-                     [1, 1, 1, 0, 0, 1, 1, 1],
-                     [0, 0, 0, 0, 0, 0, 0, 0]
-                     ]
-
-black_pawn_scores = [[0, 0, 0, 0, 0, 0, 0, 0],
-                     [1, 1, 1, 0, 0, 1, 1, 1],
-                     [1, 1, 2, 3, 3, 2, 1, 1],
-                     [1, 2, 3, 4, 4, 3, 2, 1],
-                     [2, 3, 3, 5, 5, 3, 3, 2],
-                     [5, 6, 6, 7, 7, 6, 6, 5],
-                     [8, 8, 8, 8, 8, 8, 8, 8],
-                     [8, 8, 8, 8, 8, 8, 8, 8]
-                     ]
-
-piece_position_scores = {"N": knight_scores,
-                         "Q": queen_scores,
-                         "B": bishop_scores,
-                         "R": rook_scores,
-                         "bp": black_pawn_scores,
-                         "wp": white_pawn_scores
-                         }
+from Chess import tablebase
+from Chess.engine import CAPTURE_STAGE, QUIET_STAGE, FIFTY_MOVE_RULE_PLIES
+from Chess.pieceScores import piece_score
+from Chess.transpositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, move_matches
 
 CHECKMATE = 1000
 STALEMATE = 0
-DEPTH = 3
+# score of a position drawn by repetition, the fifty-move rule or insufficient material
+DRAW = 0
+# iterative deepening stops at this depth, or earlier when the time or node budget of the search runs out
+MAX_DEPTH = 32
+# seconds the AI thinks about a move
+TIME_LIMIT = 2.0
+# the clock (and the stop flag) is read once every TIME_CHECK_INTERVAL nodes
+TIME_CHECK_INTERVAL = 256
+# order the moves of every position: captures by MVV-LVA, then killer moves, then quiet moves by history
+# switched off, the moves are searched in generation order (with the hash move first)
+MOVE_ORDERING = True
+# ordering scores - a capture comes before a killer move, which comes before any other quiet move
+CAPTURE_ORDER_SCORE = 1 << 30
+KILLER_ORDER_SCORE = 1 << 29
+# a promotion is scored like the capture of a queen less the value of the pawn
+PROMOTION_GAIN = piece_score['Q'] - piece_score['p']
+# killer moves kept for every ply
+KILLERS_PER_PLY = 2
+# search captures at the horizon until the position is quiet instead of scoring it in the middle of an exchange
+QUIESCENCE = True
+# a capture which cannot bring the score back above alpha even with this margin is not searched (delta pruning)
+DELTA_MARGIN = 2
+# the capture search stops at this ply, the score of the position is used as it is
+MAX_SEARCH_PLY = 64
+# principal variation search: the moves after the first one are searched with a null window, which only tells
+# if they are better than the best move so far, and they are searched again with the full window if they are
+PRINCIPAL_VARIATION_SEARCH = True
+# null move pruning: let the opponent move twice, if the position is still too good the search can stop
+NULL_MOVE_PRUNING = True
+# late move reductions: quiet moves late in the ordering are searched less deep, and again if they raise alpha
+LATE_MOVE_REDUCTIONS = True
+# scores are multiples of a tenth (of a pawn), so no score falls inside a window this small
+NULL_WINDOW = 0.01
+# depth taken away from the search after a null move, on top of the move itself
+NULL_MOVE_REDUCTION = 2
+# null moves and reductions are only used at least this deep, shallower searches are cheap anyway
+REDUCTION_MINIMUM_DEPTH = 3
+# number of moves searched at full depth before the reductions start
+FULL_DEPTH_MOVES = 3
+# endgame tablebases: positions with few enough pieces get their exact result from the tables instead of a search
+# (see tablebase.py, the tables have to be built once, the search works without them)
+ENDGAME_TABLEBASE = True
+# score of a position won according to the tablebases, less a tenth for every ply to the checkmate so the fastest
+# win is played - far above any material balance, and below CHECKMATE which is the score of a checkmate on the board
+TABLEBASE_WIN = 500
+# memory used by the transposition table of the alpha beta search
+TRANSPOSITION_TABLE_SIZE_MB = 16
+# root split search: depth of the search and number of processes the root moves are split across
+ROOT_SPLIT_DEPTH = 4
+ROOT_SPLIT_WORKERS = multiprocessing.cpu_count()
+# the root split searches are exact - without null moves and reductions - so the move found does not depend on
+# which process searched which move first, the pruning can be turned back on for speed with searcher_options
+ROOT_SPLIT_SEARCHER_OPTIONS = {"null_move_pruning": False, "late_move_reductions": False}
+# memory used by the transposition table of every root split process
+ROOT_SPLIT_TRANSPOSITION_TABLE_SIZE_MB = 4
+
+"""
+raised inside the search when its time or node budget runs out or when it is asked to stop
+"""
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+"""
+alpha beta search of one position at a time
+everything a search changes - best move, principal variation, killer moves, history, statistics and the stop flag -
+belongs to the searcher, so several searchers can run in the same process, each one on its own game state
+the transposition table can be given to share it between searchers, otherwise every searcher has its own
+the switchable parts of the search are turned on and off per searcher, the defaults are the module constants
+"""
+
+
+class Searcher:
+    def __init__(self, transposition_table=None, move_ordering=MOVE_ORDERING, quiescence=QUIESCENCE,
+                 principal_variation_search=PRINCIPAL_VARIATION_SEARCH, null_move_pruning=NULL_MOVE_PRUNING,
+                 late_move_reductions=LATE_MOVE_REDUCTIONS, endgame_tablebase=ENDGAME_TABLEBASE):
+        if transposition_table is None:
+            transposition_table = TranspositionTable(TRANSPOSITION_TABLE_SIZE_MB)
+        self.transposition_table = transposition_table
+        self.move_ordering = move_ordering
+        self.quiescence = quiescence
+        self.principal_variation_search = principal_variation_search
+        self.null_move_pruning = null_move_pruning
+        self.late_move_reductions = late_move_reductions
+        # tables probed by the search, None when they are not used
+        self.tablebase = tablebase.get_default_tablebase() if endgame_tablebase else None
+        # best root move of the iteration being searched
+        self.best_move = None
+        # score of the last completed iteration, from the point of view of the side to move at the root
+        self.score = 0
+        # depth of the last completed iteration
+        self.completed_depth = 0
+        # best line of the last completed iteration, its moves are searched first in the next one
+        self.principal_variation = []
+        # set while the search walks down the principal variation of the previous iteration
+        self.follow_pv = False
+        # pv_lines[ply] is the best line found from the position at that ply
+        self.pv_lines = {}
+        # killer_moves[ply] are the ids of the last quiet moves which caused a beta cutoff at that ply
+        self.killer_moves = {}
+        # history[move id] grows every time the quiet move with that start and end square causes a beta cutoff
+        self.history = [0] * 4096
+        self.nodes_searched = 0
+        self.tablebase_hits = 0
+        self.search_seconds = 0.0
+        self.deadline = None
+        self.node_limit = None
+        self.stop_requested = False
+        # length of the move log at the root, the ply of a position is the number of moves made after the root
+        self.root_ply = 0
+        # number of pieces on the board at the root, kings included
+        self.root_pieces = 32
+
+    """
+    ask a running search to stop, it returns the best move found so far - safe to call from another thread
+    a search not started yet stops as soon as it starts
+    """
+
+    def stop(self):
+        self.stop_requested = True
+
+    """
+    reset the state of the previous search before searching the given game state
+    the budget is time_limit seconds and/or node_limit nodes, None means no limit
+    """
+
+    def start_search(self, game_state, time_limit=None, node_limit=None):
+        self.transposition_table.new_search()
+        self.best_move = None
+        self.score = 0
+        self.completed_depth = 0
+        self.principal_variation = []
+        self.follow_pv = False
+        self.pv_lines = {}
+        self.killer_moves = {}
+        self.history = [0] * 4096
+        self.nodes_searched = 0
+        self.tablebase_hits = 0
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.root_ply = len(game_state.move_log)
+        self.root_pieces = sum(square != "--" for row in game_state.board for square in row)
+
+    """
+    iterative deepening: the position is searched to depth 1, 2, 3 ... until max_depth or until the budget runs out
+    start_depth skips the first iterations, the helpers of a parallel search start at different depths
+    returns the best move of the last completed iteration, a search stopped during the first iteration gives the best
+    move found so far
+    """
+
+    def search(self, game_state, valid_moves, time_limit=TIME_LIMIT, node_limit=None, max_depth=MAX_DEPTH,
+               randomize_root=True, start_depth=1):
+        start_time = time.perf_counter()
+        # moves with the same ordering score are searched in a random order, so the AI does not always play the same
+        if randomize_root:
+            random.shuffle(valid_moves)
+        self.start_search(game_state, time_limit, node_limit)
+        best_move = None
+        for depth in range(start_depth, max_depth + 1):
+            self.best_move = None
+            self.follow_pv = True
+            try:
+                score = self.alpha_beta(game_state, valid_moves, depth, -CHECKMATE, CHECKMATE,
+                                        1 if game_state.white_to_move else -1)
+            except SearchTimeout:
+                # the interrupted search did not undo its moves
+                while len(game_state.move_log) > self.root_ply:
+                    game_state.undo_move()
+                if best_move is None:
+                    best_move = self.best_move
+                break
+            best_move = self.best_move
+            self.score = score
+            self.completed_depth = depth
+            self.principal_variation = self.pv_lines[0]
+            # a forced checkmate was found, or a position the tables give as won or lost was reached, a deeper search
+            # would not change the move
+            if abs(score) >= CHECKMATE or abs(score) > TABLEBASE_WIN - tablebase.LOSS_OFFSET / 10:
+                break
+        self.best_move = best_move
+        # a stop asked before the search started still stops it, the flag is only cleared once the search is over
+        self.stop_requested = False
+        self.search_seconds = time.perf_counter() - start_time
+        return best_move
+
+    """
+    alpha beta pruning algorithm for finding best move
+    positions already searched deep enough are taken from the transposition table
+    valid_moves are given only for the root, the other positions take their moves one by one from
+    game_state.generate_move_stages, so the moves after a cutoff are never generated
+    raises SearchTimeout when the budget of the search runs out
+    """
+
+    def alpha_beta(self, game_state, valid_moves, depth, alpha, beta, turn_multiplier):
+        self.count_node()
+        ply = len(game_state.move_log) - self.root_ply
+        pv_lines = self.pv_lines
+        pv_lines[ply] = []
+        # the move of the previous iteration's principal variation at this ply, only while walking down that line
+        pv_move_code = None
+        if self.follow_pv:
+            if ply < len(self.principal_variation):
+                pv_move_code = self.principal_variation[ply].move_id
+            self.follow_pv = False
+
+        # a position seen before is scored as a draw at once: the side which could avoid the repetition already
+        # chose not to, and the moves after it do not need to be searched
+        # the material only changes with a capture, so it is only looked at after one
+        if ply != 0 and (game_state.halfmove_clock >= FIFTY_MOVE_RULE_PLIES or game_state.repetition_count() != 0 or
+                         (game_state.halfmove_clock == 0 and game_state.move_log[-1] is not None and
+                          game_state.move_log[-1].piece_captured != "--" and
+                          game_state.has_insufficient_material())):
+            return DRAW
+
+        # a move takes at most one piece, so the tables are only probed once enough moves were made since the root
+        if ply != 0 and self.tablebase is not None and self.root_pieces - ply <= tablebase.MAX_TABLEBASE_PIECES:
+            result = self.tablebase.probe(game_state)
+            if result is not None:
+                self.tablebase_hits += 1
+                outcome, plies = result
+                if outcome == tablebase.DRAW:
+                    return DRAW
+                # checkmate on the board, scored like the search scores it
+                if plies == 0:
+                    return -CHECKMATE
+                return outcome * round(TABLEBASE_WIN - plies / 10, 1)
+
+        if depth == 0:
+            if self.quiescence:
+                return self.quiescence_search(game_state, alpha, beta, turn_multiplier, True)
+            # score_board needs to know if the game is over
+            game_state.update_game_over()
+            return turn_multiplier * score_board(game_state)
+
+        hash_move_code = None
+        entry = self.transposition_table.probe(game_state.zobrist_key)
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, hash_move_code = entry
+            # the root must always be searched because it has to set the best move
+            if entry_depth >= depth and ply != 0:
+                if entry_flag == EXACT:
+                    return entry_score
+                elif entry_flag == LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+                elif entry_flag == UPPER_BOUND:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        # positions in check are never pruned or reduced
+        in_check = depth >= REDUCTION_MINIMUM_DEPTH and ply != 0 and game_state.king_in_check()
+        # null move - if the opponent moving twice cannot bring the score below beta, a real move will not either
+        # passing is not allowed twice in a row, in check or with only pawns left (zugzwang, passing could be better)
+        if self.null_move_pruning and depth >= REDUCTION_MINIMUM_DEPTH and ply != 0 and not in_check and \
+                game_state.move_log[-1] is not None and game_state.has_non_pawn_material():
+            game_state.make_null_move()
+            score = -self.alpha_beta(game_state, None, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + NULL_WINDOW,
+                                     -turn_multiplier)
+            game_state.undo_null_move()
+            # a checkmate found after passing the turn is not proven, so mate scores are not returned
+            if score >= beta:
+                return beta if score >= CHECKMATE else score
+
+        if pv_move_code is not None:
+            hash_move_code = pv_move_code
+        if valid_moves is None:
+            # the best move of the previous search is given first, it is the most likely to cause a cutoff
+            if self.move_ordering:
+                valid_moves = self.order_moves(game_state, hash_move_code, ply)
+            else:
+                valid_moves = game_state.generate_moves(hash_move_code)
+        else:
+            if self.move_ordering:
+                valid_moves = self.order_root_moves(valid_moves, ply)
+            if hash_move_code is not None:
+                for index in range(len(valid_moves)):
+                    if move_matches(valid_moves[index], hash_move_code):
+                        valid_moves = [valid_moves[index]] + valid_moves[:index] + valid_moves[index + 1:]
+                        break
+
+        # bound type of the result is decided against the window actually searched
+        original_alpha = alpha
+        maximum_score = -CHECKMATE
+        best_move = None
+        for move_index, move in enumerate(valid_moves):
+            self.follow_pv = pv_move_code is not None and move.move_id == pv_move_code
+            game_state.make_move(move)
+            # the - is crucial because we switch the sides using that -
+            if move_index == 0 or not (self.principal_variation_search or self.late_move_reductions):
+                score = -self.alpha_beta(game_state, None, depth - 1, -beta, -alpha, -turn_multiplier)
+            else:
+                score = self.search_late_move(game_state, move, move_index, depth, alpha, beta, turn_multiplier,
+                                              in_check, ply)
+            if best_move is None or score > maximum_score:
+                maximum_score = score
+                best_move = move
+                pv_lines[ply] = [move] + pv_lines[ply + 1]
+                if ply == 0:
+                    self.best_move = move
+            game_state.undo_move()
+            # pruning happens
+            if maximum_score > alpha:
+                alpha = maximum_score
+            if alpha >= beta:
+                if self.move_ordering and not (move.is_capture or move.is_pawn_promotion):
+                    self.update_killers_and_history(move, depth, ply)
+                break
+
+        # no valid moves - checkmate or stalemate
+        if best_move is None:
+            maximum_score = -CHECKMATE if game_state.is_king_in_check else STALEMATE
+
+        if maximum_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif maximum_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(game_state.zobrist_key, depth, maximum_score, flag, best_move)
+        return maximum_score
+
+    """
+    search a move which is not the first one of its position, the move is already made on the board
+    with late move reductions, a late quiet move is first searched less deep and searched again at full depth only
+    if it raises alpha
+    with principal variation search, the move is searched with a null window around alpha first - it is most likely
+    worse than the first move - and with the full window only if it turns out to be better
+    """
+
+    def search_late_move(self, game_state, move, move_index, depth, alpha, beta, turn_multiplier, in_check, ply):
+        # null window searches only when PVS is on, otherwise the full window
+        window_beta = alpha + NULL_WINDOW if self.principal_variation_search else beta
+        if self.late_move_reductions and depth >= REDUCTION_MINIMUM_DEPTH and ply != 0 and \
+                move_index >= FULL_DEPTH_MOVES and not in_check and not (move.is_capture or move.is_pawn_promotion) \
+                and not game_state.king_in_check():
+            score = -self.alpha_beta(game_state, None, depth - 2, -window_beta, -alpha, -turn_multiplier)
+            # the reduced search says the move is not better, no need to look again
+            if score <= alpha:
+                return score
+        score = -self.alpha_beta(game_state, None, depth - 1, -window_beta, -alpha, -turn_multiplier)
+        if self.principal_variation_search and alpha < score < beta:
+            score = -self.alpha_beta(game_state, None, depth - 1, -beta, -alpha, -turn_multiplier)
+        return score
+
+    """
+    capture search at the horizon of the alpha beta search
+    the side to move can stand pat - keep the score of the position - or try the captures and promotions, best first
+    captures which cannot raise alpha (delta pruning) and captures of a defended piece by a more valuable one are
+    skipped
+    at_horizon is set for the first position after the main search, where the game over cases are looked at:
+    a side in check searches all its moves and a side without captures is checked for stalemate
+    deeper positions only look at captures, to keep the capture search small
+    """
+
+    def quiescence_search(self, game_state, alpha, beta, turn_multiplier, at_horizon=False):
+        self.count_node()
+        stages = game_state.generate_move_stages()
+        next(stages)
+        captures = next(stages)
+        captures.sort(key=score_capture, reverse=True)
+        if at_horizon and game_state.is_king_in_check:
+            moves = captures + next(stages)
+            if len(moves) == 0:
+                return -CHECKMATE
+            maximum_score = -CHECKMATE
+            stand_pat = None
+        else:
+            # the castle moves are in the last stage, which is empty when the others are
+            if at_horizon and len(captures) == 0 and len(next(stages)) == 0:
+                return STALEMATE
+            stand_pat = turn_multiplier * score_board(game_state)
+            if stand_pat >= beta or len(game_state.move_log) - self.root_ply >= MAX_SEARCH_PLY:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            maximum_score = stand_pat
+            moves = captures
+
+        for move in moves:
+            if stand_pat is not None:
+                # delta pruning - even winning the captured piece for free would not raise alpha
+                if stand_pat + capture_gain(move) + DELTA_MARGIN <= alpha:
+                    continue
+                # the piece would most likely be captured back and lose material
+                if piece_score[move.piece_moved[1]] > capture_gain(move) and \
+                        game_state.square_under_attack(move.end_row, move.end_column):
+                    continue
+            game_state.make_move(move)
+            score = -self.quiescence_search(game_state, -beta, -alpha, -turn_multiplier)
+            game_state.undo_move()
+            if score > maximum_score:
+                maximum_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return maximum_score
+
+    """
+    count a searched position and stop the search when its budget is used up or it was asked to stop
+    """
+
+    def count_node(self):
+        self.nodes_searched += 1
+        if self.node_limit is not None and self.nodes_searched > self.node_limit:
+            raise SearchTimeout()
+        if self.nodes_searched % TIME_CHECK_INTERVAL == 0 and \
+                (self.stop_requested or (self.deadline is not None and time.perf_counter() > self.deadline)):
+            raise SearchTimeout()
+
+    """
+    ordering score of a quiet move, the killer moves of the ply come first
+    """
+
+    def score_quiet_move(self, move, killers):
+        if move.move_id in killers:
+            return KILLER_ORDER_SCORE + KILLERS_PER_PLY - killers.index(move.move_id)
+        return self.history[move.move_id]
+
+    """
+    the moves of a position ordered for the search, one stage of the move generation at a time:
+    the hash move, captures by MVV-LVA, quiet moves with the killer moves first and then by history, castling
+    """
+
+    def order_moves(self, game_state, hash_move_code, ply):
+        killers = self.killer_moves.get(ply, ())
+        for stage, moves in enumerate(game_state.generate_move_stages(hash_move_code)):
+            if stage == CAPTURE_STAGE:
+                moves.sort(key=score_capture, reverse=True)
+            elif stage == QUIET_STAGE:
+                moves.sort(key=lambda move: self.score_quiet_move(move, killers), reverse=True)
+            yield from moves
+
+    """
+    the valid moves of the root ordered like order_moves does, with the killer moves and history of the searcher
+    """
+
+    def order_root_moves(self, valid_moves, ply):
+        killers = self.killer_moves.get(ply, ())
+        return order_root_moves(valid_moves, lambda move: self.score_quiet_move(move, killers))
+
+    """
+    remember a quiet move which caused a beta cutoff, so it is tried early in the positions searched next
+    """
+
+    def update_killers_and_history(self, move, depth, ply):
+        killers = self.killer_moves.setdefault(ply, [])
+        if move.move_id not in killers:
+            killers.insert(0, move.move_id)
+            del killers[KILLERS_PER_PLY:]
+        self.history[move.move_id] += depth * depth
+
+    """
+    results and counters of the last search
+    """
+
+    def get_statistics(self):
+        return {
+            "depth": self.completed_depth,
+            "score": self.score,
+            "nodes": self.nodes_searched,
+            "tablebase_hits": self.tablebase_hits,
+            "seconds": self.search_seconds,
+            "nodes_per_second": self.nodes_searched / max(self.search_seconds, 1e-9),
+            "principal_variation": [move.get_chess_notation() for move in self.principal_variation]
+        }
+
+
+# the table and searcher used by find_best_move, kept between the moves of a game
+transposition_table = TranspositionTable(TRANSPOSITION_TABLE_SIZE_MB)
+default_searcher = Searcher(transposition_table)
 
 """
 find random move for AI
@@ -96,112 +494,200 @@ def find_random_move(valid_moves):
 
 """
 method that calls for negamax search
+iterative deepening with the default searcher, see Searcher.search
+the best move is put in return_queue (if given) and returned
 """
 
 
-def find_best_move(game_state, valid_moves, return_queue):
-    global next_move
-    next_move = None
-    random.shuffle(valid_moves)
-    find_move_negamax_alpha_beta(game_state, valid_moves, DEPTH, -CHECKMATE, CHECKMATE,
-                                 1 if game_state.white_to_move else -1)
-    return_queue.put(next_move)
+def find_best_move(game_state, valid_moves, return_queue=None, time_limit=TIME_LIMIT, node_limit=None,
+                   max_depth=MAX_DEPTH, randomize_root=True):
+    best_move = default_searcher.search(game_state, valid_moves, time_limit, node_limit, max_depth, randomize_root)
+    if return_queue is not None:
+        return_queue.put(best_move)
+    return best_move
 
 
 """
-minimax algorithm for finding best move
+alpha beta search of the position to a fixed depth without a budget, see Searcher.alpha_beta
+returns the score, the best move is kept by the searcher (the default one if none is given)
 """
 
 
-def find_move_minimax(game_state, valid_moves, depth, white_to_move):
-    global next_move
-    if depth == 0:
-        return score_board(game_state)
+def find_move_negamax_alpha_beta(game_state, valid_moves, depth, alpha, beta, turn_multiplier, searcher=None):
+    if searcher is None:
+        searcher = default_searcher
+    searcher.start_search(game_state)
+    return searcher.alpha_beta(game_state, valid_moves, depth, alpha, beta, turn_multiplier)
 
-    if white_to_move:
-        maximum_score = -CHECKMATE
-        for move in valid_moves:
-            game_state.make_move(move)
-            next_moves = game_state.get_valid_moves()
-            score = find_move_minimax(game_state, next_moves, depth - 1, False)
-            if score > maximum_score:
-                maximum_score = score
-                if depth == DEPTH:
-                    next_move = move
-            game_state.undo_move()
-        return maximum_score
 
-    else:
-        minimum_score = CHECKMATE
-        for move in valid_moves:
-            game_state.make_move(move)
-            next_moves = game_state.get_valid_moves()
-            score = find_move_minimax(game_state, next_moves, depth - 1, True)
-            if score < minimum_score:
-                minimum_score = score
-                if depth == DEPTH:
-                    next_move = move
-            game_state.undo_move()
-        return minimum_score
+# state of a root split worker process, set once when the process starts by init_root_split_worker
+root_split_worker = {}
+
+"""
+keep the shared alpha, the shared deadline and the searcher of a root split worker process for all its searches
+"""
+
+
+def init_root_split_worker(shared_alpha, shared_deadline, searcher_options):
+    root_split_worker["shared_alpha"] = shared_alpha
+    root_split_worker["shared_deadline"] = shared_deadline
+    root_split_worker["searcher"] = Searcher(TranspositionTable(ROOT_SPLIT_TRANSPOSITION_TABLE_SIZE_MB),
+                                             **searcher_options)
+    root_split_worker["search_id"] = None
+
+
+"""
+search the subtree of one root move in a root split worker process, returns (move index, score)
+the window starts just under the best score found so far by all the processes, so a move as good as the best one
+still gets its exact score and a worse move fails low with a score under the best one
+the search gets the time left before the shared deadline (time.time() seconds, 0 for no limit), the score is None
+when the move could not be searched before the deadline
+every new search starts with an empty transposition table, so the result does not depend on the searches before
+"""
+
+
+def search_root_move(search_id, game_state, move, move_index, depth):
+    shared_alpha = root_split_worker["shared_alpha"]
+    searcher = root_split_worker["searcher"]
+    if root_split_worker["search_id"] != search_id:
+        root_split_worker["search_id"] = search_id
+        searcher.transposition_table.clear()
+    deadline = root_split_worker["shared_deadline"].value
+    time_limit = None
+    if deadline != 0:
+        time_limit = deadline - time.time()
+        if time_limit <= 0:
+            return move_index, None
+    alpha = shared_alpha.value - NULL_WINDOW
+    turn_multiplier = 1 if game_state.white_to_move else -1
+    searcher.start_search(game_state, time_limit)
+    game_state.make_move(move)
+    try:
+        score = -searcher.alpha_beta(game_state, None, depth - 1, -CHECKMATE, -alpha, -turn_multiplier)
+    except SearchTimeout:
+        # the game state is a copy of this task only, the moves left made do not matter
+        return move_index, None
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return move_index, score
+
+
+"""
+the processes of the root split search, started once and kept between the moves of a game
+"""
+
+
+class RootSplitPool:
+    def __init__(self, workers=ROOT_SPLIT_WORKERS, searcher_options=None):
+        self.searcher_options = searcher_options if searcher_options is not None else ROOT_SPLIT_SEARCHER_OPTIONS
+        self.shared_alpha = multiprocessing.Value('d', -CHECKMATE)
+        self.shared_deadline = multiprocessing.Value('d', 0)
+        self.executor = ProcessPoolExecutor(workers, initializer=init_root_split_worker,
+                                            initargs=(self.shared_alpha, self.shared_deadline, self.searcher_options))
+        self.search_id = 0
+
+    """
+    search every root move to the given depth, stopping at the deadline (time.time() seconds, None for no limit)
+    returns (move index, score) for every move, with a None score for the moves the deadline cut off
+    """
+
+    def search_root_moves(self, game_state, root_moves, depth, deadline):
+        self.search_id += 1
+        self.shared_alpha.value = -CHECKMATE
+        self.shared_deadline.value = deadline if deadline is not None else 0
+        futures = [self.executor.submit(search_root_move, self.search_id, game_state, move, move_index, depth)
+                   for move_index, move in enumerate(root_moves)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown()
 
 
 """
-negamax algorithm for finding best move
+root split parallel search to a fixed depth: the root moves are split across the processes of a pool, every
+process searches the subtrees of the moves it gets, and the best alpha found so far is shared through a
+multiprocessing Value so the later moves are searched with a narrower window
+the root moves are shuffled with the given seed (not shuffled if it is None) and ordered like the single process
+search orders them, the best score wins and among equal scores the first move in that order, so the move found is
+the one find_move_negamax_alpha_beta finds with the same searcher options, whatever the order the moves end in
+with a time_limit, the moves not searched in time are left out (the first move in that order is played if no move
+was searched) and the move found is only the best of the others
+pool is the RootSplitPool of the game, its searcher options are used - without it, a pool is started for this
+search only
+the best move is put in return_queue (if given) and returned
 """
 
 
-def find_move_negamax(game_state, valid_moves, depth, turn_multiplier):
-    global next_move
-    if depth == 0:
-        return turn_multiplier * score_board(game_state)
+def find_best_move_root_split(game_state, valid_moves, return_queue=None, depth=ROOT_SPLIT_DEPTH,
+                              workers=ROOT_SPLIT_WORKERS, seed=None, searcher_options=None, time_limit=None,
+                              pool=None):
+    deadline = time.time() + time_limit if time_limit is not None else None
+    own_pool = pool is None
+    if own_pool:
+        pool = RootSplitPool(workers, searcher_options)
+    root_moves = list(valid_moves)
+    if seed is not None:
+        random.Random(seed).shuffle(root_moves)
+    if pool.searcher_options.get("move_ordering", MOVE_ORDERING):
+        # a new searcher has no killer moves and no history yet, so its quiet moves keep their order
+        root_moves = order_root_moves(root_moves)
+    best_move = None
+    if len(root_moves) != 0:
+        best_index, best_score = 0, None
+        for move_index, score in pool.search_root_moves(game_state, root_moves, depth, deadline):
+            if score is not None and (best_score is None or score > best_score):
+                best_index, best_score = move_index, score
+        best_move = root_moves[best_index]
+    if own_pool:
+        pool.close()
+    if return_queue is not None:
+        return_queue.put(best_move)
+    return best_move
+
+
+"""
+material won by a capture or promotion
+"""
 
-    maximum_score = -CHECKMATE
-    for move in valid_moves:
-        game_state.make_move(move)
-        next_moves = game_state.get_valid_moves()
-        score = -find_move_negamax(game_state, next_moves, depth - 1, -turn_multiplier)
-        if score > maximum_score:
-            maximum_score = score
-            if depth == DEPTH:
-                next_move = move
-        game_state.undo_move()
-    return maximum_score
+
+def capture_gain(move):
+    gain = piece_score[move.piece_captured[1]] if move.piece_captured != "--" else 0
+    if move.is_pawn_promotion:
+        gain += PROMOTION_GAIN
+    return gain
 
 
 """
-alpha beta pruning algorithm for finding best move
+ordering score of a capture or promotion - most valuable victim, least valuable attacker
+a capture of a big piece by a small piece is the most likely to be good
 """
 
 
-def find_move_negamax_alpha_beta(game_state, valid_moves, depth, alpha, beta, turn_multiplier):
-    global next_move
-    if depth == 0:
-        return turn_multiplier * score_board(game_state)
+def score_capture(move):
+    return capture_gain(move) * 10 - piece_score[move.piece_moved[1]]
+
+
+"""
+the valid moves of a root ordered for the search: captures and promotions first by MVV-LVA, then the quiet moves
+by score_quiet_move (their order is kept if it is None), the sort keeps the order of moves with equal scores
+"""
+
 
-    maximum_score = -CHECKMATE
-    for move in valid_moves:
-        game_state.make_move(move)
-        next_moves = game_state.get_valid_moves()
-        # the - is crucial because we switch the sides using that -
-        score = -find_move_negamax_alpha_beta(game_state, next_moves, depth - 1, -beta, -alpha, -turn_multiplier)
-        if score > maximum_score:
-            maximum_score = score
-            if depth == DEPTH:
-                next_move = move
-        game_state.undo_move()
-        # pruning happens
-        if maximum_score > alpha:
-            alpha = maximum_score
-        if alpha >= beta:
-            break
+def order_root_moves(valid_moves, score_quiet_move=None):
+    def score_move(move):
+        if move.is_capture or move.is_pawn_promotion:
+            return CAPTURE_ORDER_SCORE + score_capture(move)
+        return score_quiet_move(move) if score_quiet_move is not None else 0
 
-    return maximum_score
+    return sorted(valid_moves, key=score_move, reverse=True)
 
 
 """
 method that scores the board considering the material
 evaluation function basically
 a positive score is good for white, a negative one is good for black
+the material and positional totals are kept by the game state, so the board is not scanned
 """
 
 
@@ -215,22 +701,4 @@ def score_board(game_state):
     elif game_state.stalemate:
         return STALEMATE
 
-    score = 0
-    for row in range(len(game_state.board)):
-        for column in range(len(game_state.board[row])):
-            square = game_state.board[row][column]
-            if square != "--":
-                # score it positionally
-                piece_position_score = 0
-                if square[1] != "K":
-                    # for pawns
-                    if square[1] == "p":
-                        piece_position_score = piece_position_scores[square][row][column]
-                    else:
-                        piece_position_score = piece_position_scores[square[1]][row][column]
-
-                if square[0] == 'w':
-                    score += piece_score[square[1]] + piece_position_score * .1
-                elif square[0] == 'b':
-                    score -= piece_score[square[1]] + piece_position_score * .1
-    return score
+    return game_state.material_score + game_state.position_score * .1
@@ -0,0 +1,264 @@
+"""
+batch analysis of the positions of an EPD or FEN file
+every line of the input file is a position: a FEN, or an EPD record (the 4 position fields of a FEN followed by
+operations like bm Nf3; id "position 1";) - empty lines and lines starting with # are skipped
+the positions are searched by a pool of processes, a few at a time, and the results are written as JSON lines in
+the order of the input as soon as they are known, so the memory used does not depend on the size of the file
+a run which was stopped is resumed: the positions already in the output file are not searched again
+a position which cannot be loaded, or whose worker process dies, gets an error line and the run goes on - any other
+error of a search is a bug of the engine and stops the run
+
+usage:
+    python -m Chess.batchAnalysis positions.epd results.jsonl --depth 4
+    python -m Chess.batchAnalysis positions.epd results.jsonl --time 0.5 --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from Chess import aiMoveFinder, engine
+from Chess.transpositionTable import TranspositionTable
+
+# depth searched when neither a depth nor a time budget is given
+BATCH_DEPTH = 4
+# memory used by the transposition table of every process
+BATCH_TRANSPOSITION_TABLE_SIZE_MB = 16
+# positions given to the pool for every process before waiting for the first result
+POSITIONS_IN_FLIGHT_PER_WORKER = 2
+
+# searcher of a batch worker process, created once when the process starts by init_batch_worker
+batch_worker = {}
+
+"""
+split a line of the input file into the FEN of the position and its EPD operations
+a FEN gets its halfmove clock and move number, an EPD record gets 0 and 1
+"""
+
+
+def parse_position(line):
+    fields = line.split()
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        return " ".join(fields[:6]), parse_operations(" ".join(fields[6:]))
+    return " ".join(fields[:4] + ['0', '1']), parse_operations(" ".join(fields[4:]))
+
+
+"""
+EPD operations separated by ; as a dictionary of operation name: operand
+"""
+
+
+def parse_operations(text):
+    operations = {}
+    for operation in text.split(';'):
+        parts = operation.strip().split(None, 1)
+        if len(parts) != 0:
+            operations[parts[0]] = parts[1].strip().strip('"') if len(parts) > 1 else ""
+    return operations
+
+
+"""
+create the searcher of a batch worker process, kept for all the positions the process searches
+"""
+
+
+def init_batch_worker(transposition_table_size_mb):
+    batch_worker["searcher"] = aiMoveFinder.Searcher(TranspositionTable(transposition_table_size_mb))
+
+
+"""
+result of a position before its search: its line number, its FEN and the id and bm operations of an EPD record
+"""
+
+
+def start_result(line_number, line):
+    fen, operations = parse_position(line)
+    result = {"line": line_number, "fen": fen}
+    if "id" in operations:
+        result["id"] = operations["id"]
+    if "bm" in operations:
+        result["bm"] = operations["bm"]
+    return result
+
+
+"""
+search one position in a batch worker process and return its result as a dictionary
+every position starts with an empty transposition table, so the result does not depend on the other positions
+a position which cannot be loaded gets an error instead of a move, the other positions go on
+the score is in pawns, from the point of view of the side to move
+"""
+
+
+def analyse_position(line_number, line, depth, time_limit):
+    result = start_result(line_number, line)
+    try:
+        game_state = engine.GameState.from_fen(result["fen"], use_bitboards=True)
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+    searcher = batch_worker["searcher"]
+    searcher.transposition_table.clear()
+    best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit,
+                                max_depth=depth if depth is not None else aiMoveFinder.MAX_DEPTH,
+                                randomize_root=False)
+    result["best_move"] = best_move.get_chess_notation() if best_move is not None else None
+    result["score"] = searcher.score
+    result["depth"] = searcher.completed_depth
+    result["nodes"] = searcher.nodes_searched
+    result["seconds"] = round(searcher.search_seconds, 4)
+    return result
+
+
+"""
+number of the last input line in the output file of a previous run, 0 if there is none
+a result cut in the middle of its line (the run was killed while writing) is removed from the file
+"""
+
+
+def find_resume_line(output_path):
+    if not os.path.exists(output_path):
+        return 0
+    last_line = 0
+    complete_size = 0
+    with open(output_path, "rb") as output:
+        for line in output:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            last_line = result["line"]
+            complete_size += len(line)
+    if complete_size != os.path.getsize(output_path):
+        with open(output_path, "r+b") as output:
+            output.truncate(complete_size)
+    return last_line
+
+
+"""
+positions of the input file as (line number, line), read one line at a time, starting after first_line
+"""
+
+
+def read_positions(input_path, first_line=0):
+    with open(input_path) as positions:
+        for line_number, line in enumerate(positions, 1):
+            line = line.strip()
+            if line_number > first_line and line != "" and not line.startswith("#"):
+                yield line_number, line
+
+
+"""
+start the pool of processes searching the positions
+"""
+
+
+def start_pool(workers, transposition_table_size_mb):
+    return ProcessPoolExecutor(workers, initializer=init_batch_worker, initargs=(transposition_table_size_mb,))
+
+
+"""
+give a position to the pool, a broken pool gives back a future holding the error instead of raising it
+"""
+
+
+def submit_position(executor, line_number, line, depth, time_limit):
+    try:
+        return executor.submit(analyse_position, line_number, line, depth, time_limit)
+    except BrokenProcessPool as error:
+        future = Future()
+        future.set_exception(error)
+        return future
+
+
+"""
+write the result of the oldest position of in_flight, a deque of (line number, line, pool, future)
+a worker process which died (killed, out of memory...) breaks its pool: every position the pool still had gets an
+error result instead of stopping the run, and a new pool is started for the next positions
+returns the pool the next positions are given to
+"""
+
+
+def write_next_result(output, in_flight, executor, workers, transposition_table_size_mb):
+    line_number, line, position_executor, future = in_flight.popleft()
+    try:
+        result = future.result()
+    except BrokenProcessPool as error:
+        result = start_result(line_number, line)
+        result["error"] = "worker failed: %s" % error
+        if position_executor is executor:
+            executor.shutdown()
+            executor = start_pool(workers, transposition_table_size_mb)
+    write_result(output, result)
+    return executor
+
+
+"""
+analyse the positions of input_path and append the results to output_path
+the search of every position stops at depth or after time_limit seconds, whichever comes first (None for no limit)
+with resume, the positions already in output_path are skipped, otherwise output_path is written again
+returns the number of positions analysed by this run
+"""
+
+
+def analyse_file(input_path, output_path, depth=None, time_limit=None, workers=None, resume=True,
+                 transposition_table_size_mb=BATCH_TRANSPOSITION_TABLE_SIZE_MB):
+    if depth is None and time_limit is None:
+        depth = BATCH_DEPTH
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    first_line = find_resume_line(output_path) if resume else 0
+    analysed = 0
+    executor = start_pool(workers, transposition_table_size_mb)
+    try:
+        with open(output_path, "a" if resume else "w") as output:
+            in_flight = deque()
+            for line_number, line in read_positions(input_path, first_line):
+                in_flight.append((line_number, line, executor,
+                                  submit_position(executor, line_number, line, depth, time_limit)))
+                if len(in_flight) >= workers * POSITIONS_IN_FLIGHT_PER_WORKER:
+                    executor = write_next_result(output, in_flight, executor, workers, transposition_table_size_mb)
+                    analysed += 1
+            while len(in_flight) != 0:
+                executor = write_next_result(output, in_flight, executor, workers, transposition_table_size_mb)
+                analysed += 1
+    finally:
+        executor.shutdown()
+    return analysed
+
+
+"""
+write a result as a JSON line, flushed so a stopped run keeps every result written
+"""
+
+
+def write_result(output, result):
+    output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="search the positions of an EPD or FEN file")
+    parser.add_argument("input", help="EPD or FEN file, one position per line")
+    parser.add_argument("output", help="JSON lines file the results are appended to")
+    parser.add_argument("--depth", type=int, help="depth of the search, %d without a time budget" % BATCH_DEPTH)
+    parser.add_argument("--time", type=float, help="seconds for the search of every position")
+    parser.add_argument("--workers", type=int, help="number of processes, the number of cores by default")
+    parser.add_argument("--hash", type=float, default=BATCH_TRANSPOSITION_TABLE_SIZE_MB,
+                        help="MB of transposition table for every process")
+    parser.add_argument("--restart", action="store_true", help="analyse every position again instead of resuming")
+    options = parser.parse_args(arguments)
+
+    analysed = analyse_file(options.input, options.output, options.depth, options.time, options.workers,
+                            not options.restart, options.hash)
+    print("%d positions analysed" % analysed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+benchmark of the alpha beta search
+searches a set of positions to a fixed depth with iterative deepening and reports the nodes searched, the time and
+nodes/second
+the switchable parts of the search (SEARCH_FEATURES) can be turned off, --compare runs the positions with and
+without one of them and reports the difference in nodes and time
+
+usage:
+    python -m Chess.benchmark --depth 4
+    python -m Chess.benchmark --depth 4 --compare ordering
+    python -m Chess.benchmark --depth 3 --compare quiescence
+    python -m Chess.benchmark --depth 5 --compare null-move --disable lmr
+    python -m Chess.benchmark --depth 3 --disable ordering --bitboards
+"""
+import argparse
+import sys
+
+from Chess import aiMoveFinder, engine, perft
+
+# positions searched by the benchmark
+BENCHMARK_POSITIONS = [(name, fen) for name, fen, counts in perft.REFERENCE_POSITIONS[:4]] + [
+    ("rook endgame", "8/5pk1/6p1/8/1r6/5PP1/R5K1/8 w - - 0 40"),
+    ("queen against pawns", "8/8/3k4/8/2pp4/8/5Q2/6K1 w - - 0 50"),
+]
+
+# name of a switchable part of the search: keyword argument of aiMoveFinder.Searcher turning it on
+SEARCH_FEATURES = {
+    "ordering": "move_ordering",
+    "quiescence": "quiescence",
+    "pvs": "principal_variation_search",
+    "null-move": "null_move_pruning",
+    "lmr": "late_move_reductions",
+    "tablebase": "endgame_tablebase",
+}
+
+"""
+search the positions, a list of (name, FEN), to the given depth with the features in disabled turned off
+returns a list of (name, nodes, seconds, best move)
+"""
+
+
+def run_benchmark(depth, disabled=(), use_bitboards=False, output=None, positions=BENCHMARK_POSITIONS):
+    features = {SEARCH_FEATURES[feature]: False for feature in disabled}
+    results = []
+    for name, fen in positions:
+        game_state = engine.GameState.from_fen(fen, use_bitboards)
+        # every position gets a new searcher with an empty table, so the results do not depend on the order of the
+        # positions
+        searcher = aiMoveFinder.Searcher(**features)
+        best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=depth,
+                                    randomize_root=False)
+        seconds = searcher.search_seconds
+        results.append((name, searcher.nodes_searched, seconds, best_move))
+        if output is not None:
+            output.write("%-30s nodes %9d  time %7.2fs  %8.0f nodes/s  best move %s\n" %
+                         (name, searcher.nodes_searched, seconds, searcher.nodes_searched / max(seconds, 1e-9),
+                          best_move.get_chess_notation()))
+    return results
+
+
+"""
+total nodes and seconds of the results of run_benchmark
+"""
+
+
+def totals(results):
+    return sum(result[1] for result in results), sum(result[2] for result in results)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="search positions to a fixed depth and count the nodes")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--disable", action="append", default=[], choices=sorted(SEARCH_FEATURES),
+                        help="turn off a part of the search, can be given more than once")
+    parser.add_argument("--compare", choices=sorted(SEARCH_FEATURES),
+                        help="run the positions with and without this part of the search")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard move generator")
+    options = parser.parse_args(arguments)
+
+    print("depth %d, disabled: %s" % (options.depth, ", ".join(options.disable) or "none"))
+    results = run_benchmark(options.depth, options.disable, options.bitboards, sys.stdout)
+    nodes, seconds = totals(results)
+    print("total nodes %d  time %.2fs  %.0f nodes/s" % (nodes, seconds, nodes / max(seconds, 1e-9)))
+
+    if options.compare is not None:
+        print("\nwithout %s" % options.compare)
+        other_results = run_benchmark(options.depth, options.disable + [options.compare], options.bitboards,
+                                      sys.stdout)
+        other_nodes, other_seconds = totals(other_results)
+        print("total nodes %d  time %.2fs  %.0f nodes/s" %
+              (other_nodes, other_seconds, other_nodes / max(other_seconds, 1e-9)))
+        print("\n%s changes the nodes by %+.1f%% and the time by %+.1f%%" %
+              (options.compare, 100.0 * (nodes - other_nodes) / max(other_nodes, 1),
+               100.0 * (seconds - other_seconds) / max(other_seconds, 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+"""
+bitboard representation of a chess position, used as an alternative move generator for GameState
+every piece type of every colour has a 64-bit integer where bit (row * 8 + column) is set if such a piece
+stands on that square - row 0 is the 8th rank, like in GameState.board
+attacks of knights, kings and pawns are precomputed for every square, sliding pieces use precomputed rays
+which get cut at the first blocking piece
+"""
+from Chess.castleRights import WHITE_KING_SIDE, WHITE_QUEEN_SIDE, BLACK_KING_SIDE, BLACK_QUEEN_SIDE
+from Chess.move import Move
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+
+pieces = ['wp', 'wR', 'wN', 'wB', 'wQ', 'wK', 'bp', 'bR', 'bN', 'bB', 'bQ', 'bK']
+piece_index = {piece: index for index, piece in enumerate(pieces)}
+WHITE_PAWN, WHITE_ROOK, WHITE_KNIGHT, WHITE_BISHOP, WHITE_QUEEN, WHITE_KING = range(6)
+# index of a black piece = index of the white piece + BLACK
+BLACK = 6
+PAWN, ROOK, KNIGHT, BISHOP, QUEEN, KING = range(6)
+
+square_to_row_column = [(square // 8, square % 8) for square in range(64)]
+# pawns pushed to these squares are promoted, the first and the last rank
+PROMOTION_RANKS = 0xFF | 0xFF << 56
+# end squares of the king in castle moves
+CASTLE_SQUARES = 1 << 2 | 1 << 6 | 1 << 58 | 1 << 62
+# indexes of the tuple returned by BitboardPosition.prepare_move_generation
+(OWN_OFFSET, ENEMY_OFFSET, OWN_OCCUPANCY, ENEMY_OCCUPANCY, KING_SQUARE, ENEMY_ATTACKS, CHECKERS, CHECKER_SQUARE,
+ TARGET_SQUARES, PINS) = range(10)
+
+"""
+set of squares reachable from a square by the given (row, column) jumps
+"""
+
+
+def _jump_attacks(square, jumps):
+    row, column = square_to_row_column[square]
+    attacks = 0
+    for row_jump, column_jump in jumps:
+        end_row = row + row_jump
+        end_column = column + column_jump
+        if 0 <= end_row < 8 and 0 <= end_column < 8:
+            attacks |= 1 << (end_row * 8 + end_column)
+    return attacks
+
+
+knight_attacks = [_jump_attacks(square, ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)))
+                  for square in range(64)]
+king_attacks = [_jump_attacks(square, ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)))
+                for square in range(64)]
+# pawn_attacks[colour][square] - squares attacked by a pawn of that colour (0 = white, 1 = black)
+pawn_attacks = [[_jump_attacks(square, ((-1, -1), (-1, 1))) for square in range(64)],
+                [_jump_attacks(square, ((1, -1), (1, 1))) for square in range(64)]]
+
+# up, left, down, right, top-left, top-right, bottom-left, bottom-right - same order as GameState directions
+directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+# moving in a positive direction increases the square index, so the nearest blocker is the lowest set bit
+is_positive_direction = [direction[0] * 8 + direction[1] > 0 for direction in directions]
+
+"""
+set of squares on a ray starting next to the square (the square itself is not included)
+"""
+
+
+def _ray(square, direction):
+    row, column = square_to_row_column[square]
+    ray = 0
+    row += direction[0]
+    column += direction[1]
+    while 0 <= row < 8 and 0 <= column < 8:
+        ray |= 1 << (row * 8 + column)
+        row += direction[0]
+        column += direction[1]
+    return ray
+
+
+# rays[direction index][square]
+rays = [[_ray(square, direction) for square in range(64)] for direction in directions]
+
+"""
+squares strictly between 2 squares on the same rank, file or diagonal, 0 for any other pair of squares
+"""
+
+
+def _between(first_square, second_square):
+    for direction_index in range(8):
+        ray = rays[direction_index][first_square]
+        if ray >> second_square & 1:
+            return ray & ~rays[direction_index][second_square] & ~(1 << second_square)
+    return 0
+
+
+between = [[_between(first_square, second_square) for second_square in range(64)] for first_square in range(64)]
+
+"""
+index of the piece nearest to the start of a ray given the blockers on that ray
+"""
+
+
+def _nearest_square(blockers, positive_direction):
+    if positive_direction:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+"""
+attacks of a sliding piece from the square along the given directions, stopping at (and including) blockers
+"""
+
+
+def _slider_attacks(square, occupied, direction_indexes):
+    attacks = 0
+    for direction_index in direction_indexes:
+        ray = rays[direction_index][square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[direction_index][_nearest_square(blockers, is_positive_direction[direction_index])]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    return _slider_attacks(square, occupied, ROOK_DIRECTIONS)
+
+
+def bishop_attacks(square, occupied):
+    return _slider_attacks(square, occupied, BISHOP_DIRECTIONS)
+
+
+"""
+iterate through the indexes of the set bits
+"""
+
+
+def squares_of(bitboard):
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+
+class BitboardPosition:
+    def __init__(self, board):
+        self.set_board(board)
+
+    """
+    rebuild all the bitboards from an 8x8 board of GameState
+    """
+
+    def set_board(self, board):
+        self.piece_bitboards = [0] * 12
+        for row in range(8):
+            for column in range(8):
+                square = board[row][column]
+                if square != "--":
+                    self.piece_bitboards[piece_index[square]] |= 1 << (row * 8 + column)
+        self.white_occupancy = 0
+        self.black_occupancy = 0
+        for index in range(6):
+            self.white_occupancy |= self.piece_bitboards[index]
+            self.black_occupancy |= self.piece_bitboards[index + BLACK]
+
+    """
+    add or remove a piece from a square - the same call undoes itself
+    """
+
+    def toggle(self, piece, row, column):
+        bit = 1 << (row * 8 + column)
+        index = piece_index[piece]
+        self.piece_bitboards[index] ^= bit
+        if index < BLACK:
+            self.white_occupancy ^= bit
+        else:
+            self.black_occupancy ^= bit
+
+    """
+    update the bitboards with a move, given the piece that ends up on the end square (different on promotion)
+    calling it a second time with the same arguments undoes the move
+    """
+
+    def toggle_move(self, move, piece_placed):
+        self.toggle(move.piece_moved, move.start_row, move.start_column)
+        if move.is_enpassant_move:
+            self.toggle(move.piece_captured, move.start_row, move.end_column)
+        elif move.piece_captured != "--":
+            self.toggle(move.piece_captured, move.end_row, move.end_column)
+        self.toggle(piece_placed, move.end_row, move.end_column)
+        if move.is_castle_move:
+            rook = move.piece_moved[0] + 'R'
+            # king side castle
+            if move.end_column - move.start_column == 2:
+                self.toggle(rook, move.end_row, move.end_column + 1)
+                self.toggle(rook, move.end_row, move.end_column - 1)
+            # queen side castle
+            else:
+                self.toggle(rook, move.end_row, move.end_column - 2)
+                self.toggle(rook, move.end_row, move.end_column + 1)
+
+    """
+    set of squares from where pieces of the given colour attack the square
+    """
+
+    def attackers_to(self, square, white_attackers, occupied):
+        bitboards = self.piece_bitboards
+        offset = 0 if white_attackers else BLACK
+        # a pawn of the attacking colour attacks the square if a pawn of the other colour on the square
+        # would attack the pawn
+        attackers = pawn_attacks[1 if white_attackers else 0][square] & bitboards[offset + PAWN]
+        attackers |= knight_attacks[square] & bitboards[offset + KNIGHT]
+        attackers |= king_attacks[square] & bitboards[offset + KING]
+        queens = bitboards[offset + QUEEN]
+        attackers |= rook_attacks(square, occupied) & (bitboards[offset + ROOK] | queens)
+        attackers |= bishop_attacks(square, occupied) & (bitboards[offset + BISHOP] | queens)
+        return attackers
+
+    """
+    set of all squares attacked by the given colour
+    """
+
+    def attacked_squares(self, white_attackers, occupied):
+        bitboards = self.piece_bitboards
+        offset = 0 if white_attackers else BLACK
+        pawns = bitboards[offset + PAWN]
+        if white_attackers:
+            attacks = (pawns & ~FILE_A) >> 9 | (pawns & ~FILE_H) >> 7
+        else:
+            attacks = ((pawns & ~FILE_A) << 7 | (pawns & ~FILE_H) << 9) & FULL_BOARD
+        for square in squares_of(bitboards[offset + KNIGHT]):
+            attacks |= knight_attacks[square]
+        for square in squares_of(bitboards[offset + KING]):
+            attacks |= king_attacks[square]
+        queens = bitboards[offset + QUEEN]
+        for square in squares_of(bitboards[offset + ROOK] | queens):
+            attacks |= rook_attacks(square, occupied)
+        for square in squares_of(bitboards[offset + BISHOP] | queens):
+            attacks |= bishop_attacks(square, occupied)
+        return attacks
+
+    """
+    pinned pieces of the side to move
+    returns a dictionary square of the pinned piece -> squares it can still move to (the line king - pinner)
+    """
+
+    def get_pins(self, king_square, own_occupancy, enemy_occupancy, enemy_offset):
+        bitboards = self.piece_bitboards
+        enemy_queens = bitboards[enemy_offset + QUEEN]
+        straight_pinners = bitboards[enemy_offset + ROOK] | enemy_queens
+        diagonal_pinners = bitboards[enemy_offset + BISHOP] | enemy_queens
+        occupied = own_occupancy | enemy_occupancy
+        pins = {}
+        for direction_index in range(8):
+            pinners = straight_pinners if direction_index < 4 else diagonal_pinners
+            ray = rays[direction_index][king_square]
+            if not ray & pinners:
+                continue
+            blockers = ray & occupied
+            positive_direction = is_positive_direction[direction_index]
+            first_square = _nearest_square(blockers, positive_direction)
+            if not own_occupancy >> first_square & 1:
+                continue
+            blockers ^= 1 << first_square
+            if not blockers:
+                continue
+            second_square = _nearest_square(blockers, positive_direction)
+            if pinners >> second_square & 1:
+                pins[first_square] = between[king_square][second_square] | 1 << second_square
+        return pins
+
+    """
+    all legal moves of the side to move, same moves as the GameState generator
+    pawn promotions are always to a queen, like in GameState.make_move
+    returns the moves and if the king is in check
+    """
+
+    def get_valid_moves(self, game_state):
+        setup = self.prepare_move_generation(game_state)
+        moves = []
+        self.add_moves(game_state, setup, moves, FULL_BOARD, FULL_BOARD, True)
+        self.add_castle_moves(game_state, setup, moves)
+        return moves, setup[CHECKERS] != 0
+
+    """
+    staged version of get_valid_moves, see GameState.generate_move_stages:
+    a list with the hash move, captures with en passant and promotions, quiet moves and then castling
+    """
+
+    def generate_move_stages(self, game_state, hash_move_id=None):
+        setup = self.prepare_move_generation(game_state)
+        game_state.is_king_in_check = setup[CHECKERS] != 0
+        game_state.pins = []
+        game_state.checks = []
+        hash_moves = []
+        if hash_move_id is not None:
+            # only the moves to the end square of the hash move are generated
+            end_square = 1 << (hash_move_id & 0x3F)
+            moves = []
+            self.add_moves(game_state, setup, moves, end_square, end_square, True)
+            if end_square & CASTLE_SQUARES:
+                self.add_castle_moves(game_state, setup, moves)
+            hash_moves = [move for move in moves if move.move_id == hash_move_id]
+            if len(hash_moves) == 0:
+                hash_move_id = None
+        yield hash_moves
+        enemy_occupancy = setup[ENEMY_OCCUPANCY]
+        empty = ~(setup[OWN_OCCUPANCY] | enemy_occupancy) & FULL_BOARD
+        # promotions are generated with the captures
+        for piece_mask, push_mask, enpassant in ((enemy_occupancy, PROMOTION_RANKS, True),
+                                                  (empty, ~PROMOTION_RANKS & FULL_BOARD, False)):
+            moves = []
+            self.add_moves(game_state, setup, moves, piece_mask, push_mask, enpassant)
+            yield [move for move in moves if move.move_id != hash_move_id]
+        moves = []
+        self.add_castle_moves(game_state, setup, moves)
+        yield [move for move in moves if move.move_id != hash_move_id]
+
+    """
+    information about the current position shared by all the stages of the move generation
+    returns a tuple, indexed by the constants next to the method
+    """
+
+    def prepare_move_generation(self, game_state):
+        white_to_move = game_state.white_to_move
+        bitboards = self.piece_bitboards
+        if white_to_move:
+            own_offset, enemy_offset = 0, BLACK
+            own_occupancy, enemy_occupancy = self.white_occupancy, self.black_occupancy
+        else:
+            own_offset, enemy_offset = BLACK, 0
+            own_occupancy, enemy_occupancy = self.black_occupancy, self.white_occupancy
+        occupied = own_occupancy | enemy_occupancy
+        king_bitboard = bitboards[own_offset + KING]
+        king_square = king_bitboard.bit_length() - 1
+        # squares attacked by the opponent, the king is removed so it cannot retreat along the checking ray
+        enemy_attacks = self.attacked_squares(not white_to_move, occupied ^ king_bitboard)
+        checkers = self.attackers_to(king_square, not white_to_move, occupied)
+        if checkers and not checkers & (checkers - 1):
+            checker_square = checkers.bit_length() - 1
+            # capture the checking piece or block the check
+            target_squares = checkers | between[king_square][checker_square]
+        else:
+            checker_square = -1
+            target_squares = FULL_BOARD
+        # pins do not matter in a double check, only the king can move
+        if checkers & (checkers - 1):
+            pins = {}
+        else:
+            pins = self.get_pins(king_square, own_occupancy, enemy_occupancy, enemy_offset)
+        return (own_offset, enemy_offset, own_occupancy, enemy_occupancy, king_square, enemy_attacks, checkers,
+                checker_square, target_squares, pins)
+
+    """
+    add the legal moves ending on the squares of piece_mask to the list of moves, castling excluded
+    pawn pushes end on the squares of push_mask instead and en passant is added only if enpassant is set, whatever
+    the masks are
+    """
+
+    def add_moves(self, game_state, setup, moves, piece_mask, push_mask, enpassant):
+        (own_offset, enemy_offset, own_occupancy, enemy_occupancy, king_square, enemy_attacks, checkers,
+         checker_square, target_squares, pins) = setup
+        board = game_state.board
+        bitboards = self.piece_bitboards
+        occupied = own_occupancy | enemy_occupancy
+        king_start = square_to_row_column[king_square]
+        for end_square in squares_of(king_attacks[king_square] & ~own_occupancy & ~enemy_attacks & piece_mask):
+            moves.append(Move(king_start, square_to_row_column[end_square], board))
+        # double check - only the king can move
+        if checkers & (checkers - 1):
+            return
+
+        # squares where other pieces than the king can go
+        destinations = ~own_occupancy & target_squares & piece_mask
+
+        # knights - a pinned knight can never move
+        for start_square in squares_of(bitboards[own_offset + KNIGHT]):
+            if start_square in pins:
+                continue
+            start = square_to_row_column[start_square]
+            for end_square in squares_of(knight_attacks[start_square] & destinations):
+                moves.append(Move(start, square_to_row_column[end_square], board))
+
+        # sliding pieces
+        queens = bitboards[own_offset + QUEEN]
+        for start_square in squares_of(bitboards[own_offset + ROOK] | bitboards[own_offset + BISHOP] | queens):
+            bit = 1 << start_square
+            attacks = 0
+            if bit & (bitboards[own_offset + ROOK] | queens):
+                attacks |= rook_attacks(start_square, occupied)
+            if bit & (bitboards[own_offset + BISHOP] | queens):
+                attacks |= bishop_attacks(start_square, occupied)
+            attacks &= destinations
+            if start_square in pins:
+                attacks &= pins[start_square]
+            start = square_to_row_column[start_square]
+            for end_square in squares_of(attacks):
+                moves.append(Move(start, square_to_row_column[end_square], board))
+
+        # pawns
+        pawns = bitboards[own_offset + PAWN]
+        empty = ~occupied & FULL_BOARD
+        white_to_move = own_offset == 0
+        if white_to_move:
+            single_pushes = pawns >> 8 & empty
+            # double push from the 2nd rank, landing on the 4th rank
+            double_pushes = (single_pushes & (0xFF << 40)) >> 8 & empty
+            forward = -8
+        else:
+            single_pushes = (pawns << 8) & empty
+            double_pushes = ((single_pushes & (0xFF << 16)) << 8) & empty
+            forward = 8
+        push_targets = target_squares & push_mask
+        for end_square in squares_of(single_pushes & push_targets):
+            start_square = end_square - forward
+            if start_square not in pins or pins[start_square] >> end_square & 1:
+                moves.append(Move(square_to_row_column[start_square], square_to_row_column[end_square], board))
+        for end_square in squares_of(double_pushes & push_targets):
+            start_square = end_square - 2 * forward
+            if start_square not in pins or pins[start_square] >> end_square & 1:
+                moves.append(Move(square_to_row_column[start_square], square_to_row_column[end_square], board))
+        colour = 0 if white_to_move else 1
+        capture_targets = enemy_occupancy & destinations
+        if capture_targets:
+            for start_square in squares_of(pawns):
+                captures = pawn_attacks[colour][start_square] & capture_targets
+                if start_square in pins:
+                    captures &= pins[start_square]
+                start = square_to_row_column[start_square]
+                for end_square in squares_of(captures):
+                    moves.append(Move(start, square_to_row_column[end_square], board))
+
+        # en passant
+        if enpassant and game_state.enpassant_possible != ():
+            enpassant_row, enpassant_column = game_state.enpassant_possible
+            enpassant_square = enpassant_row * 8 + enpassant_column
+            captured_square = enpassant_square - forward
+            # capturing pawns are on the squares a pawn of the other colour would attack from the en passant square
+            for start_square in squares_of(pawn_attacks[1 - colour][enpassant_square] & pawns):
+                # in check, the capture has to remove the checking pawn or block the check
+                if checkers and captured_square != checker_square and not target_squares >> enpassant_square & 1:
+                    continue
+                # both pawns leave their squares at the same time, so look again at the king's rays
+                occupied_after = occupied ^ (1 << start_square) ^ (1 << captured_square) ^ (1 << enpassant_square)
+                enemy_queens = bitboards[enemy_offset + QUEEN]
+                if rook_attacks(king_square, occupied_after) & (bitboards[enemy_offset + ROOK] | enemy_queens):
+                    continue
+                if bishop_attacks(king_square, occupied_after) & (bitboards[enemy_offset + BISHOP] | enemy_queens):
+                    continue
+                moves.append(Move(square_to_row_column[start_square], (enpassant_row, enpassant_column), board,
+                                  is_enpassant_move=True))
+
+    """
+    add the castle moves of the side to move to the list of moves
+    """
+
+    def add_castle_moves(self, game_state, setup, moves):
+        own_occupancy, enemy_occupancy = setup[OWN_OCCUPANCY], setup[ENEMY_OCCUPANCY]
+        king_square, enemy_attacks = setup[KING_SQUARE], setup[ENEMY_ATTACKS]
+        # cannot castle while king in check
+        if setup[CHECKERS]:
+            return
+        occupied = own_occupancy | enemy_occupancy
+        king_row, king_column = square_to_row_column[king_square]
+        castling_rights = game_state.castling_rights
+        if game_state.white_to_move:
+            king_side, queen_side = castling_rights & WHITE_KING_SIDE, castling_rights & WHITE_QUEEN_SIDE
+        else:
+            king_side, queen_side = castling_rights & BLACK_KING_SIDE, castling_rights & BLACK_QUEEN_SIDE
+        if king_side and king_column + 2 < 8:
+            path = 1 << (king_square + 1) | 1 << (king_square + 2)
+            if not path & occupied and not path & enemy_attacks:
+                moves.append(Move((king_row, king_column), (king_row, king_column + 2), game_state.board,
+                                  is_castle_move=True))
+        if queen_side and king_column - 3 >= 0:
+            path = 1 << (king_square - 1) | 1 << (king_square - 2)
+            if not (path | 1 << (king_square - 3)) & occupied and not path & enemy_attacks:
+                moves.append(Move((king_row, king_column), (king_row, king_column - 2), game_state.board,
+                                  is_castle_move=True))
@@ -1,12 +1,86 @@
+"""
+castling rights of both sides, kept by the game state as a 4 bit integer
+a move clears the rights of the king and rook squares it starts from or ends on, with the mask of every square
+"""
+
+# bits of the castling rights, in the order of the zobrist castling keys
+WHITE_KING_SIDE = 1
+WHITE_QUEEN_SIDE = 2
+BLACK_KING_SIDE = 4
+BLACK_QUEEN_SIDE = 8
+ALL_CASTLING_RIGHTS = 15
+# letter of every right in a FEN, in the order they are written
+fen_castling_letters = (('K', WHITE_KING_SIDE), ('Q', WHITE_QUEEN_SIDE), ('k', BLACK_KING_SIDE),
+                        ('q', BLACK_QUEEN_SIDE))
+# colour, row and rook column of every right, the king starts on column 4
+castling_homes = ((WHITE_KING_SIDE, 'w', 7, 7), (WHITE_QUEEN_SIDE, 'w', 7, 0), (BLACK_KING_SIDE, 'b', 0, 7),
+                  (BLACK_QUEEN_SIDE, 'b', 0, 0))
+
+"""
+castling_masks[row * 8 + column] is the rights kept by a move from or to that square: moving the king or a rook,
+or taking a rook, loses the rights of that piece
+"""
+
+
+def compute_castling_masks():
+    castling_masks = [ALL_CASTLING_RIGHTS] * 64
+    for row, king_side, queen_side in ((7, WHITE_KING_SIDE, WHITE_QUEEN_SIDE), (0, BLACK_KING_SIDE, BLACK_QUEEN_SIDE)):
+        castling_masks[row * 8 + 4] &= ~(king_side | queen_side)
+        castling_masks[row * 8 + 7] &= ~king_side
+        castling_masks[row * 8] &= ~queen_side
+    return castling_masks
+
+
+castling_masks = compute_castling_masks()
+
+
+def castling_rights_from_fen(castling):
+    rights = 0
+    for letter, right in fen_castling_letters:
+        if letter in castling:
+            rights |= right
+    return rights
+
+
+"""
+the rights which can be used on the board: a right is lost when its king or rook is not on its starting square
+"""
+
+
+def castling_rights_on_board(rights, board):
+    for right, colour, row, rook_column in castling_homes:
+        if board[row][4] != colour + 'K' or board[row][rook_column] != colour + 'R':
+            rights &= ~right
+    return rights
+
+
+def castling_fen(rights):
+    return "".join(letter for letter, right in fen_castling_letters if rights & right) or '-'
+
 
 """
-class that handles the castling rights of a side at any point of the game
+the castling rights of a game state seen one right at a time, reading and writing its castling_rights integer
 """
 
 
 class CastleRights:
-    def __init__(self, white_king_side, black_king_side, white_queen_side, black_queen_side):
-        self.white_king_side = white_king_side
-        self.white_queen_side = white_queen_side
-        self.black_king_side = black_king_side
-        self.black_queen_side = black_queen_side
+    def __init__(self, game_state):
+        self.game_state = game_state
+
+    def has_right(self, right):
+        return self.game_state.castling_rights & right != 0
+
+    def set_right(self, right, value):
+        if value:
+            self.game_state.castling_rights |= right
+        else:
+            self.game_state.castling_rights &= ~right
+
+    white_king_side = property(lambda self: self.has_right(WHITE_KING_SIDE),
+                               lambda self, value: self.set_right(WHITE_KING_SIDE, value))
+    white_queen_side = property(lambda self: self.has_right(WHITE_QUEEN_SIDE),
+                                lambda self, value: self.set_right(WHITE_QUEEN_SIDE, value))
+    black_king_side = property(lambda self: self.has_right(BLACK_KING_SIDE),
+                               lambda self, value: self.set_right(BLACK_KING_SIDE, value))
+    black_queen_side = property(lambda self: self.has_right(BLACK_QUEEN_SIDE),
+                                lambda self, value: self.set_right(BLACK_QUEEN_SIDE, value))
@@ -3,12 +3,65 @@ responsible for storing all information about the current state of a chess game
 responsible for determining the valid moves at the current state
 will keep a move log
 """
-from Chess.castleRights import CastleRights
+from Chess import pieceScores, zobrist
+from Chess.bitboard import BitboardPosition
+from Chess.mailbox import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, TYPE_MASK, WHITE, BLACK, \
+    COLOUR_MASK, EMPTY, OFF_BOARD, ORTHOGONAL_OFFSETS, DIAGONAL_OFFSETS, KING_OFFSETS, KNIGHT_OFFSETS, piece_codes, \
+    coordinates, board_squares, square_of, squares_from_board
+from Chess.castleRights import CastleRights, ALL_CASTLING_RIGHTS, WHITE_KING_SIDE, WHITE_QUEEN_SIDE, \
+    BLACK_KING_SIDE, BLACK_QUEEN_SIDE, castling_masks, castling_rights_from_fen, castling_rights_on_board, \
+    castling_fen
 from Chess.move import Move
 
+# up, left, down, right, top-left, top-right, bottom-left, bottom-right
+attack_directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+knight_jumps = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+"""
+the codes of the pieces of the given colour which attack a king found in every direction: next to the king (where
+kings and pawns attack as well) and farther away (sliders only)
+"""
+
+
+def compute_ray_attackers(colour):
+    near_attackers = []
+    far_attackers = []
+    # a pawn attacks diagonally forward, so it is found looking from the king towards the pawn's own side
+    pawn_directions = (6, 7) if colour == WHITE else (4, 5)
+    for index in range(8):
+        sliders = frozenset(colour | piece_type for piece_type in ((ROOK, QUEEN) if index < 4 else (BISHOP, QUEEN)))
+        far_attackers.append(sliders)
+        near_attackers.append(sliders | {colour | KING} | ({colour | PAWN} if index in pawn_directions else set()))
+    return tuple(near_attackers), tuple(far_attackers)
+
+
+ray_attackers = {colour: compute_ray_attackers(colour) for colour in (WHITE, BLACK)}
+# directions of the rooks, bishops and queens
+slider_offsets = {ROOK: ORTHOGONAL_OFFSETS, BISHOP: DIAGONAL_OFFSETS, QUEEN: KING_OFFSETS}
+# pin direction of every square when nothing is pinned, shared as it is never written to
+no_pins = (0,) * 128
+
+# kinds of moves produced by the move functions, used to generate moves in stages
+ALL_MOVES = 0
+# captures, en passant and pawn promotions
+CAPTURE_MOVES = 1
+# every other move, castling excluded
+QUIET_MOVES = 2
+
+# order of the lists given by GameState.generate_move_stages
+HASH_MOVE_STAGE, CAPTURE_STAGE, QUIET_STAGE, CASTLE_STAGE = range(4)
+
+# the game is drawn after 50 moves of each side without a capture or a pawn move
+FIFTY_MOVE_RULE_PLIES = 100
+
+# pieces of the FEN notation, upper case for white and lower case for black
+piece_from_fen = {'P': 'wp', 'R': 'wR', 'N': 'wN', 'B': 'wB', 'Q': 'wQ', 'K': 'wK',
+                  'p': 'bp', 'r': 'bR', 'n': 'bN', 'b': 'bB', 'q': 'bQ', 'k': 'bK'}
+fen_from_piece = {piece: character for character, piece in piece_from_fen.items()}
+
 
 class GameState:
-    def __init__(self):
+    # use_bitboards selects the move generator: the bitboard one or the one walking self.board
+    def __init__(self, use_bitboards=False):
         # board is a 8x8 2 dimensional list + each element has 2 characters
         # first character = colour of the piece : black(b) or white(w)
         # second character = type of the piece : King(K), Queen(Q), Rook(R), Bishop(B), Knight(N), Pawn(P)
@@ -22,8 +75,11 @@ class GameState:
             ["--", "--", "--", "--", "--", "--", "--", "--"],
             ["wp", "wp", "wp", "wp", "wp", "wp", "wp", "wp"],
             ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]]
-        self.move_functions = {'p': self.get_pawn_moves, 'R': self.get_rook_moves, 'N': self.get_knight_moves,
-                               'B': self.get_bishop_moves, 'Q': self.get_queen_moves, 'K': self.get_king_moves}
+        # the same board as a 0x88 array of piece codes, read by the move generator, see mailbox.py
+        self.squares = squares_from_board(self.board)
+        # move functions by piece type
+        self.move_functions = {PAWN: self.get_pawn_moves, ROOK: self.get_rook_moves, KNIGHT: self.get_knight_moves,
+                               BISHOP: self.get_bishop_moves, QUEEN: self.get_queen_moves, KING: self.get_king_moves}
         self.white_to_move = True
         self.move_log = []
         self.white_king_location = (7, 4)
@@ -31,33 +87,183 @@ class GameState:
         self.is_king_in_check = False
         # a list of all current pins
         self.pins = []
+        # pin_directions[square] is the 0x88 step along the pin of the piece on that square, 0 if it is free
+        self.pin_directions = no_pins
         # a list of all current checks
         self.checks = []
         # square coordinates where en passant capture is possible
         self.enpassant_possible = ()
-        self.enpassant_possible_log = [self.enpassant_possible]
         self.checkmate = False
         self.stalemate = False
-        self.current_castling_rights = CastleRights(True, True, True, True)
-        # we need to create new castle right objects when we append to log because of reference issues
-        self.castle_rights_log = [CastleRights(self.current_castling_rights.white_king_side,
-                                               self.current_castling_rights.black_king_side,
-                                               self.current_castling_rights.white_queen_side,
-                                               self.current_castling_rights.black_queen_side)]
+        # set by update_draw: fifty-move rule, threefold repetition or insufficient material
+        self.draw = False
+        # number of moves since the last capture or pawn move, for the fifty-move rule and the repetitions
+        self.halfmove_clock = 0
+        # castling rights of both sides as bits, see castleRights.py
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        # the same rights seen one at a time as white_king_side, white_queen_side, black_king_side, black_queen_side
+        self.current_castling_rights = CastleRights(self)
+        # (castling rights, en passant square, halfmove clock) before every move made, put back by undo_move
+        # the piece captured by a move is kept by the move itself
+        self.undo_log = []
+        # 64-bit zobrist hash of the current position, updated incrementally by make_move and undo_move
+        self.zobrist_key = zobrist.compute_hash(self)
+        self.zobrist_key_log = [self.zobrist_key]
+        # material and positional totals used to evaluate the position, updated incrementally like the hash
+        self.material_score, self.position_score = pieceScores.compute_scores(self.board)
+        self.score_log = [(self.material_score, self.position_score)]
+        # number of the full move the game state started at, given by the FEN the game state was created from
+        self.start_fullmove_number = 1
+        # bitboards are kept in sync with self.board only when they are used to generate moves
+        self.bitboards = BitboardPosition(self.board) if use_bitboards else None
+
     """
     setter method for the board
+    the 0x88 board, the king locations, the hash, the scores and the bitboards are computed again from the new board
     """
     def set_board(self, new_board):
         self.board = new_board
+        self.squares = squares_from_board(new_board)
+        for row in range(8):
+            for column in range(8):
+                if new_board[row][column] == 'wK':
+                    self.white_king_location = (row, column)
+                elif new_board[row][column] == 'bK':
+                    self.black_king_location = (row, column)
+        self.zobrist_key = zobrist.compute_hash(self)
+        self.zobrist_key_log[-1] = self.zobrist_key
+        self.material_score, self.position_score = pieceScores.compute_scores(new_board)
+        self.score_log[-1] = (self.material_score, self.position_score)
+        if self.bitboards is not None:
+            self.bitboards.set_board(new_board)
+
+    """
+    create a game state from a FEN string - pieces, side to move, castling rights, en passant square and move number
+    the halfmove clock and move number fields can be left out, castling rights without their king and rook are dropped
+    raises ValueError if the FEN is not valid or the side not to move is in check
+    """
+
+    @classmethod
+    def from_fen(cls, fen, use_bitboards=False):
+        fields = fen.split()
+        if len(fields) < 2 or len(fields) > 6:
+            raise ValueError("FEN needs between 2 and 6 fields: " + fen)
+        board = []
+        for rank in fields[0].split('/'):
+            row = []
+            for character in rank:
+                if character.isdigit():
+                    row += ["--"] * int(character)
+                elif character in piece_from_fen:
+                    row.append(piece_from_fen[character])
+                else:
+                    raise ValueError("unknown piece " + character + " in FEN: " + fen)
+            if len(row) != 8:
+                raise ValueError("rank " + rank + " does not have 8 squares in FEN: " + fen)
+            board.append(row)
+        if len(board) != 8:
+            raise ValueError("FEN does not have 8 ranks: " + fen)
+        if sum(row.count('wK') for row in board) != 1 or sum(row.count('bK') for row in board) != 1:
+            raise ValueError("FEN needs one king of each colour: " + fen)
+        if fields[1] not in ('w', 'b'):
+            raise ValueError("side to move must be w or b in FEN: " + fen)
+        castling = fields[2] if len(fields) > 2 else '-'
+        if castling != '-' and (len(castling) == 0 or any(character not in "KQkq" for character in castling)):
+            raise ValueError("castling rights must be - or letters of KQkq in FEN: " + fen)
+        enpassant = fields[3] if len(fields) > 3 else '-'
+        if enpassant != '-':
+            if len(enpassant) != 2 or enpassant[0] not in Move.file_to_column or \
+                    enpassant[1] != ('6' if fields[1] == 'w' else '3'):
+                raise ValueError("en passant square must be - or a square of the 6th rank with white to move, of the "
+                                 "3rd rank with black to move in FEN: " + fen)
+            # the pawn of the other side has just gone through the square from its starting square
+            row, column = Move.rank_to_row[enpassant[1]], Move.file_to_column[enpassant[0]]
+            direction = 1 if fields[1] == 'w' else -1
+            if board[row + direction][column] != ('bp' if fields[1] == 'w' else 'wp') or \
+                    board[row][column] != "--" or board[row - direction][column] != "--":
+                raise ValueError("no pawn has just moved 2 squares through the en passant square in FEN: " + fen)
+        halfmove_clock = fields[4] if len(fields) > 4 else '0'
+        if not halfmove_clock.isdigit():
+            raise ValueError("halfmove clock must be a number in FEN: " + fen)
+        fullmove_number = fields[5] if len(fields) > 5 else '1'
+        if not fullmove_number.isdigit():
+            raise ValueError("move number must be a number in FEN: " + fen)
+
+        game_state = cls(use_bitboards=use_bitboards)
+        game_state.white_to_move = fields[1] == 'w'
+        # rights written for a king or rook which is not on its square are dropped, they could never be used
+        game_state.castling_rights = castling_rights_on_board(castling_rights_from_fen(castling), board)
+        if enpassant != '-':
+            game_state.enpassant_possible = (Move.rank_to_row[enpassant[1]], Move.file_to_column[enpassant[0]])
+        game_state.halfmove_clock = int(halfmove_clock)
+        game_state.start_fullmove_number = max(1, int(fullmove_number))
+        # set_board also finds the kings and recomputes the hash, the scores and the bitboards
+        game_state.set_board(board)
+        # the side to move could take the king of the other side
+        king_row, king_column = game_state.black_king_location if game_state.white_to_move else \
+            game_state.white_king_location
+        if len(game_state.get_square_attackers(king_row, king_column, fields[1], stop_at_first=True)) != 0:
+            raise ValueError("the side not to move is in check in FEN: " + fen)
+        return game_state
+
+    """
+    FEN string of the current position
+    """
+
+    def to_fen(self):
+        ranks = []
+        for row in self.board:
+            rank = ""
+            empty_squares = 0
+            for square in row:
+                if square == "--":
+                    empty_squares += 1
+                else:
+                    if empty_squares != 0:
+                        rank += str(empty_squares)
+                        empty_squares = 0
+                    rank += fen_from_piece[square]
+            if empty_squares != 0:
+                rank += str(empty_squares)
+            ranks.append(rank)
+        if self.enpassant_possible != ():
+            enpassant = Move.column_to_file[self.enpassant_possible[1]] + Move.row_to_rank[self.enpassant_possible[0]]
+        else:
+            enpassant = '-'
+        # the move number goes up after every move of black
+        first_move_white = self.white_to_move == (len(self.move_log) % 2 == 0)
+        fullmove_number = self.start_fullmove_number + (len(self.move_log) + (0 if first_move_white else 1)) // 2
+        return " ".join(["/".join(ranks), 'w' if self.white_to_move else 'b', castling_fen(self.castling_rights),
+                         enpassant, str(self.halfmove_clock), str(fullmove_number)])
 
     """
     function takes a move as parameter and executes it
-    castling, en passant and pawn promotion not working yet
+    the board of strings, the 0x88 board and the bitboards (when they are used) are all moved
     """
 
     def make_move(self, move):
+        self.undo_log.append((self.castling_rights, self.enpassant_possible, self.halfmove_clock))
+        # the hash is updated by XOR-ing out the old features of the position and XOR-ing in the new ones
+        key = self.zobrist_key ^ zobrist.black_to_move_key
+        key ^= zobrist.piece_keys[move.piece_moved][move.start_row][move.start_column]
+        if move.piece_captured != "--" and not move.is_enpassant_move:
+            key ^= zobrist.piece_keys[move.piece_captured][move.end_row][move.end_column]
+        key ^= zobrist.enpassant_key(self.enpassant_possible)
+        key ^= zobrist.castling_keys[self.castling_rights]
+        # the captured piece is taken off its square, which is not the end square for en passant
+        position_values = pieceScores.position_values
+        captured_row = move.start_row if move.is_enpassant_move else move.end_row
+        material_score = self.material_score - pieceScores.material_values[move.piece_captured]
+        position_score = self.position_score - position_values[move.piece_moved][move.start_row][move.start_column] \
+            - position_values[move.piece_captured][captured_row][move.end_column]
+
         self.board[move.start_row][move.start_column] = "--"
         self.board[move.end_row][move.end_column] = move.piece_moved
+        squares = self.squares
+        start_square = square_of(move.start_row, move.start_column)
+        end_square = square_of(move.end_row, move.end_column)
+        squares[end_square] = squares[start_square]
+        squares[start_square] = EMPTY
         # add move to history of moves
         self.move_log.append(move)
         # update the location of the king
@@ -71,11 +277,20 @@ class GameState:
         # if pawn promotion, we automatically promote to a queen
         if move.is_pawn_promotion:
             self.board[move.end_row][move.end_column] = move.piece_moved[0] + 'Q'
+            squares[end_square] = squares[end_square] & COLOUR_MASK | QUEEN
 
         # en passant case
         if move.is_enpassant_move:
             # capturing the pawn
             self.board[move.start_row][move.end_column] = '--'
+            squares[square_of(move.start_row, move.end_column)] = EMPTY
+            key ^= zobrist.piece_keys[move.piece_captured][move.start_row][move.end_column]
+
+        key ^= zobrist.piece_keys[self.board[move.end_row][move.end_column]][move.end_row][move.end_column]
+        # a promoted pawn is replaced by a queen
+        placed_piece = self.board[move.end_row][move.end_column]
+        material_score += pieceScores.material_values[placed_piece] - pieceScores.material_values[move.piece_moved]
+        position_score += position_values[placed_piece][move.end_row][move.end_column]
 
         # update enpassant_possible variable
         # only on 2 square pawn advances
@@ -92,33 +307,62 @@ class GameState:
                 self.board[move.end_row][move.end_column - 1] = self.board[move.end_row][move.end_column + 1]
                 # delete old rook position
                 self.board[move.end_row][move.end_column + 1] = '--'
+                squares[end_square - 1] = squares[end_square + 1]
+                squares[end_square + 1] = EMPTY
+                rook_keys = zobrist.piece_keys[self.board[move.end_row][move.end_column - 1]][move.end_row]
+                key ^= rook_keys[move.end_column + 1] ^ rook_keys[move.end_column - 1]
+                rook_values = position_values[self.board[move.end_row][move.end_column - 1]][move.end_row]
+                position_score += rook_values[move.end_column - 1] - rook_values[move.end_column + 1]
             # queen side castle
             else:
                 # put the rook in the new square
                 self.board[move.end_row][move.end_column + 1] = self.board[move.end_row][move.end_column - 2]
                 # delete old rook position
                 self.board[move.end_row][move.end_column - 2] = '--'
+                squares[end_square + 1] = squares[end_square - 2]
+                squares[end_square - 2] = EMPTY
+                rook_keys = zobrist.piece_keys[self.board[move.end_row][move.end_column + 1]][move.end_row]
+                key ^= rook_keys[move.end_column - 2] ^ rook_keys[move.end_column + 1]
+                rook_values = position_values[self.board[move.end_row][move.end_column + 1]][move.end_row]
+                position_score += rook_values[move.end_column + 1] - rook_values[move.end_column - 2]
 
-        self.enpassant_possible_log.append(self.enpassant_possible)
+        # moving the king or a rook, or taking a rook, loses castling rights
+        self.castling_rights &= castling_masks[move.start_row * 8 + move.start_column] & \
+            castling_masks[move.end_row * 8 + move.end_column]
 
-        # update castling rights
-        # update rights on rook and king moves
-        self.update_castling_rights(move)
-        self.castle_rights_log.append(CastleRights(self.current_castling_rights.white_king_side,
-                                                   self.current_castling_rights.black_king_side,
-                                                   self.current_castling_rights.white_queen_side,
-                                                   self.current_castling_rights.black_queen_side))
+        key ^= zobrist.enpassant_key(self.enpassant_possible)
+        key ^= zobrist.castling_keys[self.castling_rights]
+        self.zobrist_key = key
+        self.zobrist_key_log.append(key)
+        self.material_score = material_score
+        self.position_score = position_score
+        self.score_log.append((material_score, position_score))
+        # captures and pawn moves cannot be undone, the positions before them never come back
+        if move.piece_moved[1] == 'p' or move.piece_captured != "--":
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if self.bitboards is not None:
+            self.bitboards.toggle_move(move, placed_piece)
 
     """
     function that does undo on last move
     """
 
     def undo_move(self):
+        # null moves of the search are kept in the log as None
+        if len(self.move_log) != 0 and self.move_log[-1] is None:
+            self.undo_null_move()
         # check if there is a move to undo
-        if len(self.move_log) != 0:
+        elif len(self.move_log) != 0:
             move = self.move_log.pop()
             self.board[move.start_row][move.start_column] = move.piece_moved
             self.board[move.end_row][move.end_column] = move.piece_captured
+            squares = self.squares
+            end_square = square_of(move.end_row, move.end_column)
+            squares[square_of(move.start_row, move.start_column)] = piece_codes[move.piece_moved]
+            squares[end_square] = piece_codes[move.piece_captured]
             # update the location of the king
             if move.piece_moved == 'wK':
                 self.white_king_location = (move.start_row, move.start_column)
@@ -131,13 +375,20 @@ class GameState:
                 self.board[move.end_row][move.end_column] = '--'
                 # restore opponent piece
                 self.board[move.start_row][move.end_column] = move.piece_captured
+                squares[end_square] = EMPTY
+                squares[square_of(move.start_row, move.end_column)] = piece_codes[move.piece_captured]
+
+            # castling rights, en passant square and halfmove clock from before the move
+            self.castling_rights, self.enpassant_possible, self.halfmove_clock = self.undo_log.pop()
 
-            self.enpassant_possible_log.pop()
-            self.enpassant_possible = self.enpassant_possible_log[-1]
+            self.zobrist_key_log.pop()
+            self.zobrist_key = self.zobrist_key_log[-1]
+            self.score_log.pop()
+            self.material_score, self.position_score = self.score_log[-1]
 
-            # undo castling rights - getting back to previous castling rights
-            self.castle_rights_log.pop()
-            self.current_castling_rights = self.castle_rights_log[-1]
+            if self.bitboards is not None:
+                placed_piece = move.piece_moved[0] + 'Q' if move.is_pawn_promotion else move.piece_moved
+                self.bitboards.toggle_move(move, placed_piece)
 
             # undo castling move
             if move.is_castle_move:
@@ -145,110 +396,271 @@ class GameState:
                 if move.end_column - move.start_column == 2:
                     self.board[move.end_row][move.end_column + 1] = self.board[move.end_row][move.end_column - 1]
                     self.board[move.end_row][move.end_column - 1] = '--'
+                    squares[end_square + 1] = squares[end_square - 1]
+                    squares[end_square - 1] = EMPTY
                 # queen side castle
                 else:
                     self.board[move.end_row][move.end_column - 2] = self.board[move.end_row][move.end_column + 1]
                     self.board[move.end_row][move.end_column + 1] = '--'
+                    squares[end_square - 2] = squares[end_square + 1]
+                    squares[end_square + 1] = EMPTY
 
             self.checkmate = False
             self.stalemate = False
+            self.draw = False
 
     """
-    update castle rights given the move
+    pass the turn to the opponent without moving a piece, used by the null move pruning of the search
+    the null move is kept in the move log as None, so the number of moves made still gives the ply of the search
+    the halfmove clock starts again at 0, repetitions are not looked for across a null move
     """
 
-    def update_castling_rights(self, move):
-        if move.piece_moved == 'wK':
-            self.current_castling_rights.white_king_side = False
-            self.current_castling_rights.white_queen_side = False
-        elif move.piece_moved == 'bK':
-            self.current_castling_rights.black_king_side = False
-            self.current_castling_rights.black_queen_side = False
-        elif move.piece_moved == 'wR':
-            if move.start_row == 7:
-                # left rook
-                if move.start_column == 0:
-                    self.current_castling_rights.white_queen_side = False
-                # right rook
-                elif move.start_column == 7:
-                    self.current_castling_rights.white_king_side = False
-        elif move.piece_moved == 'bR':
-            if move.start_row == 0:
-                # left rook
-                if move.start_column == 0:
-                    self.current_castling_rights.black_queen_side = False
-                # right rook
-                elif move.start_column == 7:
-                    self.current_castling_rights.black_king_side = False
-
-        # if a rook is captured, cancel castle rights
-        if move.piece_captured == 'wR':
-            if move.end_row == 7:
-                if move.end_column == 0:
-                    self.current_castling_rights.white_queen_side = False
-                elif move.end_column == 7:
-                    self.current_castling_rights.white_king_side = False
-        elif move.piece_captured == 'bR':
-            if move.end_row == 0:
-                if move.end_column == 0:
-                    self.current_castling_rights.black_queen_side = False
-                elif move.end_column == 7:
-                    self.current_castling_rights.black_king_side = False
+    def make_null_move(self):
+        key = self.zobrist_key ^ zobrist.black_to_move_key ^ zobrist.enpassant_key(self.enpassant_possible)
+        self.undo_log.append((self.castling_rights, self.enpassant_possible, self.halfmove_clock))
+        self.move_log.append(None)
+        self.white_to_move = not self.white_to_move
+        self.enpassant_possible = ()
+        self.zobrist_key = key
+        self.zobrist_key_log.append(key)
+        self.score_log.append((self.material_score, self.position_score))
+        self.halfmove_clock = 0
+
+    def undo_null_move(self):
+        self.move_log.pop()
+        self.white_to_move = not self.white_to_move
+        self.castling_rights, self.enpassant_possible, self.halfmove_clock = self.undo_log.pop()
+        self.zobrist_key_log.pop()
+        self.zobrist_key = self.zobrist_key_log[-1]
+        self.score_log.pop()
+
+    """
+    check if the side to move has pieces other than pawns and the king
+    positions with only pawns are the ones where passing the turn could be better than any move (zugzwang)
+    """
+
+    def has_non_pawn_material(self):
+        colour = 'w' if self.white_to_move else 'b'
+        for row in self.board:
+            for square in row:
+                if square[0] == colour and square[1] != 'p' and square[1] != 'K':
+                    return True
+        return False
+
+    """
+    number of times the current position was seen before, same pieces, side to move, castling rights and en passant
+    only the positions since the last capture or pawn move are looked at, the older ones cannot come back
+    """
+
+    def repetition_count(self):
+        key = self.zobrist_key
+        keys = self.zobrist_key_log
+        current = len(keys) - 1
+        count = 0
+        # the same side is to move every other position
+        for index in range(current - 2, max(current - self.halfmove_clock, 0) - 1, -2):
+            if keys[index] == key:
+                count += 1
+        return count
+
+    """
+    check if neither side has the pieces to checkmate: kings alone, a single knight or bishop, or only bishops all
+    on squares of the same colour
+    """
+
+    def has_insufficient_material(self):
+        knights = 0
+        bishop_square_colours = set()
+        for row in range(8):
+            for column in range(8):
+                piece = self.board[row][column][1]
+                if piece == 'N':
+                    knights += 1
+                elif piece == 'B':
+                    bishop_square_colours.add((row + column) % 2)
+                elif piece != '-' and piece != 'K':
+                    return False
+        if knights == 0:
+            return len(bishop_square_colours) <= 1
+        return knights == 1 and len(bishop_square_colours) == 0
+
+    """
+    check if the game is drawn by the fifty-move rule, threefold repetition or insufficient material
+    """
+
+    def is_draw(self):
+        return self.halfmove_clock >= FIFTY_MOVE_RULE_PLIES or self.repetition_count() >= 2 or \
+            self.has_insufficient_material()
+
+    """
+    set the draw flag, a checkmate or stalemate (see get_valid_moves) ends the game before the draw rules
+    """
+
+    def update_draw(self):
+        self.draw = not self.checkmate and not self.stalemate and self.is_draw()
 
     """
     get all moves for one side also considering checks
     """
 
     def get_valid_moves(self):
-        moves = []
-        self.is_king_in_check, self.pins, self.checks = self.check_for_pins_and_checks()
-        if self.white_to_move:
-            king_row = self.white_king_location[0]
-            king_column = self.white_king_location[1]
+        if self.bitboards is not None:
+            moves, self.is_king_in_check = self.bitboards.get_valid_moves(self)
+            self.pins = []
+            self.pin_directions = no_pins
+            self.checks = []
+            self.update_checkmate_and_stalemate(moves)
+            return moves
+
+        check_evasions = self.prepare_move_generation()
+        moves = self.get_legal_moves(check_evasions, ALL_MOVES)
+        # cannot castle while king in check
+        if not self.is_king_in_check:
+            self.get_castle_moves(*self.get_king_location(), moves)
+        self.update_checkmate_and_stalemate(moves)
+        return moves
+
+    """
+    generate the valid moves in stages, so the search can stop before all of them are created:
+        1. the hash move given by its move id, if it is valid in the current position
+        2. captures, en passant and pawn promotions
+        3. quiet moves
+        4. castling
+    a move is given only once, the hash move is skipped in the later stages
+    moves can be made and undone between 2 moves taken from the generator, the position must be the same every
+    time the generator continues
+    """
+
+    def generate_moves(self, hash_move_id=None):
+        for moves in self.generate_move_stages(hash_move_id):
+            yield from moves
+
+    """
+    same stages as generate_moves, but every stage is given as a list of moves, so the moves of a stage can be
+    ordered before they are searched
+    the 4 lists always come in the order given by HASH_MOVE_STAGE, CAPTURE_STAGE, QUIET_STAGE and CASTLE_STAGE
+    """
+
+    def generate_move_stages(self, hash_move_id=None):
+        if self.bitboards is not None:
+            yield from self.bitboards.generate_move_stages(self, hash_move_id)
+            return
+
+        check_evasions = self.prepare_move_generation()
+        # searching deeper positions overwrites the pins and checks, so they are kept for every stage
+        is_king_in_check, pins, pin_directions, checks = self.is_king_in_check, self.pins, self.pin_directions, \
+            self.checks
+        hash_move = None
+        if hash_move_id is not None:
+            hash_move = self.get_hash_move(hash_move_id, check_evasions)
+        if hash_move is not None:
+            yield [hash_move]
         else:
-            king_row = self.black_king_location[0]
-            king_column = self.black_king_location[1]
-        # king is in check
-        if self.is_king_in_check:
-            # only 1 check, not a double one
-            # 2 choices : block the check or move the king
-            if len(self.checks) == 1:
-                moves = self.get_all_possible_moves()
-                # getting information from the checking square and piece
-                check = self.checks[0]
-                check_row = check[0]
-                check_column = check[1]
-                # getting the piece that checks the king
-                piece_checking = self.board[check_row][check_column]
-                # create array of valid squares we can move to in order to evade check
-                valid_squares_to_move_to = []
-                # if knight check => capture knight or move king
-                if piece_checking[1] == 'N':
-                    valid_squares_to_move_to = [(check_row, check_column)]
-                else:
-                    for shift in range(1, 8):
-                        # check[2], check[3] = directions
-                        valid_square = (king_row + check[2] * shift, king_column + check[3] * shift)
-                        valid_squares_to_move_to.append(valid_square)
-                        # we got to the checking piece => end check
-                        if valid_square[0] == check_row and valid_square[1] == check_column:
-                            break
-                # iterate through possible moves and remove those who don't block the check or move the king away
-                # from check
-                for index in range(len(moves) - 1, -1, -1):
-                    # it must be a block or capture because king is not moved
-                    if moves[index].piece_moved[1] != 'K':
-                        # move does not block check or capture checking piece
-                        if not (moves[index].end_row, moves[index].end_column) in valid_squares_to_move_to:
-                            moves.remove(moves[index])
-            # double check so we must move - no other option
-            else:
-                self.get_king_moves(king_row, king_column, moves)
-        # king not in check so all is fine
+            hash_move_id = None
+            yield []
+        for move_type in (CAPTURE_MOVES, QUIET_MOVES):
+            self.pins, self.pin_directions, self.checks = pins, pin_directions, checks
+            yield [move for move in self.get_legal_moves(check_evasions, move_type) if move.move_id != hash_move_id]
+        castle_moves = []
+        if not is_king_in_check:
+            self.get_castle_moves(*self.get_king_location(), castle_moves)
+        yield [move for move in castle_moves if move.move_id != hash_move_id]
+
+    """
+    look for the pins and checks of the current position before generating moves
+    returns the 0x88 squares where a piece other than the king can go to stop the check:
+    None when the king is not in check and an empty set for a double check, when only the king can move
+    """
+
+    def prepare_move_generation(self):
+        self.is_king_in_check, self.pins, self.checks = self.check_for_pins_and_checks()
+        if len(self.pins) == 0:
+            self.pin_directions = no_pins
         else:
-            moves = self.get_all_possible_moves()
-            self.get_castle_moves(king_row, king_column, moves)
+            self.pin_directions = [0] * 128
+            for pin_row, pin_column, row_direction, column_direction in self.pins:
+                self.pin_directions[square_of(pin_row, pin_column)] = square_of(row_direction, column_direction)
+        if not self.is_king_in_check:
+            return None
+        # double check so we must move - no other option
+        if len(self.checks) != 1:
+            return set()
+        # getting information from the checking square and piece
+        check_row, check_column, row_direction, column_direction = self.checks[0]
+        check_square = square_of(check_row, check_column)
+        # if knight check => capture knight or move king
+        if self.squares[check_square] & TYPE_MASK == KNIGHT:
+            return {check_square}
+        # block the check on a square between the king and the checking piece or capture the checking piece
+        offset = square_of(row_direction, column_direction)
+        valid_square = square_of(*self.get_king_location())
+        valid_squares_to_move_to = set()
+        # we got to the checking piece => end check
+        while valid_square != check_square:
+            valid_square += offset
+            valid_squares_to_move_to.add(valid_square)
+        return valid_squares_to_move_to
 
+    def get_king_location(self):
+        return self.white_king_location if self.white_to_move else self.black_king_location
+
+    """
+    moves of the given type that do not leave the king in check, castling excluded
+    check_evasions are the squares given by prepare_move_generation
+    """
+
+    def get_legal_moves(self, check_evasions, move_type):
+        if check_evasions is None:
+            return self.get_all_possible_moves(move_type)
+        moves = []
+        if len(check_evasions) == 0:
+            self.get_king_moves(*self.get_king_location(), moves, move_type)
+            return moves
+        return self.filter_check_evasions(self.get_all_possible_moves(move_type), check_evasions)
+
+    """
+    keep the moves that stop a single check: king moves, and moves that block the check or capture the checking piece
+    """
+
+    def filter_check_evasions(self, moves, check_evasions):
+        check_row, check_column = self.checks[0][:2]
+        legal_moves = []
+        for move in moves:
+            # the king moves were already checked against the squares attacked by the opponent
+            # en passant captures the checking pawn outside of the landing square
+            if move.piece_moved[1] == 'K' or square_of(move.end_row, move.end_column) in check_evasions or \
+                    (move.is_enpassant_move and move.start_row == check_row and move.end_column == check_column):
+                legal_moves.append(move)
+        return legal_moves
+
+    """
+    the move with the given move id if it is a valid move in the current position, otherwise None
+    only the moves of the piece on the start square of the hash move are generated
+    """
+
+    def get_hash_move(self, move_id, check_evasions):
+        start_row, start_column = divmod(move_id >> 6, 8)
+        piece = self.squares[square_of(start_row, start_column)]
+        if piece & COLOUR_MASK != (WHITE if self.white_to_move else BLACK):
+            return None
+        piece_type = piece & TYPE_MASK
+        moves = []
+        if piece_type == KING or check_evasions is None or len(check_evasions) != 0:
+            self.move_functions[piece_type](start_row, start_column, moves)
+        if check_evasions is not None:
+            moves = self.filter_check_evasions(moves, check_evasions)
+        elif piece_type == KING:
+            self.get_castle_moves(start_row, start_column, moves)
+        for move in moves:
+            if move.move_id == move_id:
+                return move
+        return None
+
+    """
+    set checkmate and stalemate flags given all the valid moves of the current position
+    """
+
+    def update_checkmate_and_stalemate(self, moves):
         if len(moves) == 0:
             if self.is_king_in_check:
                 self.checkmate = True
@@ -258,7 +670,17 @@ class GameState:
             self.stalemate = False
             self.checkmate = False
 
-        return moves
+    """
+    set checkmate and stalemate flags without generating all the valid moves, finding one of them is enough
+    """
+
+    def update_game_over(self):
+        if next(self.generate_moves(), None) is None:
+            self.checkmate = self.is_king_in_check
+            self.stalemate = not self.is_king_in_check
+        else:
+            self.stalemate = False
+            self.checkmate = False
 
     """
     determine if current player is in check
@@ -275,29 +697,75 @@ class GameState:
     """
 
     def square_under_attack(self, row, column):
-        # switch point of view to opponent view
-        self.white_to_move = not self.white_to_move
-        opponent_moves = self.get_all_possible_moves()
-        self.white_to_move = not self.white_to_move
-        for move in opponent_moves:
-            if move.end_row == row and move.end_column == column:
-                return True
-        return False
+        enemy_colour = "b" if self.white_to_move else "w"
+        return len(self.get_square_attackers(row, column, enemy_colour, stop_at_first=True)) != 0
+
+    """
+    find the pieces of the given colour attacking the square on given row and column
+    instead of generating all the moves of the attacking side, we look from the square outwards:
+    a knight jump, pawn diagonal, king step or slider ray that reaches a matching piece is an attack
+    returns a list of (row, column) of the attackers, only the first one if stop_at_first is set
+    """
+
+    def get_square_attackers(self, row, column, attacker_colour, stop_at_first=False):
+        attackers = []
+        squares = self.squares
+        colour = WHITE if attacker_colour == 'w' else BLACK
+        square = square_of(row, column)
+        # pawns attack diagonally forward, so a white attacker is below the square and a black one above it
+        pawn = colour | PAWN
+        for offset in ((15, 17) if colour == WHITE else (-17, -15)):
+            attacker_square = square + offset
+            if not attacker_square & OFF_BOARD and squares[attacker_square] == pawn:
+                attackers.append(coordinates[attacker_square])
+                if stop_at_first:
+                    return attackers
+        knight = colour | KNIGHT
+        for offset in KNIGHT_OFFSETS:
+            attacker_square = square + offset
+            if not attacker_square & OFF_BOARD and squares[attacker_square] == knight:
+                attackers.append(coordinates[attacker_square])
+                if stop_at_first:
+                    return attackers
+        king = colour | KING
+        far_attackers = ray_attackers[colour][1]
+        for index in range(8):
+            offset = KING_OFFSETS[index]
+            attacker_square = square + offset
+            # king attacks only next to it
+            if not attacker_square & OFF_BOARD and squares[attacker_square] == king:
+                attackers.append(coordinates[attacker_square])
+                if stop_at_first:
+                    return attackers
+                continue
+            # the first piece on the ray attacks the square if it slides in that direction
+            sliders = far_attackers[index]
+            while not attacker_square & OFF_BOARD:
+                piece = squares[attacker_square]
+                if piece != EMPTY:
+                    if piece in sliders:
+                        attackers.append(coordinates[attacker_square])
+                        if stop_at_first:
+                            return attackers
+                    break
+                attacker_square += offset
+        return attackers
 
     """
     get all moves for one side, but checks are not considered
     """
 
-    def get_all_possible_moves(self):
+    def get_all_possible_moves(self, move_type=ALL_MOVES):
         moves = []
+        squares = self.squares
+        colour = WHITE if self.white_to_move else BLACK
+        move_functions = self.move_functions
         # iterate through all squares
-        for row in range(len(self.board)):
-            for column in range(len(self.board[row])):
-                turn = self.board[row][column][0]
-                if (turn == 'w' and self.white_to_move) or (turn == 'b' and not self.white_to_move):
-                    piece = self.board[row][column][1]
-                    # call the corresponding move functions
-                    self.move_functions[piece](row, column, moves)
+        for square in board_squares:
+            piece = squares[square]
+            if piece & colour:
+                # call the corresponding move functions
+                move_functions[piece & TYPE_MASK](square >> 4, square & 7, moves, move_type)
         return moves
 
     """
@@ -313,324 +781,265 @@ class GameState:
 
         # start from the king for pins and checks
         if self.white_to_move:
-            enemy_colour = "b"
-            ally_colour = "w"
-            start_row = self.white_king_location[0]
-            start_column = self.white_king_location[1]
+            enemy_colour = BLACK
+            ally_colour = WHITE
+            start_row, start_column = self.white_king_location
         else:
-            enemy_colour = "w"
-            ally_colour = "b"
-            start_row = self.black_king_location[0]
-            start_column = self.black_king_location[1]
-
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
-        for index in range(len(directions)):
-            direction = directions[index]
+            enemy_colour = WHITE
+            ally_colour = BLACK
+            start_row, start_column = self.black_king_location
+
+        squares = self.squares
+        ally_king = ally_colour | KING
+        # the enemy pieces attacking the king from every direction, next to it and farther away
+        near_attackers, far_attackers = ray_attackers[enemy_colour]
+        king_square = square_of(start_row, start_column)
+        for index in range(8):
+            offset = KING_OFFSETS[index]
             # reset possible pins
             possible_pin = ()
-            for shift in range(1, 8):
-                end_row = start_row + direction[0] * shift
-                end_column = start_column + direction[1] * shift
-                # check if it is a valid square
-                if 0 <= end_row < 8 and 0 <= end_column < 8:
-                    end_piece = self.board[end_row][end_column]
-                    if end_piece[0] == ally_colour and end_piece[1] != 'K':
-                        # first allied piece could be pinned
-                        if possible_pin == ():
-                            possible_pin = (end_row, end_column, direction[0], direction[1])
-                        # this is not first allied piece on this direction => no pin or check is possible
-                        else:
-                            break
-                    elif end_piece[0] == enemy_colour:
-                        piece_type = end_piece[1]
-                        # 5 possibilities of pinning
-                        #   a) rook pin on files or ranks
-                        #   b) bishop pin on diagonal
-                        #   c) pawn pin (1 square away on diagonals)
-                        #   d) queen pin on any direction
-                        #   e) king pin (2 kings cannot be on 2 next to each other squares)
-                        if (0 <= index <= 3 and piece_type == 'R') or \
-                                (4 <= index <= 7 and piece_type == 'B') or \
-                                (shift == 1 and piece_type == 'p' and ((enemy_colour == 'w' and 6 <= index <= 7) or (
-                                        enemy_colour == 'b' and 4 <= index <= 5))) or \
-                                (piece_type == 'Q') or (shift == 1 and type == 'K'):
-                            # no blocking piece => check
-                            if possible_pin == ():
-                                is_king_in_check = True
-                                checks.append((end_row, end_column, direction[0], direction[1]))
-                                break
-                            # there is a blocking piece => pin
-                            else:
-                                pins.append(possible_pin)
-                                break
-                        # enemy piece not applying check
-                        else:
-                            break
-        # now we take care of knight pins and checks - we treat them separately because they move in a special way
-        knight_moves = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
-        for move in knight_moves:
-            end_row = start_row + move[0]
-            end_column = start_column + move[1]
-            if 0 <= end_row < 8 and 0 <= end_column < 8:
-                end_piece = self.board[end_row][end_column]
-                # check if enemy knight attacks king
-                if end_piece[0] == enemy_colour and end_piece[1] == 'N':
-                    is_king_in_check = True
-                    checks.append((end_row, end_column, move[0], move[1]))
+            end_square = king_square + offset
+            while not end_square & OFF_BOARD:
+                end_piece = squares[end_square]
+                if end_piece == EMPTY or end_piece == ally_king:
+                    end_square += offset
+                    continue
+                if end_piece & ally_colour:
+                    # first allied piece could be pinned
+                    if possible_pin == ():
+                        possible_pin = coordinates[end_square] + attack_directions[index]
+                        end_square += offset
+                        continue
+                    # this is not first allied piece on this direction => no pin or check is possible
+                    break
+                # the first enemy piece checks the king (or pins the allied piece in between) if it attacks along
+                # this direction from that distance - pawns and kings only from the next square
+                if end_piece in (near_attackers if end_square == king_square + offset else far_attackers)[index]:
+                    # no blocking piece => check
+                    if possible_pin == ():
+                        is_king_in_check = True
+                        checks.append(coordinates[end_square] + attack_directions[index])
+                    # there is a blocking piece => pin
+                    else:
+                        pins.append(possible_pin)
+                break
+        # now we take care of knight checks - we treat them separately because they move in a special way
+        enemy_knight = enemy_colour | KNIGHT
+        for index in range(8):
+            end_square = king_square + KNIGHT_OFFSETS[index]
+            # check if enemy knight attacks king
+            if not end_square & OFF_BOARD and squares[end_square] == enemy_knight:
+                is_king_in_check = True
+                checks.append(coordinates[end_square] + knight_jumps[index])
         return is_king_in_check, pins, checks
 
     """
     get all pawn moves for pawn located at row and column given and add possible moves to move array 
     """
 
-    def get_pawn_moves(self, row, column, moves):
-        piece_pinned = False
-        pin_directions = ()
-        for index in range(len(self.pins) - 1, -1, -1):
-            if self.pins[index][0] == row and self.pins[index][1] == column:
-                piece_pinned = True
-                pin_directions = (self.pins[index][2], self.pins[index][3])
-                self.pins.remove(self.pins[index])
-                break
+    def get_pawn_moves(self, row, column, moves, move_type=ALL_MOVES):
+        square = square_of(row, column)
+        # a pinned pawn only moves along the line of its pin
+        pin_direction = self.pin_directions[square]
+        captures = move_type != QUIET_MOVES
+        quiets = move_type != CAPTURE_MOVES
+        squares = self.squares
+        board = self.board
+        start = (row, column)
 
         if self.white_to_move:
-            move_amount = -1
+            forward = -16
             start_row = 6
-            enemy_colour = 'b'
-            king_row, king_column = self.white_king_location
+            enemy_colour = BLACK
+            king_square = square_of(*self.white_king_location)
         else:
-            move_amount = 1
+            forward = 16
             start_row = 1
-            enemy_colour = 'w'
-            king_row, king_column = self.black_king_location
-
-        # square move
-        if self.board[row + move_amount][column] == "--":
-            if not piece_pinned or pin_directions == (move_amount, 0):
-                moves.append(Move((row, column), (row + move_amount, column), self.board))
-                # 2 square moves
-                if row == start_row and self.board[row + 2 * move_amount][column] == "--":
-                    moves.append(Move((row, column), (row + 2 * move_amount, column), self.board))
-        # capture to left
-        if column - 1 >= 0:
-            if not piece_pinned or pin_directions == (move_amount, -1):
-                if self.board[row + move_amount][column - 1][0] == enemy_colour:
-                    moves.append(Move((row, column), (row + move_amount, column - 1), self.board))
-                if (row + move_amount, column - 1) == self.enpassant_possible:
-                    # prevent en passant capture that generate checks from opponent queen or rook
-                    attacking_piece = blocking_piece = False
-                    if king_row == row:
-                        # king is left of the pawn
-                        if king_column < column:
-                            # blocking pieces between pawn and king or outside
-                            inside_range = range(king_column + 1, column - 1)
-                            outside_range = range(column + 1, 8)
-                        # king is right of the pawn
-                        else:
-                            inside_range = range(king_column - 1, column, -1)
-                            outside_range = range(column - 2, -1, -1)
-                        for index in inside_range:
-                            # some other pieces besides en passant pawns blocks
-                            if self.board[row][index] != "--":
-                                blocking_piece = True
-                        for index in outside_range:
-                            square = self.board[row][index]
-                            # attacking piece
-                            if square[0] == enemy_colour and (square[1] == "R" or square[1] == "Q"):
-                                attacking_piece = True
-                            elif square != "--":
-                                blocking_piece = True
-                    if not attacking_piece or blocking_piece:
-                        moves.append(Move((row, column), (row + move_amount, column - 1), self.board,
-                                          is_enpassant_move=True))
-        # capture to right
-        if column + 1 <= 7:
-            if not piece_pinned or pin_directions == (move_amount, 1):
-                if self.board[row + move_amount][column + 1][0] == enemy_colour:
-                    moves.append(Move((row, column), (row + move_amount, column + 1), self.board))
-                if (row + move_amount, column + 1) == self.enpassant_possible:
-                    # prevent en passant capture that generate checks from opponent queen or rook
-                    attacking_piece = blocking_piece = False
-                    if king_row == row:
-                        # king is left of the pawn
-                        if king_column < column:
-                            # blocking pieces between pawn and king or outside
-                            inside_range = range(king_column + 1, column)
-                            outside_range = range(column + 2, 8)
-                        # king is right of the pawn
-                        else:
-                            inside_range = range(king_column - 1, column + 1, -1)
-                            outside_range = range(column - 1, -1, -1)
-                        for index in inside_range:
-                            # some other pieces besides en passant pawns blocks
-                            if self.board[row][index] != "--":
-                                blocking_piece = True
-                        for index in outside_range:
-                            square = self.board[row][index]
-                            # attacking piece
-                            if square[0] == enemy_colour and (square[1] == "R" or square[1] == "Q"):
-                                attacking_piece = True
-                            elif square != "--":
-                                blocking_piece = True
-                    if not attacking_piece or blocking_piece:
-                        moves.append(Move((row, column), (row + move_amount, column + 1), self.board,
-                                          is_enpassant_move=True))
+            enemy_colour = WHITE
+            king_square = square_of(*self.black_king_location)
+
+        # square move - a pawn is never on the last row, so the square in front is on the board
+        end_square = square + forward
+        if squares[end_square] == EMPTY and (pin_direction == 0 or pin_direction == forward or
+                                             pin_direction == -forward):
+            # promotions are generated together with the captures
+            is_promotion = end_square >> 4 == 0 or end_square >> 4 == 7
+            if captures if is_promotion else quiets:
+                moves.append(Move(start, coordinates[end_square], board))
+            # 2 square moves
+            if quiets and row == start_row and squares[end_square + forward] == EMPTY:
+                moves.append(Move(start, coordinates[end_square + forward], board))
+        if not captures:
+            return
+        # capture to left, then to right
+        for side in (-1, 1):
+            offset = forward + side
+            end_square = square + offset
+            if end_square & OFF_BOARD or (pin_direction != 0 and pin_direction != offset and
+                                          pin_direction != -offset):
+                continue
+            if squares[end_square] & enemy_colour:
+                moves.append(Move(start, coordinates[end_square], board))
+            elif coordinates[end_square] == self.enpassant_possible and \
+                    not self.enpassant_exposes_king(square, square + side, king_square, enemy_colour):
+                moves.append(Move(start, coordinates[end_square], board, is_enpassant_move=True))
 
     """
-    get all rook moves for rooks located at row and column given and add possible moves to move array
+    check if an en passant capture would leave the king in check from a rook or a queen on its row
+    both pawns leave that row at once, which no pin can see
     """
 
-    def get_rook_moves(self, row, column, moves):
+    def enpassant_exposes_king(self, pawn_square, captured_square, king_square, enemy_colour):
+        if king_square >> 4 != pawn_square >> 4:
+            return False
+        squares = self.squares
+        step = 1 if pawn_square > king_square else -1
+        square = king_square + step
+        while not square & OFF_BOARD:
+            # the first piece other than the 2 pawns, going away from the king
+            if square != pawn_square and square != captured_square and squares[square] != EMPTY:
+                piece = squares[square]
+                return piece & enemy_colour != 0 and (piece & TYPE_MASK == ROOK or piece & TYPE_MASK == QUEEN)
+            square += step
+        return False
 
-        piece_pinned = False
-        pin_direction = ()
-        # first we check if the piece we want to move is pinned
-        for index in range(len(self.pins) - 1, -1, -1):
-            if self.pins[index][0] == row and self.pins[index][1] == column:
-                piece_pinned = True
-                pin_direction = (self.pins[index][2], self.pins[index][3])
-                # cannot remove queen from pin on rook moves, only on bishop moves
-                if self.board[row][column][1] != 'Q':
-                    self.pins.remove(self.pins[index])
-                break
+    """
+    get all rook moves for rooks located at row and column given and add possible moves to move array
+    """
 
+    def get_rook_moves(self, row, column, moves, move_type=ALL_MOVES):
         # up, left, down, right directions
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1))
-        # opponent colour
-        enemy_colour = "b" if self.white_to_move else "w"
-        for direction in directions:
-            for value in range(1, 8):
-                end_row = row + direction[0] * value
-                end_column = column + direction[1] * value
-                # we are still on board
-                if 0 <= end_row < 8 and 0 <= end_column < 8:
-                    if not piece_pinned or pin_direction == direction or pin_direction == (
-                            -direction[0], -direction[1]):
-                        end_piece = self.board[end_row][end_column]
-                        # there is not a capture, but just a simple rook move
-                        if end_piece == "--":
-                            moves.append(Move((row, column), (end_row, end_column), self.board))
-                        # there is an opponent piece on that square
-                        elif end_piece[0] == enemy_colour:
-                            moves.append(Move((row, column), (end_row, end_column), self.board))
-                            # no point to check farther squares, we have stumbled into a piece already
-                            break
-                        # there is a playing side's piece on that square
-                        else:
-                            break
-                # we are not anymore on the board
-                else:
-                    break
+        self.get_slider_moves(row, column, moves, move_type, ORTHOGONAL_OFFSETS)
 
     """
     get all knight moves for knights located at row and column given and add possible moves to move array
     """
 
-    def get_knight_moves(self, row, column, moves):
-
-        piece_pinned = False
-        # first we check if the piece we want to move is pinned
-        for index in range(len(self.pins) - 1, -1, -1):
-            if self.pins[index][0] == row and self.pins[index][1] == column:
-                piece_pinned = True
-                self.pins.remove(self.pins[index])
-                break
-
-        knight_directions = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+    def get_knight_moves(self, row, column, moves, move_type=ALL_MOVES):
+        square = square_of(row, column)
+        # a pinned knight can never move along the line of its pin
+        if self.pin_directions[square] != 0:
+            return
+        squares = self.squares
         # same side colour
-        friend_colour = "w" if self.white_to_move else "b"
-        for direction in knight_directions:
-            end_row = row + direction[0]
-            end_column = column + direction[1]
-            # we are still on board
-            if 0 <= end_row < 8 and 0 <= end_column < 8:
-                if not piece_pinned:
-                    end_piece = self.board[end_row][end_column]
-                    # valid knight move
-                    if end_piece[0] != friend_colour:
-                        moves.append(Move((row, column), (end_row, end_column), self.board))
+        friend_colour = WHITE if self.white_to_move else BLACK
+        for offset in KNIGHT_OFFSETS:
+            end_square = square + offset
+            if end_square & OFF_BOARD:
+                continue
+            end_piece = squares[end_square]
+            # valid knight move, either a capture or a quiet move
+            if not end_piece & friend_colour and move_type != (CAPTURE_MOVES if end_piece == EMPTY else QUIET_MOVES):
+                moves.append(Move((row, column), coordinates[end_square], self.board))
 
     """
     get all bishop moves for bishops located at row and column given and add possible moves to move array
     """
 
-    def get_bishop_moves(self, row, column, moves):
+    def get_bishop_moves(self, row, column, moves, move_type=ALL_MOVES):
+        # top-left, top-right, bottom-left, bottom-right directions
+        self.get_slider_moves(row, column, moves, move_type, DIAGONAL_OFFSETS)
 
-        piece_pinned = False
-        pin_direction = ()
-        # first we check if the piece we want to move is pinned
-        for index in range(len(self.pins) - 1, -1, -1):
-            if self.pins[index][0] == row and self.pins[index][1] == column:
-                piece_pinned = True
-                pin_direction = (self.pins[index][2], self.pins[index][3])
-                self.pins.remove(self.pins[index])
-                break
+    """
+    add the moves of the rook or bishop at row and column along the given 0x88 steps
+    a pinned piece only moves along the line of its pin, towards the king or towards the pinning piece
+    """
 
-        # top-left, top-right, bottom-left, bottom-right directions
-        directions = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+    def get_slider_moves(self, row, column, moves, move_type, offsets):
+        square = square_of(row, column)
+        pin_direction = self.pin_directions[square]
+        squares = self.squares
+        board = self.board
+        start = (row, column)
         # opponent colour
-        enemy_colour = "b" if self.white_to_move else "w"
-        for direction in directions:
-            for value in range(1, 8):
-                end_row = row + direction[0] * value
-                end_column = column + direction[1] * value
-                # we are still on board
-                if 0 <= end_row < 8 and 0 <= end_column < 8:
-                    if not piece_pinned or pin_direction == direction or pin_direction == (
-                            -direction[0], -direction[1]):
-                        end_piece = self.board[end_row][end_column]
-                        # there is not a capture, but just a simple bishop move
-                        if end_piece == "--":
-                            moves.append(Move((row, column), (end_row, end_column), self.board))
-                        # there is an opponent piece on that square
-                        elif end_piece[0] == enemy_colour:
-                            moves.append(Move((row, column), (end_row, end_column), self.board))
-                            # no point to check farther squares, we have stumbled into a piece already
-                            break
-                        # there is a playing side's piece on that square
-                        else:
-                            break
-                # we are not anymore on the board
+        enemy_colour = BLACK if self.white_to_move else WHITE
+        for offset in offsets:
+            if pin_direction != 0 and pin_direction != offset and pin_direction != -offset:
+                continue
+            end_square = square + offset
+            # we are still on board
+            while not end_square & OFF_BOARD:
+                end_piece = squares[end_square]
+                # there is not a capture, but just a simple move
+                if end_piece == EMPTY:
+                    if move_type != CAPTURE_MOVES:
+                        moves.append(Move(start, coordinates[end_square], board))
+                # there is an opponent piece on that square
+                elif end_piece & enemy_colour:
+                    if move_type != QUIET_MOVES:
+                        moves.append(Move(start, coordinates[end_square], board))
+                    # no point to check farther squares, we have stumbled into a piece already
+                    break
+                # there is a playing side's piece on that square
                 else:
                     break
+                end_square += offset
 
     """
     get all queen moves for queens located at row and column given and add possible moves to move array
     """
 
-    def get_queen_moves(self, row, column, moves):
-        self.get_rook_moves(row, column, moves)
-        self.get_bishop_moves(row, column, moves)
+    def get_queen_moves(self, row, column, moves, move_type=ALL_MOVES):
+        self.get_rook_moves(row, column, moves, move_type)
+        self.get_bishop_moves(row, column, moves, move_type)
 
     """
     get all king moves for kings located at row and column given and add possible moves to move array
     """
 
-    def get_king_moves(self, row, column, moves):
-        row_moves = (-1, -1, -1, 0, 0, 1, 1, 1)
-        column_moves = (-1, 0, 1, -1, 1, -1, 0, 1)
-        ally_colour = "w" if self.white_to_move else "b"
-        for index in range(8):
-            end_row = row + row_moves[index]
-            end_column = column + column_moves[index]
-            if 0 <= end_row < 8 and 0 <= end_column < 8:
-                end_piece = self.board[end_row][end_column]
-                # not an allied piece
-                if end_piece[0] != ally_colour:
-                    # place king on end square and check for checks
-                    # basically, we temporarily make the move to see if we are in check, and then we undo the move
-                    if ally_colour == "w":
-                        self.white_king_location = (end_row, end_column)
-                    else:
-                        self.black_king_location = (end_row, end_column)
-                    king_in_check, pins, checks = self.check_for_pins_and_checks()
-                    if not king_in_check:
-                        moves.append(Move((row, column), (end_row, end_column), self.board))
-                    # place king back on initial square
-                    if ally_colour == "w":
-                        self.white_king_location = (row, column)
-                    else:
-                        self.black_king_location = (row, column)
+    def get_king_moves(self, row, column, moves, move_type=ALL_MOVES):
+        square = square_of(row, column)
+        squares = self.squares
+        ally_colour = WHITE if self.white_to_move else BLACK
+        # squares not occupied by allied pieces
+        end_squares = []
+        for offset in KING_OFFSETS:
+            end_square = square + offset
+            if not end_square & OFF_BOARD:
+                end_piece = squares[end_square]
+                if not end_piece & ally_colour and move_type != (CAPTURE_MOVES if end_piece == EMPTY else QUIET_MOVES):
+                    end_squares.append(end_square)
+        if len(end_squares) == 0:
+            return
+        # all squares attacked by the opponent, computed once for all the destinations
+        attacked_squares = self.get_attacked_squares(BLACK if self.white_to_move else WHITE, square)
+        for end_square in end_squares:
+            # the king would not be in check on the end square
+            if not attacked_squares[end_square]:
+                moves.append(Move((row, column), coordinates[end_square], self.board))
+
+    """
+    flags of the 0x88 squares attacked by all the pieces of the given colour, 1 for an attacked square
+    the king on king_square is taken off the board while looking, so a square behind the king on the
+    ray of a checking slider is also attacked - the king cannot escape by stepping back along that ray
+    """
+
+    def get_attacked_squares(self, attacker_colour, king_square):
+        squares = self.squares
+        king = squares[king_square]
+        squares[king_square] = EMPTY
+        attacked_squares = bytearray(128)
+        pawn_offsets = (-17, -15) if attacker_colour == WHITE else (15, 17)
+        for square in board_squares:
+            piece = squares[square]
+            if not piece & attacker_colour:
+                continue
+            piece_type = piece & TYPE_MASK
+            if piece_type == PAWN or piece_type == KNIGHT or piece_type == KING:
+                for offset in pawn_offsets if piece_type == PAWN else \
+                        KNIGHT_OFFSETS if piece_type == KNIGHT else KING_OFFSETS:
+                    if not (square + offset) & OFF_BOARD:
+                        attacked_squares[square + offset] = 1
+            else:
+                for offset in slider_offsets[piece_type]:
+                    end_square = square + offset
+                    while not end_square & OFF_BOARD:
+                        attacked_squares[end_square] = 1
+                        if squares[end_square] != EMPTY:
+                            break
+                        end_square += offset
+        squares[king_square] = king
+        return attacked_squares
 
     """
     generate all valid castle moves for the king at row and column given + add them to the list of moves
@@ -640,11 +1049,9 @@ class GameState:
         # cannot castle while king in check
         if self.square_under_attack(row, column):
             return
-        if (self.white_to_move and self.current_castling_rights.white_king_side) or \
-                (not self.white_to_move and self.current_castling_rights.black_king_side):
+        if self.castling_rights & (WHITE_KING_SIDE if self.white_to_move else BLACK_KING_SIDE):
             self.get_king_side_castle_moves(row, column, moves)
-        if (self.white_to_move and self.current_castling_rights.white_queen_side) or \
-                (not self.white_to_move and self.current_castling_rights.black_queen_side):
+        if self.castling_rights & (WHITE_QUEEN_SIDE if self.white_to_move else BLACK_QUEEN_SIDE):
             self.get_queen_side_castle_moves(row, column, moves)
 
     """
@@ -653,7 +1060,8 @@ class GameState:
     """
 
     def get_king_side_castle_moves(self, row, column, moves):
-        if self.board[row][column + 1] == '--' and self.board[row][column + 2] == '--':
+        square = square_of(row, column)
+        if not (square + 2) & OFF_BOARD and self.squares[square + 1] == EMPTY and self.squares[square + 2] == EMPTY:
             if not self.square_under_attack(row, column + 1) and not self.square_under_attack(row, column + 2):
                 moves.append(Move((row, column), (row, column + 2), self.board, is_castle_move=True))
 
@@ -663,7 +1071,8 @@ class GameState:
     """
 
     def get_queen_side_castle_moves(self, row, column, moves):
-        if self.board[row][column - 1] == '--' and self.board[row][column - 2] == '--' \
-                and self.board[row][column - 3] == '--':
+        square = square_of(row, column)
+        if not (square - 3) & OFF_BOARD and self.squares[square - 1] == EMPTY and \
+                self.squares[square - 2] == EMPTY and self.squares[square - 3] == EMPTY:
             if not self.square_under_attack(row, column - 1) and not self.square_under_attack(row, column - 2):
                 moves.append(Move((row, column), (row, column - 2), self.board, is_castle_move=True))
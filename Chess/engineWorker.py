@@ -0,0 +1,208 @@
+"""
+AI running in a process of its own for the whole game
+the worker keeps its own game state and transposition table between the moves, the UI only sends it what changed:
+the moves made and undone since the last search (or a FEN for a new game), never the whole game state
+a search can be stopped at any time, the worker stays alive and ready for the next one
+positions of the opening book are not searched, a book move is played instead
+every command is a tuple sent over a pipe, starting with its type
+"""
+import queue
+import threading
+from multiprocessing import Pipe, Process
+
+from Chess import aiMoveFinder, engine, openingBook, parallelSearch
+from Chess.transpositionTable import SharedTranspositionTable, encode_move, move_matches
+
+# commands sent to the worker and the reply it sends back
+NEW_GAME, MAKE_MOVES, UNDO_MOVES, SEARCH, STOP, QUIT, BEST_MOVE = range(7)
+# seconds waited for the worker to end after it was asked to quit
+QUIT_TIMEOUT = 5.0
+
+"""
+loop of the worker process, runs the commands received on the connection until it is asked to quit
+a thread reads the connection while the search runs, so STOP is seen in the middle of a search
+"""
+
+
+def run_worker(connection, use_bitboards, workers, transposition_table_size_mb, book_path):
+    game_state = engine.GameState(use_bitboards=use_bitboards)
+    book = openingBook.OpeningBook(book_path) if book_path is not None else None
+    transposition_table = SharedTranspositionTable(transposition_table_size_mb)
+    searcher = aiMoveFinder.Searcher(SharedTranspositionTable(transposition_table_size_mb, transposition_table.name))
+    # the helper processes of the parallel search are started once for the whole game too
+    helpers = parallelSearch.SearchHelpers(transposition_table, workers)
+    commands = queue.Queue()
+    # id of the search being run, STOP only stops the search it was sent for
+    running_search = [None]
+    # highest id of a search stopped by the UI, a search stopped before it started is not run at all
+    stopped_search = [0]
+    search_lock = threading.Lock()
+
+    def read_commands():
+        while True:
+            try:
+                command = connection.recv()
+            except EOFError:
+                command = (QUIT,)
+            if command[0] == STOP:
+                with search_lock:
+                    stopped_search[0] = max(stopped_search[0], command[1])
+                    if running_search[0] == command[1]:
+                        searcher.stop()
+            else:
+                commands.put(command)
+            if command[0] == QUIT:
+                break
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    while True:
+        command = commands.get()
+        if command[0] == NEW_GAME:
+            fen = command[1]
+            game_state = engine.GameState(use_bitboards=use_bitboards) if fen is None else \
+                engine.GameState.from_fen(fen, use_bitboards)
+        elif command[0] == MAKE_MOVES:
+            for move_code in command[1]:
+                for move in game_state.get_valid_moves():
+                    if move_matches(move, move_code):
+                        game_state.make_move(move)
+                        break
+        elif command[0] == UNDO_MOVES:
+            for _ in range(command[1]):
+                game_state.undo_move()
+        elif command[0] == SEARCH:
+            search_id, time_limit = command[1], command[2]
+            with search_lock:
+                if search_id <= stopped_search[0]:
+                    continue
+                running_search[0] = search_id
+            valid_moves = game_state.get_valid_moves()
+            best_move = book.pick_move(game_state, valid_moves) if book is not None else None
+            if best_move is None:
+                best_move = parallelSearch.find_best_move(game_state, valid_moves, time_limit=time_limit,
+                                                          workers=workers, transposition_table=transposition_table,
+                                                          searcher=searcher, helpers=helpers)
+                # a helper which did not answer could still send its result, the helpers are started again
+                if helpers.broken:
+                    helpers.close()
+                    helpers = parallelSearch.SearchHelpers(transposition_table, workers)
+            with search_lock:
+                running_search[0] = None
+                # a STOP which came after the search ended must not stop the next one
+                searcher.stop_requested = False
+            connection.send((BEST_MOVE, search_id, encode_move(best_move) if best_move is not None else None))
+        elif command[0] == QUIT:
+            break
+    helpers.close()
+    searcher.transposition_table.close()
+    transposition_table.close()
+    if book is not None:
+        book.close()
+    connection.close()
+
+
+"""
+the UI side of the worker process
+book_path is the opening book file of the worker, None to always search
+the game state given to start_search must start from the position of the last new_game (the initial position by
+default), the worker is brought to the same position by making and undoing the moves which differ
+"""
+
+
+class EngineWorker:
+    def __init__(self, use_bitboards=True, workers=1,
+                 transposition_table_size_mb=aiMoveFinder.TRANSPOSITION_TABLE_SIZE_MB,
+                 book_path=openingBook.DEFAULT_BOOK_PATH):
+        self.connection, worker_connection = Pipe()
+        # not a daemon process, the parallel search starts processes of its own
+        self.process = Process(target=run_worker, args=(worker_connection, use_bitboards, workers,
+                                                        transposition_table_size_mb, book_path))
+        self.process.start()
+        # encoded moves made by the worker since the start of the game
+        self.moves_sent = []
+        self.search_id = 0
+        self.searching = False
+        self.best_move_code = None
+
+    """
+    start a new game from the given FEN, from the initial position if it is None
+    """
+
+    def new_game(self, fen=None):
+        self.stop()
+        self.connection.send((NEW_GAME, fen))
+        self.moves_sent = []
+
+    """
+    send the moves undone and made since the worker last saw the game
+    """
+
+    def update_position(self, game_state):
+        move_codes = [encode_move(move) for move in game_state.move_log]
+        common_moves = 0
+        while common_moves < min(len(move_codes), len(self.moves_sent)) and \
+                move_codes[common_moves] == self.moves_sent[common_moves]:
+            common_moves += 1
+        if common_moves < len(self.moves_sent):
+            self.connection.send((UNDO_MOVES, len(self.moves_sent) - common_moves))
+        if common_moves < len(move_codes):
+            self.connection.send((MAKE_MOVES, move_codes[common_moves:]))
+        self.moves_sent = move_codes
+
+    """
+    start searching the position of the game state, the result is read with is_search_done and get_best_move
+    a search still running is stopped first
+    """
+
+    def start_search(self, game_state, time_limit=aiMoveFinder.TIME_LIMIT):
+        self.stop()
+        self.update_position(game_state)
+        self.search_id += 1
+        self.searching = True
+        self.best_move_code = None
+        self.connection.send((SEARCH, self.search_id, time_limit))
+
+    """
+    read the replies of the worker, returns True when the last search started has given its move
+    replies of stopped searches are thrown away
+    """
+
+    def is_search_done(self, timeout=0):
+        while self.searching and self.connection.poll(timeout):
+            reply = self.connection.recv()
+            if reply[0] == BEST_MOVE and reply[1] == self.search_id:
+                self.best_move_code = reply[2]
+                self.searching = False
+        return not self.searching
+
+    """
+    wait for the search to end and return its move out of valid_moves, None if it found no move
+    """
+
+    def get_best_move(self, valid_moves):
+        self.is_search_done(None)
+        for move in valid_moves:
+            if move_matches(move, self.best_move_code):
+                return move
+        return None
+
+    """
+    stop the running search without waiting for it, its move is thrown away
+    """
+
+    def stop(self):
+        if self.searching:
+            self.connection.send((STOP, self.search_id))
+            self.searching = False
+
+    """
+    end the worker process
+    """
+
+    def close(self):
+        self.stop()
+        self.connection.send((QUIT,))
+        self.process.join(QUIT_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
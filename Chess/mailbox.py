@@ -0,0 +1,59 @@
+"""
+0x88 board used by the board walking move generator of GameState
+the board is a flat bytearray of 128 squares, square = row * 16 + column with row 0 the 8th rank like in
+GameState.board - columns 8 to 15 of every row are off the board, so a square is on the board when
+square & 0x88 is 0 and a step off any edge is found with that single test
+a square holds the code of its piece: the colour bit or-ed with the type, 0 when it is empty
+GameState keeps the board of strings in step with it, for the UI, the moves and the tests which read
+board[row][column]
+"""
+
+# piece types
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+TYPE_MASK = 7
+# colours
+WHITE = 8
+BLACK = 16
+COLOUR_MASK = WHITE | BLACK
+EMPTY = 0
+# a square with one of these bits set is off the board
+OFF_BOARD = 0x88
+
+# steps between squares: up, left, down, right, then top-left, top-right, bottom-left, bottom-right
+# the same order as the (row, column) directions of engine.attack_directions
+ORTHOGONAL_OFFSETS = (-16, -1, 16, 1)
+DIAGONAL_OFFSETS = (-17, -15, 15, 17)
+KING_OFFSETS = ORTHOGONAL_OFFSETS + DIAGONAL_OFFSETS
+# the same order as engine.knight_jumps
+KNIGHT_OFFSETS = (-33, -31, -18, -14, 14, 18, 31, 33)
+
+piece_codes = {"--": EMPTY}
+for colour_name, colour in (('w', WHITE), ('b', BLACK)):
+    for type_name, piece_type in (('p', PAWN), ('N', KNIGHT), ('B', BISHOP), ('R', ROOK), ('Q', QUEEN), ('K', KING)):
+        piece_codes[colour_name + type_name] = colour | piece_type
+# piece_names[code] is the string of the piece in GameState.board
+piece_names = [None] * 32
+for name, code in piece_codes.items():
+    piece_names[code] = name
+
+# coordinates[square] is the (row, column) of a square on the board, None off the board
+coordinates = tuple((square >> 4, square & 7) if not square & OFF_BOARD else None for square in range(128))
+# the 64 squares of the board, row by row
+board_squares = tuple(square for square in range(128) if not square & OFF_BOARD)
+
+
+def square_of(row, column):
+    return row * 16 + column
+
+
+"""
+0x88 board of a board of strings
+"""
+
+
+def squares_from_board(board):
+    squares = bytearray(128)
+    for row in range(8):
+        for column in range(8):
+            squares[row * 16 + column] = piece_codes[board[row][column]]
+    return squares
@@ -4,8 +4,7 @@ responsible for user input handling and also displays the current GameState obje
 """
 
 import pygame as p
-from Chess import engine, aiMoveFinder
-from multiprocessing import Process, Queue
+from Chess import engine, aiMoveFinder, engineWorker, openingBook
 
 # width and height of the board
 BOARD_WIDTH = BOARD_HEIGHT = 512
@@ -20,9 +19,15 @@ SQUARE_SIZE = BOARD_HEIGHT // DIMENSION
 MAXIMUM_FPS = 15
 # dictionary of images for pieces
 IMAGES = {}
+# generate moves with bitboards instead of walking the 0x88 board - bitboards are faster for perft, but the AI
+# search (python -m Chess.benchmark, with and without --bitboards) runs about 12% faster on the 0x88 board
+USE_BITBOARDS = False
+# processes searching each AI move, with more than one the engine worker uses the parallel search
+SEARCH_WORKERS = 1
+# play the moves of the opening book without searching them
+USE_OPENING_BOOK = True
 
 global colours
-global return_queue
 
 """
 Initialize a global dictionary of images (called only once in main)
@@ -50,7 +55,7 @@ def main():
     clock = p.time.Clock()
     screen.fill(p.Color("white"))
     move_log_font = p.font.SysFont("Arial", 20, False, False)
-    game_state = engine.GameState()
+    game_state = engine.GameState(use_bitboards=USE_BITBOARDS)
     valid_moves = game_state.get_valid_moves()
     # flag variable for when a move is made
     move_made = False
@@ -69,9 +74,10 @@ def main():
     player_one = True
     # if human plays black, variable is true; if AI is playing, than false
     player_two = False
-    # used for threading and responsiveness while AI thinks
+    # used for responsiveness while AI thinks, the AI searches in a process of its own kept for the whole game
     ai_thinking = False
-    move_finder_process = None
+    engine_worker = engineWorker.EngineWorker(use_bitboards=USE_BITBOARDS, workers=SEARCH_WORKERS,
+                                              book_path=openingBook.DEFAULT_BOOK_PATH if USE_OPENING_BOOK else None)
     move_undone = False
     while is_program_running:
         is_human_turn = (game_state.white_to_move and player_one) or (not game_state.white_to_move and player_two)
@@ -111,21 +117,22 @@ def main():
             elif event.type == p.KEYDOWN:
                 if event.key == p.K_z:
                     move_made, animate, ai_thinking, move_undone, game_over = \
-                        handle_undo_move(game_state, move_finder_process, ai_thinking)
+                        handle_undo_move(game_state, engine_worker, ai_thinking)
                 # reset the board on r key
                 if event.key == p.K_r:
                     game_state, valid_moves, selected_square, player_clicks, move_made, animate, ai_thinking, \
-                        move_undone, game_over = handle_restart_game(move_finder_process, ai_thinking)
+                        move_undone, game_over = handle_restart_game(engine_worker, ai_thinking)
 
         # AI finder - finder of moves
         if not game_over and not is_human_turn and not move_undone:
             if not ai_thinking:
                 # engine starts thinking about new move
-                move_finder_process, ai_thinking = engine_starts_thinking(game_state, valid_moves)
+                ai_thinking = engine_starts_thinking(engine_worker, game_state)
 
-            # engine is done thinking, so we take the move from the queue, and we make the move
-            if not move_finder_process.is_alive():
-                ai_move, ai_thinking, move_made, animate = make_move_after_ai_thinking(game_state, valid_moves)
+            # engine is done thinking, so we take the move from the worker, and we make the move
+            if engine_worker.is_search_done():
+                ai_move, ai_thinking, move_made, animate = make_move_after_ai_thinking(engine_worker, game_state,
+                                                                                       valid_moves)
 
         # animate last move and get next valid moves
         if move_made:
@@ -139,16 +146,18 @@ def main():
         clock.tick(MAXIMUM_FPS)
         p.display.flip()
 
+    engine_worker.close()
+
 
 """
 method that makes the move after ai finishes thinking
 """
 
 
-def make_move_after_ai_thinking(game_state, valid_moves):
+def make_move_after_ai_thinking(engine_worker, game_state, valid_moves):
     print("done thinking!")
     ai_thinking = False
-    ai_move = return_queue.get()
+    ai_move = engine_worker.get_best_move(valid_moves)
     if ai_move is None:
         ai_move = aiMoveFinder.find_random_move(valid_moves)
     game_state.make_move(ai_move)
@@ -158,22 +167,17 @@ def make_move_after_ai_thinking(game_state, valid_moves):
 
 
 """
-method that gets the engine to start thinking about a new move given the current state and valid moves
-another thread is used for this task
+method that gets the engine to start thinking about a new move given the current state
+the engine worker process is used for this task, it only gets the moves played since its last search
 """
 
 
-def engine_starts_thinking(game_state, valid_moves):
-    global return_queue
+def engine_starts_thinking(engine_worker, game_state):
     ai_thinking = True
     print("thinking ...")
-    # queue used to pass data between threads
-    return_queue = Queue()
-    move_finder_process = Process(target=aiMoveFinder.find_best_move, args=(game_state, valid_moves,
-                                                                            return_queue))
     # call method to find best move from AI
-    move_finder_process.start()
-    return move_finder_process, ai_thinking
+    engine_worker.start_search(game_state)
+    return ai_thinking
 
 
 """
@@ -186,6 +190,7 @@ def animate_move_and_get_next_valid_moves(game_state, screen, clock, animate):
     if animate:
         animate_move(game_state.move_log[-1], screen, game_state.board, clock)
     valid_moves = game_state.get_valid_moves()
+    game_state.update_draw()
     move_made = False
     animate = False
     move_undone = False
@@ -197,13 +202,13 @@ method that handles the event created by pressing z keyboard which means undo
 """
 
 
-def handle_undo_move(game_state, move_finder_process, ai_thinking):
+def handle_undo_move(game_state, engine_worker, ai_thinking):
     game_state.undo_move()
     move_made = True
     animate = False
     game_over = False
     if ai_thinking:
-        move_finder_process.terminate()
+        engine_worker.stop()
         ai_thinking = False
     move_undone = True
     return move_made, animate, ai_thinking, move_undone, game_over
@@ -214,8 +219,8 @@ method that handles the event created by pressing r keyboard which means game re
 """
 
 
-def handle_restart_game(move_finder_process, ai_thinking):
-    game_state = engine.GameState()
+def handle_restart_game(engine_worker, ai_thinking):
+    game_state = engine.GameState(use_bitboards=USE_BITBOARDS)
     valid_moves = game_state.get_valid_moves()
     selected_square = ()
     player_clicks = []
@@ -223,7 +228,7 @@ def handle_restart_game(move_finder_process, ai_thinking):
     animate = False
     game_over = False
     if ai_thinking:
-        move_finder_process.terminate()
+        engine_worker.stop()
         ai_thinking = False
     move_undone = True
     return game_state, valid_moves, selected_square, player_clicks, move_made, animate, ai_thinking, move_undone, \
@@ -231,15 +236,15 @@ def handle_restart_game(move_finder_process, ai_thinking):
 
 
 """
-method that prints a message at the end of the game if stalemate or checkmate
+method that prints a message at the end of the game if stalemate, checkmate or draw
 """
 
 
 def print_message_if_checkmate_or_stalemate(game_state, screen, game_over):
-    if game_state.checkmate or game_state.stalemate:
+    if game_state.checkmate or game_state.stalemate or game_state.draw:
         game_over = True
-        text = 'Stalemate' if game_state.stalemate else 'Black wins by checkmate' if game_state.white_to_move else \
-            'White wins by checkmate'
+        text = 'Stalemate' if game_state.stalemate else 'Draw' if game_state.draw else \
+            'Black wins by checkmate' if game_state.white_to_move else 'White wins by checkmate'
         draw_endgame_text(screen, text)
     return game_over
 
@@ -385,7 +390,7 @@ def animate_move(move, screen, board, clock):
 
 """
 method that writes the text at the end of the game
-text could be stalemate or checkmate depending on the result of the game
+text could be stalemate, draw or checkmate depending on the result of the game
 """
 
 
@@ -28,25 +28,71 @@ class Move:
         value: key for key, value in file_to_column.items()
     }
 
+    # attributes are kept in slots instead of a dictionary: search creates thousands of moves per position
+    __slots__ = ('start_row', 'start_column', 'end_row', 'end_column', 'move_id', 'is_enpassant_move',
+                 'is_castle_move', 'board', '_piece_moved', '_piece_captured')
+
     def __init__(self, start_square, end_square, board, is_enpassant_move=False, is_castle_move=False):
         self.start_row = start_square[0]
         self.start_column = start_square[1]
         self.end_row = end_square[0]
         self.end_column = end_square[1]
-        self.piece_moved = board[self.start_row][self.start_column]
-        self.piece_captured = board[self.end_row][self.end_column]
-        # check if move is a pawn promotion
-        self.is_pawn_promotion = (self.piece_moved == 'wp' and self.end_row == 0) or \
-                                 (self.piece_moved == 'bp' and self.end_row == 7)
+        # start square index in bits 6-11, end square index in bits 0-5
+        self.move_id = (self.start_row * 8 + self.start_column) << 6 | (self.end_row * 8 + self.end_column)
         # check if en passant move
         self.is_enpassant_move = is_enpassant_move
-        if self.is_enpassant_move:
-            self.piece_captured = 'wp' if self.piece_moved == 'bp' else 'bp'
-
-        self.is_capture = self.piece_captured != '--'
         # castle move
         self.is_castle_move = is_castle_move
-        self.move_id = self.start_row * 1000 + self.start_column * 100 + self.end_row * 10 + self.end_column
+        # pieces are read from the board only when needed - most generated moves are never played
+        # the board must still be in the position the move was generated for when they are read
+        self.board = board
+        self._piece_moved = None
+        self._piece_captured = None
+
+    @property
+    def piece_moved(self):
+        if self._piece_moved is None:
+            self._piece_moved = self.board[self.start_row][self.start_column]
+        return self._piece_moved
+
+    @property
+    def piece_captured(self):
+        if self._piece_captured is None:
+            if self.is_enpassant_move:
+                self._piece_captured = 'wp' if self.piece_moved == 'bp' else 'bp'
+            else:
+                self._piece_captured = self.board[self.end_row][self.end_column]
+        return self._piece_captured
+
+    # check if move is a pawn promotion
+    @property
+    def is_pawn_promotion(self):
+        return (self.end_row == 0 or self.end_row == 7) and self.piece_moved[1] == 'p'
+
+    @property
+    def is_capture(self):
+        return self.piece_captured != '--'
+
+    """
+    16 bit encoding of the move: start and end squares (move_id) + en passant, castle and promotion flags
+    """
+
+    def get_packed(self):
+        return self.move_id | self.is_enpassant_move << 12 | self.is_castle_move << 13 | self.is_pawn_promotion << 14
+
+    """
+    moves are sent between processes without the board, so the pieces are read before pickling
+    """
+
+    def __getstate__(self):
+        return (self.start_row, self.start_column, self.end_row, self.end_column, self.is_enpassant_move,
+                self.is_castle_move, self.piece_moved, self.piece_captured)
+
+    def __setstate__(self, state):
+        self.start_row, self.start_column, self.end_row, self.end_column, self.is_enpassant_move, \
+            self.is_castle_move, self._piece_moved, self._piece_captured = state
+        self.move_id = (self.start_row * 8 + self.start_column) << 6 | (self.end_row * 8 + self.end_column)
+        self.board = None
 
     """
     override equals method
@@ -57,6 +103,10 @@ class Move:
             return self.move_id == other.move_id
         return False
 
+    # equal moves have the same hash, so moves can be used in sets and as dictionary keys
+    def __hash__(self):
+        return self.move_id
+
     def get_chess_notation(self):
         # chess notations for the moves we make
         return self.get_rank_file(self.start_row, self.start_column) + self.get_rank_file(self.end_row, self.end_column)
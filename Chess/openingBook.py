@@ -0,0 +1,217 @@
+"""
+opening book consulted before the search
+the book file is a Polyglot book: entries of 16 bytes (big-endian key, move, weight and learn fields) sorted by
+key, so the entries of a position are found by a binary search in the memory mapped file
+the key is the Polyglot key of the position (see polyglotRandom.py), so any Polyglot book can be used, and
+build_book writes one from games given as moves in chess notation (e2e4), one game per line
+the move is encoded like Polyglot does: to file, to row, from file and from row in 3 bits each (row 0 is rank 1),
+promotion piece in the next 3 bits, castling as the king taking its own rook
+
+usage:
+    python -m Chess.openingBook build Chess/books/openings.txt Chess/books/openings.bin --plies 16
+    python -m Chess.openingBook probe "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+from Chess import engine
+from Chess.polyglotRandom import random64
+
+# book shipped with the engine, built from openings.txt in the same directory
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books", "openings.bin")
+# key, move, weight, learn
+BOOK_ENTRY = struct.Struct(">QHHI")
+# number of moves of every game put in a book
+BOOK_PLIES = 16
+# promotion piece of a book move, pawns are always promoted to a queen by this engine
+QUEEN_PROMOTION = 4
+MAXIMUM_WEIGHT = 0xFFFF
+# kind of every piece in the Polyglot keys, black then white for every type
+polyglot_piece_kinds = {'bp': 0, 'wp': 1, 'bN': 2, 'wN': 3, 'bB': 4, 'wB': 5, 'bR': 6, 'wR': 7, 'bQ': 8, 'wQ': 9,
+                        'bK': 10, 'wK': 11}
+# first Polyglot random number of the castling rights (in the order of the castling bits), of the en passant files
+# and the one of white to move
+POLYGLOT_CASTLING = 768
+POLYGLOT_ENPASSANT = 772
+POLYGLOT_WHITE_TO_MOVE = 780
+
+"""
+Polyglot key of the position of a game state
+the en passant file is only part of the key when a pawn of the side to move stands next to the pawn which has just
+moved 2 squares, like Polyglot does - whether the capture is legal does not matter
+"""
+
+
+def polyglot_key(game_state):
+    board = game_state.board
+    key = 0
+    for row in range(8):
+        for column in range(8):
+            piece = board[row][column]
+            if piece != "--":
+                # Polyglot squares start from a1, the rows of the board from the 8th rank
+                key ^= random64[64 * polyglot_piece_kinds[piece] + 8 * (7 - row) + column]
+    for index in range(4):
+        if game_state.castling_rights >> index & 1:
+            key ^= random64[POLYGLOT_CASTLING + index]
+    if game_state.enpassant_possible != ():
+        row, column = game_state.enpassant_possible
+        # the pawns which can take en passant stand next to the pawn which moved, on the row past the en passant square
+        pawn_row, pawn = (row + 1, 'wp') if game_state.white_to_move else (row - 1, 'bp')
+        if any(0 <= capture_column < 8 and board[pawn_row][capture_column] == pawn
+               for capture_column in (column - 1, column + 1)):
+            key ^= random64[POLYGLOT_ENPASSANT + column]
+    if game_state.white_to_move:
+        key ^= random64[POLYGLOT_WHITE_TO_MOVE]
+    return key
+
+"""
+code of a move in a book entry
+"""
+
+
+def encode_book_move(move):
+    end_column = move.end_column
+    # castling is written as the king taking its own rook
+    if move.is_castle_move:
+        end_column = 7 if move.end_column > move.start_column else 0
+    code = end_column | (7 - move.end_row) << 3 | move.start_column << 6 | (7 - move.start_row) << 9
+    if move.is_pawn_promotion:
+        code |= QUEEN_PROMOTION << 12
+    return code
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.path.getsize(path)
+        self.number_of_entries = size // BOOK_ENTRY.size
+        # an empty file cannot be memory mapped, and has no entries to look at anyway
+        self.entries = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size != 0 else None
+
+    """
+    the (move code, weight) of the book entries of the position with the given key, an empty list if there is none
+    """
+
+    def find_entries(self, key):
+        entries = self.entries
+        low, high = 0, self.number_of_entries
+        # first entry with a key at least as big as the key looked for
+        while low < high:
+            middle = (low + high) // 2
+            if BOOK_ENTRY.unpack_from(entries, middle * BOOK_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self.number_of_entries:
+            entry_key, move_code, weight, learn = BOOK_ENTRY.unpack_from(entries, low * BOOK_ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((move_code, weight))
+            low += 1
+        return found
+
+    """
+    the book moves of the position as (move, weight), the valid moves are generated only if the position is in the
+    book
+    """
+
+    def get_moves(self, game_state, valid_moves=None):
+        entries = self.find_entries(polyglot_key(game_state))
+        if len(entries) == 0:
+            return []
+        if valid_moves is None:
+            valid_moves = game_state.get_valid_moves()
+        moves_by_code = {encode_book_move(move): move for move in valid_moves}
+        return [(moves_by_code[move_code], weight) for move_code, weight in entries
+                if move_code in moves_by_code and weight != 0]
+
+    """
+    a book move of the position picked at random, a move with twice the weight being picked twice as often
+    None if the position is not in the book
+    """
+
+    def pick_move(self, game_state, valid_moves=None, generator=random):
+        book_moves = self.get_moves(game_state, valid_moves)
+        if len(book_moves) == 0:
+            return None
+        pick = generator.randrange(sum(weight for move, weight in book_moves))
+        for move, weight in book_moves:
+            if pick < weight:
+                return move
+            pick -= weight
+
+    def close(self):
+        if self.entries is not None:
+            self.entries.close()
+        self.file.close()
+
+
+"""
+build a book file from games, every game is a list of moves in chess notation (e2e4) from the initial position
+the first plies moves of every game are put in the book, the weight of a move is the number of games playing it
+raises ValueError if a move is not valid
+returns the number of entries written
+"""
+
+
+def build_book(games, path, plies=BOOK_PLIES):
+    weights = {}
+    for game_number, game in enumerate(games, 1):
+        game_state = engine.GameState(use_bitboards=True)
+        for notation in game[:plies]:
+            move = next((move for move in game_state.get_valid_moves() if move.get_chess_notation() == notation), None)
+            if move is None:
+                raise ValueError("game %d: %s is not a valid move" % (game_number, notation))
+            entry = (polyglot_key(game_state), encode_book_move(move))
+            weights[entry] = min(weights.get(entry, 0) + 1, MAXIMUM_WEIGHT)
+            game_state.make_move(move)
+    with open(path, "wb") as book:
+        for (key, move_code), weight in sorted(weights.items()):
+            book.write(BOOK_ENTRY.pack(key, move_code, weight, 0))
+    return len(weights)
+
+
+"""
+games of a text file, one game per line as moves in chess notation separated by spaces, # starts a comment
+"""
+
+
+def read_games(path):
+    with open(path) as games:
+        for line in games:
+            moves = line.split('#')[0].split()
+            if len(moves) != 0:
+                yield moves
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="build or probe an opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build a book from a file of games")
+    build_parser.add_argument("games", help="text file with one game per line, moves like e2e4")
+    build_parser.add_argument("book", help="book file written")
+    build_parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="moves of every game put in the book")
+    probe_parser = commands.add_parser("probe", help="list the book moves of a position")
+    probe_parser.add_argument("fen")
+    probe_parser.add_argument("--book", default=DEFAULT_BOOK_PATH)
+    options = parser.parse_args(arguments)
+
+    if options.command == "build":
+        print("%d entries written" % build_book(read_games(options.games), options.book, options.plies))
+    else:
+        book = OpeningBook(options.book)
+        for move, weight in book.get_moves(engine.GameState.from_fen(options.fen)):
+            print("%s %d" % (move.get_chess_notation(), weight))
+        book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+parallel alpha beta search (lazy SMP)
+several processes search the same root position at the same time and share one transposition table in shared
+memory, the helpers fill the table with positions the main search then finds instead of searching them again
+the helpers are varied so they do not all search the same moves in the same order: every helper shuffles the root
+moves with its own seed and every other helper starts its iterative deepening one depth further
+the main search runs in the calling process, when it is done the helpers are stopped and the deepest completed
+result of all the searches is played
+"""
+import multiprocessing
+import random
+import threading
+from queue import Empty
+
+from Chess import aiMoveFinder
+from Chess.transpositionTable import SharedTranspositionTable, encode_move, move_matches
+
+# number of processes searching, the calling process included - use the number of cores of the machine
+SEARCH_WORKERS = multiprocessing.cpu_count()
+# seconds waited for a helper to give its result after it was asked to stop
+HELPER_STOP_TIMEOUT = 5.0
+
+"""
+loop of a helper process, kept for all the searches of a game: it attaches to the shared table once and searches
+every position it gets from its command queue until it gets None
+a search goes on until the main search asks it to stop, its result (worker index, completed depth, score, encoded
+best move) is then put in result_queue - a helper which finishes early waits for the stop, so a stop is never left
+over for its next search
+"""
+
+
+def run_helper(worker_index, table_name, table_size_mb, commands, stop_event, result_queue):
+    transposition_table = SharedTranspositionTable(table_size_mb, table_name)
+    searcher = aiMoveFinder.Searcher(transposition_table)
+    generator = random.Random(worker_index)
+
+    # the stop event is waited for in a thread because the search only looks at the stop flag of its searcher
+    def wait_for_stop():
+        stop_event.wait()
+        searcher.stop()
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        game_state, valid_moves, max_depth = command
+        stop_waiter = threading.Thread(target=wait_for_stop, daemon=True)
+        stop_waiter.start()
+        generator.shuffle(valid_moves)
+        best_move = searcher.search(game_state, valid_moves, time_limit=None, max_depth=max_depth,
+                                    randomize_root=False, start_depth=1 + worker_index % 2)
+        stop_waiter.join()
+        searcher.stop_requested = False
+        result_queue.put((worker_index, searcher.completed_depth, searcher.score,
+                          encode_move(best_move) if best_move is not None else None))
+    transposition_table.close()
+
+
+"""
+the helper processes of the parallel search, started once and kept between the moves of a game
+transposition_table is the SharedTranspositionTable the helpers attach to, it must live as long as the helpers
+"""
+
+
+class SearchHelpers:
+    def __init__(self, transposition_table, workers=SEARCH_WORKERS):
+        self.stop_event = multiprocessing.Event()
+        self.result_queue = multiprocessing.Queue()
+        self.command_queues = []
+        self.processes = []
+        for worker_index in range(1, workers):
+            # a simple queue pickles the position when it is put, before the main search starts changing it
+            commands = multiprocessing.SimpleQueue()
+            process = multiprocessing.Process(target=run_helper, args=(
+                worker_index, transposition_table.name, transposition_table.size_mb, commands, self.stop_event,
+                self.result_queue), daemon=True)
+            process.start()
+            self.command_queues.append(commands)
+            self.processes.append(process)
+        # set when a helper did not give its result in time, the helpers cannot be used anymore
+        self.broken = False
+
+    """
+    start searching the position in every helper
+    """
+
+    def start(self, game_state, valid_moves, max_depth):
+        self.stop_event.clear()
+        for commands in self.command_queues:
+            commands.put((game_state, list(valid_moves), max_depth))
+
+    """
+    stop the helpers and return their results as a list of (worker index, completed depth, score, encoded move)
+    """
+
+    def stop(self):
+        self.stop_event.set()
+        results = []
+        for _ in self.processes:
+            try:
+                results.append(self.result_queue.get(timeout=HELPER_STOP_TIMEOUT))
+            except Empty:
+                self.broken = True
+                break
+        return results
+
+    """
+    end the helper processes
+    """
+
+    def close(self):
+        for commands in self.command_queues:
+            commands.put(None)
+        for process in self.processes:
+            process.join(HELPER_STOP_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+
+
+"""
+find the best move with the main search and workers - 1 helper processes
+transposition_table is a SharedTranspositionTable kept between the moves of a game, a new one is used if it is None
+searcher is the searcher of the main search, kept between the moves too, it must use the shared table attached by
+its name (not the table itself, so it follows the age of the table)
+helpers are the SearchHelpers of the game, attached to transposition_table - without them, helpers are started
+for this search only
+the best move is put in return_queue (if given) and returned
+"""
+
+
+def find_best_move(game_state, valid_moves, return_queue=None, time_limit=aiMoveFinder.TIME_LIMIT, node_limit=None,
+                   max_depth=aiMoveFinder.MAX_DEPTH, workers=SEARCH_WORKERS, transposition_table=None, searcher=None,
+                   helpers=None):
+    own_table = transposition_table is None
+    if own_table:
+        transposition_table = SharedTranspositionTable(aiMoveFinder.TRANSPOSITION_TABLE_SIZE_MB)
+    own_helpers = helpers is None
+    if own_helpers:
+        helpers = SearchHelpers(transposition_table, workers)
+    # the helpers follow the age of the owner, so the new search is started before they get the position
+    transposition_table.new_search()
+    helpers.start(game_state, valid_moves, max_depth)
+
+    # the main search attaches to the table like the helpers do, so it follows the age instead of changing it
+    own_searcher = searcher is None
+    if own_searcher:
+        searcher = aiMoveFinder.Searcher(SharedTranspositionTable(transposition_table.size_mb,
+                                                                  transposition_table.name))
+    best_move = searcher.search(game_state, valid_moves, time_limit, node_limit, max_depth)
+    best_depth = searcher.completed_depth
+
+    for worker_index, depth, score, move_code in helpers.stop():
+        if depth > best_depth and move_code is not None:
+            for move in valid_moves:
+                if move_matches(move, move_code):
+                    best_move = move
+                    best_depth = depth
+                    break
+    if own_helpers:
+        helpers.close()
+    if own_searcher:
+        searcher.transposition_table.close()
+    if own_table:
+        transposition_table.close()
+
+    if return_queue is not None:
+        return_queue.put(best_move)
+    return best_move
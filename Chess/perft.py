@@ -0,0 +1,144 @@
+"""
+perft - performance test of the move generator
+counts the leaf nodes of the tree of all legal moves up to a given depth, using make_move, get_valid_moves and
+undo_move like the search does
+the counts are compared against known results to find move generation bugs and the time gives nodes/second
+
+usage:
+    python -m Chess.perft --depth 4
+    python -m Chess.perft --depth 3 --fen "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" --divide
+    python -m Chess.perft --suite --max-nodes 1000000 --bitboards
+"""
+import argparse
+import sys
+import time
+
+from Chess import engine
+
+INITIAL_POSITION = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# reference positions with their known number of leaf nodes for each depth
+# pawns are always promoted to a queen by this engine, so only depths without promotions in the tree are listed
+REFERENCE_POSITIONS = [
+    ("initial position", INITIAL_POSITION,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     {1: 48, 2: 2039, 3: 97862}),
+    ("en passant pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     {1: 46, 2: 2079, 3: 89890}),
+    ("stalemate and checkmate", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+     {4: 23527}),
+    ("short castling gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+     {6: 661072}),
+    ("long castling gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+     {6: 803711}),
+    ("castling rights lost by rook captures", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+     {4: 1274206}),
+    ("castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+     {4: 1720476}),
+]
+
+"""
+number of leaf nodes at the given depth
+the last level is not played, the number of valid moves is the number of leaves
+"""
+
+
+def perft(game_state, depth):
+    if depth == 0:
+        return 1
+    moves = game_state.get_valid_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game_state.make_move(move)
+        nodes += perft(game_state, depth - 1)
+        game_state.undo_move()
+    return nodes
+
+
+"""
+number of leaf nodes for every move of the root - used to find the move where the counts start to differ
+"""
+
+
+def divide(game_state, depth):
+    results = []
+    for move in game_state.get_valid_moves():
+        game_state.make_move(move)
+        results.append((move, perft(game_state, depth - 1)))
+        game_state.undo_move()
+    return results
+
+
+"""
+run perft on the reference positions, skipping the depths with more than max_nodes leaves
+returns a list of (name, depth, expected nodes, nodes, seconds)
+"""
+
+
+def run_suite(use_bitboards=False, max_nodes=100000, output=None):
+    results = []
+    for name, fen, expected_counts in REFERENCE_POSITIONS:
+        for depth, expected_nodes in sorted(expected_counts.items()):
+            if expected_nodes > max_nodes:
+                continue
+            game_state = engine.GameState.from_fen(fen, use_bitboards)
+            start_time = time.perf_counter()
+            nodes = perft(game_state, depth)
+            seconds = time.perf_counter() - start_time
+            results.append((name, depth, expected_nodes, nodes, seconds))
+            if output is not None:
+                status = "ok" if nodes == expected_nodes else "FAILED expected " + str(expected_nodes)
+                output.write("%-40s depth %d  nodes %10d  %8.0f nodes/s  %s\n" %
+                             (name, depth, nodes, nodes / max(seconds, 1e-9), status))
+    return results
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="count leaf nodes of the legal move tree")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fen", default=INITIAL_POSITION)
+    parser.add_argument("--divide", action="store_true", help="print the leaf nodes of every root move")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard move generator")
+    parser.add_argument("--suite", action="store_true", help="run the reference positions")
+    parser.add_argument("--max-nodes", type=int, default=1000000, help="largest reference count run by --suite")
+    parser.add_argument("--min-nps", type=float, default=0, help="fail if the speed is below this nodes/second")
+    options = parser.parse_args(arguments)
+
+    if options.suite:
+        start_time = time.perf_counter()
+        results = run_suite(options.bitboards, options.max_nodes, sys.stdout)
+        seconds = time.perf_counter() - start_time
+        nodes = sum(result[3] for result in results)
+        failures = sum(1 for result in results if result[2] != result[3])
+        nodes_per_second = nodes / max(seconds, 1e-9)
+        print("total nodes %d  time %.2fs  %.0f nodes/s  failures %d" % (nodes, seconds, nodes_per_second, failures))
+    else:
+        game_state = engine.GameState.from_fen(options.fen, options.bitboards)
+        start_time = time.perf_counter()
+        if options.divide:
+            results = divide(game_state, options.depth)
+            for move, move_nodes in results:
+                print(move.get_chess_notation() + ": " + str(move_nodes))
+            nodes = sum(move_nodes for move, move_nodes in results)
+        else:
+            nodes = perft(game_state, options.depth)
+        seconds = time.perf_counter() - start_time
+        nodes_per_second = nodes / max(seconds, 1e-9)
+        failures = 0
+        print("nodes %d  time %.2fs  %.0f nodes/s" % (nodes, seconds, nodes_per_second))
+
+    if failures != 0:
+        return 1
+    if nodes_per_second < options.min_nps:
+        print("too slow: %.0f nodes/s, minimum %.0f nodes/s" % (nodes_per_second, options.min_nps))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
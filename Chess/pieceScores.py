@@ -0,0 +1,120 @@
+"""
+scores of the pieces used to evaluate a position: material value and a positional bonus for every square
+the score of a position is the material plus a tenth of the positional bonuses, white pieces count positive and
+black pieces negative
+GameState keeps both totals up to date in make_move and undo_move, so a position is evaluated without looking at
+the board
+"""
+
+piece_score = {
+    "K": 0,
+    "Q": 9,
+    "R": 5,
+    "B": 3,
+    "N": 3,
+    "p": 1
+}
+
+# create score arrays for all pieces
+
+knight_scores = [[1, 1, 1, 1, 1, 1, 1, 1],
+                 [1, 2, 2, 2, 2, 2, 2, 1],
+                 [1, 2, 3, 3, 3, 3, 2, 1],
+                 [1, 2, 3, 4, 4, 3, 2, 1],
+                 [1, 2, 3, 4, 4, 3, 2, 1],
+                 [1, 2, 3, 3, 3, 3, 2, 1],
+                 [1, 2, 2, 2, 2, 2, 2, 1],
+                 [1, 1, 1, 1, 1, 1, 1, 1]
+                 ]
+
+bishop_scores = [[4, 3, 2, 1, 1, 2, 3, 4],
+                 [3, 4, 3, 2, 2, 3, 4, 3],
+                 [2, 3, 4, 3, 3, 4, 3, 2],
+                 [1, 2, 3, 4, 4, 3, 2, 1],
+                 [1, 2, 3, 4, 4, 3, 2, 1],
+                 [2, 3, 4, 3, 3, 4, 3, 2],
+                 [3, 4, 3, 2, 2, 3, 4, 3],
+                 [4, 3, 2, 1, 1, 2, 3, 4]
+                 ]
+
+queen_scores = [[1, 1, 1, 3, 1, 1, 1, 1],
+                [1, 2, 3, 3, 3, 1, 1, 1],
+                [1, 4, 3, 3, 3, 4, 2, 1],
+                [1, 2, 3, 3, 3, 2, 2, 1],
+                [1, 2, 3, 3, 3, 2, 2, 1],
+                [1, 4, 3, 3, 3, 4, 2, 1],
+                [1, 1, 2, 3, 3, 1, 1, 1],
+                [1, 1, 1, 3, 1, 1, 1, 1]
+                ]
+
+rook_scores = [[4, 3, 4, 4, 4, 4, 3, 4],
+               [4, 4, 4, 4, 4, 4, 4, 4],
+               [1, 1, 2, 3, 3, 2, 1, 1],
+               [1, 2, 3, 3, 3, 3, 2, 1],
+               [1, 2, 3, 3, 3, 3, 2, 1],
+               [1, 1, 2, 2, 2, 2, 1, 1],
+               [4, 4, 4, 4, 4, 4, 4, 4],
+               [4, 3, 4, 4, 4, 4, 3, 4]
+               ]
+
+white_pawn_scores = [[8, 8, 8, 8, 8, 8, 8, 8],
+                     [8, 8, 8, 8, 8, 8, 8, 8],
+                     [5, 6, 6, 7, 7, 6, 6, 5],
+                     [2, 3, 3, 5, 5, 3, 3, 2],
+                     [1, 2, 3, 4, 4, 3, 2, 1],
+                     [1, 1, 2, 3, 3, 2, 1, 1],
+                     [1, 1, 1, 0, 0, 1, 1, 1],
+                     [0, 0, 0, 0, 0, 0, 0, 0]
+                     ]
+
+black_pawn_scores = [[0, 0, 0, 0, 0, 0, 0, 0],
+                     [1, 1, 1, 0, 0, 1, 1, 1],
+                     [1, 1, 2, 3, 3, 2, 1, 1],
+                     [1, 2, 3, 4, 4, 3, 2, 1],
+                     [2, 3, 3, 5, 5, 3, 3, 2],
+                     [5, 6, 6, 7, 7, 6, 6, 5],
+                     [8, 8, 8, 8, 8, 8, 8, 8],
+                     [8, 8, 8, 8, 8, 8, 8, 8]
+                     ]
+
+piece_position_scores = {"N": knight_scores,
+                         "Q": queen_scores,
+                         "B": bishop_scores,
+                         "R": rook_scores,
+                         "bp": black_pawn_scores,
+                         "wp": white_pawn_scores
+                         }
+
+# signed tables used by GameState: material_values[piece] and position_values[piece][row][column]
+# positive for white pieces and negative for black ones, kings have no positional bonus
+material_values = {}
+position_values = {}
+for _colour, _sign in (('w', 1), ('b', -1)):
+    for _piece_type in piece_score:
+        _piece = _colour + _piece_type
+        if _piece_type == 'K':
+            _scores = [[0] * 8 for _ in range(8)]
+        elif _piece_type == 'p':
+            _scores = piece_position_scores[_piece]
+        else:
+            _scores = piece_position_scores[_piece_type]
+        material_values[_piece] = _sign * piece_score[_piece_type]
+        position_values[_piece] = [[_sign * score for score in row] for row in _scores]
+# an empty square adds nothing
+material_values["--"] = 0
+position_values["--"] = [[0] * 8 for _ in range(8)]
+
+"""
+material and positional totals of a board, computed from scratch
+"""
+
+
+def compute_scores(board):
+    material_score = 0
+    position_score = 0
+    for row in range(8):
+        for column in range(8):
+            square = board[row][column]
+            material_score += material_values[square]
+            position_score += position_values[square][row][column]
+    return material_score, position_score
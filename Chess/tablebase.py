@@ -0,0 +1,423 @@
+"""
+endgame tablebases for a king and a queen, a rook or a pawn against a lone king (KQK, KRK and KPK)
+every table gives the exact result of all the positions of its material: won, drawn or lost for the side to move,
+with the number of plies to checkmate for the won and lost ones
+the tables are built by retrograde analysis: starting from the checkmates, the positions one move before a lost
+position are won, and the positions where every move leads to a won position are lost
+the side with the extra piece is always white in a table, a position with black stronger is looked at upside down
+a table is a file of one byte per position, memory mapped when it is probed
+only the 3 piece tables are built: a 4 piece table (KQKR, KRKP...) has 64 times more positions, 33.5 million
+for each side to move, and its pure Python build would take well over ten minutes and more than a GB of memory for
+the moves left of the black positions - the 3 piece tables build in a few seconds each
+
+usage:
+    python -m Chess.tablebase build
+    python -m Chess.tablebase build --directory /tmp/tablebases
+    python -m Chess.tablebase probe "8/8/8/8/8/2k5/8/K1Q5 b - - 0 1"
+"""
+import argparse
+import mmap
+import os
+import sys
+
+from Chess import engine
+
+# directory of the table files, built with "python -m Chess.tablebase build"
+DEFAULT_TABLEBASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+# the tables cover the positions with at most this many pieces, kings included (see above for why not 4)
+MAX_TABLEBASE_PIECES = 3
+# the extra piece of every table, KPK needs KQK for its promotions so it is built last
+TABLE_PIECES = {"KQK": 'Q', "KRK": 'R', "KPK": 'p'}
+TABLE_SUFFIX = ".tb"
+
+# results of a position for the side to move
+WIN, DRAW, LOSS = 1, 0, -1
+# byte of a position in a table: 0 for a draw (or a position that cannot happen), plies to checkmate for a win and
+# LOSS_OFFSET + plies to checkmate for a loss
+LOSS_OFFSET = 128
+# index of a position: side to move (0 for white), square of the white king, of the black king and of the piece
+# squares are row * 8 + column, row 0 being the 8th rank like in GameState.board
+SIDE_TO_MOVE_SIZE = 64 * 64 * 64
+TABLE_SIZE = 2 * SIDE_TO_MOVE_SIZE
+
+KING_DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+ROOK_DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1))
+
+"""
+squares next to every square
+"""
+
+
+def compute_king_moves():
+    king_moves = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        king_moves.append([(row + row_step) * 8 + column + column_step for row_step, column_step in KING_DIRECTIONS
+                           if 0 <= row + row_step < 8 and 0 <= column + column_step < 8])
+    return king_moves
+
+
+"""
+squares reached from every square going in every direction, nearest first
+"""
+
+
+def compute_rays(directions):
+    rays = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        square_rays = []
+        for row_step, column_step in directions:
+            ray = []
+            ray_row, ray_column = row + row_step, column + column_step
+            while 0 <= ray_row < 8 and 0 <= ray_column < 8:
+                ray.append(ray_row * 8 + ray_column)
+                ray_row, ray_column = ray_row + row_step, ray_column + column_step
+            square_rays.append(ray)
+        rays.append(square_rays)
+    return rays
+
+
+"""
+for every from square * 64 + to square: the squares in between if the piece on the from square attacks the to
+square on an empty board, None otherwise
+"""
+
+
+def compute_attack_lines(piece):
+    attack_lines = [None] * 4096
+    for square in range(64):
+        if piece == 'p':
+            row, column = divmod(square, 8)
+            for column_step in (-1, 1):
+                if row > 0 and 0 <= column + column_step < 8:
+                    attack_lines[square * 64 + (row - 1) * 8 + column + column_step] = frozenset()
+            continue
+        for ray in piece_rays[piece][square]:
+            for distance, ray_square in enumerate(ray):
+                attack_lines[square * 64 + ray_square] = frozenset(ray[:distance])
+    return attack_lines
+
+
+king_moves = compute_king_moves()
+king_neighbours = [set(moves) for moves in king_moves]
+piece_rays = {'Q': compute_rays(KING_DIRECTIONS), 'R': compute_rays(ROOK_DIRECTIONS)}
+attack_lines = {piece: compute_attack_lines(piece) for piece in TABLE_PIECES.values()}
+
+
+def table_index(black_to_move, white_king, black_king, piece):
+    return black_to_move * SIDE_TO_MOVE_SIZE + white_king * 4096 + black_king * 64 + piece
+
+
+"""
+check if the white piece on piece_square attacks the square, the white king being the only piece blocking it
+"""
+
+
+def piece_attacks(piece, piece_square, square, white_king):
+    line = attack_lines[piece][piece_square * 64 + square]
+    return line is not None and white_king not in line
+
+
+"""
+check if the position can happen: three different squares, kings apart, no pawn on the first or last rank and,
+with white to move, the black king not in check
+"""
+
+
+def is_legal(piece, black_to_move, white_king, black_king, piece_square):
+    if white_king == black_king or piece_square == white_king or piece_square == black_king or \
+            black_king in king_neighbours[white_king]:
+        return False
+    if piece == 'p' and (piece_square < 8 or piece_square >= 56):
+        return False
+    return black_to_move or not piece_attacks(piece, piece_square, black_king, white_king)
+
+
+"""
+squares the white piece can move to, with the promotions of the pawn marked as True
+"""
+
+
+def piece_moves(piece, white_king, black_king, piece_square):
+    if piece == 'p':
+        moves = []
+        forward = piece_square - 8
+        if forward != white_king and forward != black_king:
+            moves.append((forward, forward < 8))
+            if piece_square >= 48 and forward - 8 != white_king and forward - 8 != black_king:
+                moves.append((forward - 8, False))
+        return moves
+    moves = []
+    for ray in piece_rays[piece][piece_square]:
+        for ray_square in ray:
+            if ray_square == white_king or ray_square == black_king:
+                break
+            moves.append((ray_square, False))
+    return moves
+
+
+"""
+squares the white piece could have come from to reach its square, without captures (black only has its king)
+"""
+
+
+def piece_unmoves(piece, white_king, black_king, piece_square):
+    if piece == 'p':
+        unmoves = []
+        back = piece_square + 8
+        if back < 56 and back != white_king and back != black_king:
+            unmoves.append(back)
+            # double step from the 2nd rank
+            if 32 <= piece_square < 40 and back + 8 != white_king and back + 8 != black_king:
+                unmoves.append(back + 8)
+        return unmoves
+    # a rook or a queen moves back the same way it moves
+    return [square for square, promotion in piece_moves(piece, white_king, black_king, piece_square)]
+
+
+"""
+moves of the black king in a position with black to move: the squares it can go to without a capture, and if it
+can take the white piece (which always draws)
+"""
+
+
+def black_king_moves(piece, white_king, black_king, piece_square):
+    targets = []
+    can_capture = False
+    white_king_neighbours = king_neighbours[white_king]
+    for square in king_moves[black_king]:
+        if square in white_king_neighbours:
+            continue
+        if square == piece_square:
+            can_capture = True
+        elif not piece_attacks(piece, piece_square, square, white_king):
+            targets.append(square)
+    return targets, can_capture
+
+
+def encode_result(result, plies):
+    if result == WIN:
+        return plies
+    if result == LOSS:
+        return LOSS_OFFSET + plies
+    return 0
+
+
+def decode_result(value):
+    if value == 0:
+        return DRAW, 0
+    if value >= LOSS_OFFSET:
+        return LOSS, value - LOSS_OFFSET
+    return WIN, value
+
+
+"""
+build the table of the king, the given white piece and the lone black king
+queen_table is the KQK table, needed by KPK for the positions after a promotion
+returns the table as a bytearray of TABLE_SIZE bytes
+"""
+
+
+def build_table(piece, queen_table=None):
+    table = bytearray(TABLE_SIZE)
+    resolved = bytearray(TABLE_SIZE)
+    # moves left to a black position before all its moves are known to lose, None when it has a drawing move
+    moves_left = {}
+    # positions to resolve at every number of plies, win or loss given by the side to move
+    buckets = [[]]
+
+    for white_king in range(64):
+        for black_king in range(64):
+            for piece_square in range(64):
+                if not is_legal(piece, True, white_king, black_king, piece_square):
+                    continue
+                targets, can_capture = black_king_moves(piece, white_king, black_king, piece_square)
+                if can_capture:
+                    moves_left[table_index(1, white_king, black_king, piece_square)] = None
+                elif len(targets) != 0:
+                    moves_left[table_index(1, white_king, black_king, piece_square)] = len(targets)
+                # checkmate - stalemates are draws, left at 0
+                elif piece_attacks(piece, piece_square, black_king, white_king):
+                    buckets[0].append(table_index(1, white_king, black_king, piece_square))
+
+    # a pawn wins by promoting in a won KQK position
+    if piece == 'p':
+        for white_king in range(64):
+            for black_king in range(64):
+                for piece_square in range(8, 16):
+                    if not is_legal(piece, False, white_king, black_king, piece_square):
+                        continue
+                    promotion_square = piece_square - 8
+                    if promotion_square == white_king or promotion_square == black_king:
+                        continue
+                    result, plies = decode_result(queen_table[table_index(1, white_king, black_king,
+                                                                          promotion_square)])
+                    if result == LOSS:
+                        while len(buckets) <= plies + 1:
+                            buckets.append([])
+                        buckets[plies + 1].append(table_index(0, white_king, black_king, piece_square))
+
+    plies = 0
+    while plies < len(buckets):
+        for index in buckets[plies]:
+            if resolved[index]:
+                continue
+            resolved[index] = 1
+            black_to_move, rest = divmod(index, SIDE_TO_MOVE_SIZE)
+            white_king, rest = divmod(rest, 4096)
+            black_king, piece_square = divmod(rest, 64)
+            if len(buckets) <= plies + 1:
+                buckets.append([])
+            next_bucket = buckets[plies + 1]
+            if black_to_move:
+                # black loses here, so every white move leading here wins
+                table[index] = encode_result(LOSS, plies)
+                for square in king_moves[white_king]:
+                    if square != piece_square and square != black_king and square not in king_neighbours[black_king] \
+                            and is_legal(piece, False, square, black_king, piece_square):
+                        next_bucket.append(table_index(0, square, black_king, piece_square))
+                for square in piece_unmoves(piece, white_king, black_king, piece_square):
+                    if is_legal(piece, False, white_king, black_king, square):
+                        next_bucket.append(table_index(0, white_king, black_king, square))
+            else:
+                # white wins here, a black position loses once all its moves lead to won positions
+                table[index] = encode_result(WIN, plies)
+                for square in king_moves[black_king]:
+                    if square == white_king or square == piece_square or square in king_neighbours[white_king]:
+                        continue
+                    previous = table_index(1, white_king, square, piece_square)
+                    left = moves_left.get(previous)
+                    if left is None:
+                        continue
+                    if left == 1:
+                        del moves_left[previous]
+                        next_bucket.append(previous)
+                    else:
+                        moves_left[previous] = left - 1
+        buckets[plies] = None
+        plies += 1
+    return table
+
+
+"""
+build the tables and write them in the directory
+"""
+
+
+def build_tables(directory=DEFAULT_TABLEBASE_DIRECTORY, output=None):
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for name, piece in TABLE_PIECES.items():
+        tables[name] = build_table(piece, tables.get("KQK"))
+        with open(os.path.join(directory, name + TABLE_SUFFIX), "wb") as table_file:
+            table_file.write(tables[name])
+        if output is not None:
+            output.write("%s written\n" % name)
+
+
+"""
+the tables found in a directory, memory mapped
+a missing table is not probed, so the engine works the same without the files, only slower in those endgames
+"""
+
+
+class Tablebase:
+    def __init__(self, directory=DEFAULT_TABLEBASE_DIRECTORY):
+        self.directory = directory
+        self.files = []
+        # name of the table: mapped file
+        self.tables = {}
+        for name in TABLE_PIECES:
+            path = os.path.join(directory, name + TABLE_SUFFIX)
+            if os.path.exists(path) and os.path.getsize(path) == TABLE_SIZE:
+                table_file = open(path, "rb")
+                self.files.append(table_file)
+                self.tables[name] = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    """
+    result of the position for the side to move: (WIN, DRAW or LOSS, plies to checkmate)
+    None if no table has the position: more pieces, other pieces, a missing table or castling still possible
+    """
+
+    def probe(self, game_state):
+        if len(self.tables) == 0:
+            return None
+        if game_state.castling_rights != 0:
+            return None
+        kings = {}
+        extra_piece = None
+        for row in range(8):
+            for column in range(8):
+                square = game_state.board[row][column]
+                if square == "--":
+                    continue
+                if square[1] == 'K':
+                    kings[square[0]] = row * 8 + column
+                elif extra_piece is not None:
+                    return None
+                else:
+                    extra_piece = (square, row, column)
+        if extra_piece is None:
+            return DRAW, 0
+        piece, row, column = extra_piece
+        table = self.tables.get("K" + piece[1].upper() + "K")
+        if table is None:
+            return None
+        black_to_move = not game_state.white_to_move
+        if piece[0] == 'w':
+            index = table_index(black_to_move, kings['w'], kings['b'], row * 8 + column)
+        else:
+            # black is the stronger side: the board upside down with the colours swapped
+            index = table_index(not black_to_move, kings['b'] ^ 56, kings['w'] ^ 56, (row * 8 + column) ^ 56)
+        return decode_result(table[index])
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        for table_file in self.files:
+            table_file.close()
+        self.tables = {}
+        self.files = []
+
+
+# tables of the default directory, opened by the first searcher of the process which uses them
+default_tablebase = None
+
+"""
+the tablebase of the default directory, opened once per process and shared by its searchers (it is read only)
+"""
+
+
+def get_default_tablebase():
+    global default_tablebase
+    if default_tablebase is None:
+        default_tablebase = Tablebase()
+    return default_tablebase
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="build or probe the endgame tablebases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the KQK, KRK and KPK tables")
+    build_parser.add_argument("--directory", default=DEFAULT_TABLEBASE_DIRECTORY)
+    probe_parser = commands.add_parser("probe", help="result of a position")
+    probe_parser.add_argument("fen")
+    probe_parser.add_argument("--directory", default=DEFAULT_TABLEBASE_DIRECTORY)
+    options = parser.parse_args(arguments)
+
+    if options.command == "build":
+        build_tables(options.directory, sys.stdout)
+    else:
+        tablebase = Tablebase(options.directory)
+        result = tablebase.probe(engine.GameState.from_fen(options.fen))
+        if result is None:
+            print("not in the tables")
+        else:
+            print({WIN: "win", DRAW: "draw", LOSS: "loss"}[result[0]] + " in %d plies" % result[1])
+        tablebase.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+helpers shared by the test modules
+"""
+
+"""
+play moves given in chess notation (e2e4) from the valid moves of the position
+"""
+
+
+def play(game_state, *notations):
+    for notation in notations:
+        for move in game_state.get_valid_moves():
+            if move.get_chess_notation() == notation:
+                game_state.make_move(move)
+                break
+        else:
+            raise ValueError(notation + " is not a valid move")
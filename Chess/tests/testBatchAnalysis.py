@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+
+from Chess import batchAnalysis
+
+POSITIONS = """# positions of the test
+7k/8/6K1/8/8/8/8/5Q2 w - - bm Qf8#; id "mate in one";
+r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1
+
+8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - id "endgame";
+rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1
+4k3/8/8/3P4/8/8/8/4K3 w - e6 0 1
+"""
+
+analyse_position = batchAnalysis.analyse_position
+
+
+# analysis whose worker process dies on the first position, like a worker killed by the system
+def analyse_or_die(line_number, line, depth, time_limit):
+    if line_number == 2:
+        os._exit(1)
+    return analyse_position(line_number, line, depth, time_limit)
+
+
+# analysis with a bug of the engine in the second position
+def analyse_or_fail(line_number, line, depth, time_limit):
+    if line_number == 3:
+        raise KeyError("--")
+    return analyse_position(line_number, line, depth, time_limit)
+
+
+class TestBatchAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, "positions.epd")
+        self.output_path = os.path.join(self.directory.name, "results.jsonl")
+        with open(self.input_path, "w") as positions:
+            positions.write(POSITIONS)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # results of the output file, without the search times which change from run to run
+    def read_results(self):
+        with open(self.output_path) as output:
+            results = [json.loads(line) for line in output]
+        for result in results:
+            result.pop("seconds", None)
+        return results
+
+    # EPD operations are split from the position, a FEN keeps its counters
+    def test_parse_position(self):
+        fen, operations = batchAnalysis.parse_position('7k/8/6K1/8/8/8/8/5Q2 w - - bm Qf8#; id "mate in one";')
+        self.assertEqual(fen, "7k/8/6K1/8/8/8/8/5Q2 w - - 0 1")
+        self.assertEqual(operations, {"bm": "Qf8#", "id": "mate in one"})
+        fen, operations = batchAnalysis.parse_position("8/8/8/8/8/8/8/K6k b - - 12 40")
+        self.assertEqual(fen, "8/8/8/8/8/8/8/K6k b - - 12 40")
+        self.assertEqual(operations, {})
+
+    # every position gets a result line in the order of the file, invalid positions get an error
+    # the last position has no pawn which could be taken en passant
+    def test_analyse_file(self):
+        self.assertEqual(batchAnalysis.analyse_file(self.input_path, self.output_path, depth=2, workers=2), 5)
+        results = self.read_results()
+        self.assertEqual([result["line"] for result in results], [2, 3, 5, 6, 7])
+        self.assertEqual(results[0]["id"], "mate in one")
+        self.assertEqual(results[0]["best_move"], "f1f8")
+        self.assertEqual(results[0]["score"], 1000)
+        self.assertEqual(results[1]["depth"], 2)
+        self.assertGreater(results[1]["nodes"], 0)
+        self.assertEqual(results[2]["id"], "endgame")
+        self.assertIn("error", results[3])
+        self.assertIn("en passant", results[4]["error"])
+        self.assertNotIn("best_move", results[4])
+
+    # the position of a worker which died gets an error and the next positions are searched by a new pool, a bug of
+    # the engine stops the run
+    def test_failures(self):
+        batchAnalysis.analyse_position = analyse_or_die
+        try:
+            self.assertEqual(batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1), 5)
+            results = self.read_results()
+            self.assertEqual([result["line"] for result in results], [2, 3, 5, 6, 7])
+            self.assertTrue(results[0]["error"].startswith("worker failed"))
+            self.assertEqual(results[0]["id"], "mate in one")
+            self.assertIn("en passant", results[4]["error"])
+            batchAnalysis.analyse_position = analyse_or_fail
+            with self.assertRaises(KeyError):
+                batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1, resume=False)
+        finally:
+            batchAnalysis.analyse_position = analyse_position
+        self.assertNotIn("best_move", results[4])
+
+    # a stopped run is continued after its last complete result
+    def test_resume(self):
+        batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1)
+        results = self.read_results()
+        # the run stopped while writing the third result
+        with open(self.output_path, "w") as output:
+            output.write(json.dumps(results[0]) + "\n" + json.dumps(results[1]) + "\n" + '{"line": 5, "fe')
+        self.assertEqual(batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1), 3)
+        self.assertEqual(self.read_results(), results)
+        self.assertEqual(batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1), 0)
+        self.assertEqual(batchAnalysis.analyse_file(self.input_path, self.output_path, depth=1, workers=1,
+                                                    resume=False), 5)
+        self.assertEqual(len(self.read_results()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
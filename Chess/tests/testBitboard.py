@@ -0,0 +1,123 @@
+import random
+import unittest
+
+from Chess import engine
+
+
+class TestBitboard(unittest.TestCase):
+
+    # moves compared by squares and special move flags
+    @staticmethod
+    def move_set(moves):
+        return sorted((move.get_chess_notation(), move.is_castle_move, move.is_enpassant_move) for move in moves)
+
+    # build 2 game states with the same position, one for each move generator
+    @staticmethod
+    def game_states(new_board, white_to_move=True, enpassant_possible=(), can_castle=True):
+        game_states = []
+        for use_bitboards in [False, True]:
+            game_state = engine.GameState(use_bitboards=use_bitboards)
+            game_state.white_to_move = white_to_move
+            game_state.enpassant_possible = enpassant_possible
+            castle_rights = game_state.current_castling_rights
+            castle_rights.white_king_side = castle_rights.white_queen_side = can_castle
+            castle_rights.black_king_side = castle_rights.black_queen_side = can_castle
+            for row in range(8):
+                for column in range(8):
+                    if new_board[row][column] == 'wK':
+                        game_state.white_king_location = (row, column)
+                    elif new_board[row][column] == 'bK':
+                        game_state.black_king_location = (row, column)
+            game_state.set_board([list(row) for row in new_board])
+            game_states.append(game_state)
+        return game_states
+
+    # both generators give the same moves during random games, including after undo
+    def test_same_moves_random_games(self):
+        generator = random.Random(3)
+        for _ in range(10):
+            mailbox_state, bitboard_state = engine.GameState(), engine.GameState(use_bitboards=True)
+            for _ in range(100):
+                mailbox_moves = mailbox_state.get_valid_moves()
+                bitboard_moves = bitboard_state.get_valid_moves()
+                self.assertEqual(self.move_set(mailbox_moves), self.move_set(bitboard_moves))
+                self.assertEqual(mailbox_state.checkmate, bitboard_state.checkmate)
+                self.assertEqual(mailbox_state.stalemate, bitboard_state.stalemate)
+                if len(mailbox_moves) == 0:
+                    break
+                move = generator.choice(mailbox_moves)
+                mailbox_state.make_move(move)
+                bitboard_state.make_move(bitboard_moves[bitboard_moves.index(move)])
+                if generator.random() < 0.2:
+                    mailbox_state.undo_move()
+                    bitboard_state.undo_move()
+
+    # "kiwipete" position - pins, castling on both sides and many captures
+    def test_same_moves_tricky_position(self):
+        new_board = [
+            ["bR", "--", "--", "--", "bK", "--", "--", "bR"],
+            ["bp", "--", "bp", "bp", "bQ", "bp", "bB", "--"],
+            ["bB", "bN", "--", "--", "bp", "bN", "bp", "--"],
+            ["--", "--", "--", "wp", "wN", "--", "--", "--"],
+            ["--", "bp", "--", "--", "wp", "--", "--", "--"],
+            ["--", "--", "wN", "--", "--", "wQ", "--", "bp"],
+            ["wp", "wp", "wp", "wB", "wB", "wp", "wp", "wp"],
+            ["wR", "--", "--", "--", "wK", "--", "--", "wR"]
+        ]
+        mailbox_state, bitboard_state = self.game_states(new_board)
+        bitboard_moves = bitboard_state.get_valid_moves()
+        self.assertEqual(len(bitboard_moves), 48)
+        self.assertEqual(self.move_set(mailbox_state.get_valid_moves()), self.move_set(bitboard_moves))
+
+    # en passant is not possible when both pawns leave the rank of the king and a rook attacks it
+    def test_enpassant_discovered_check(self):
+        new_board = [
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "bp", "bp", "--", "--", "--", "--"],
+            ["--", "wp", "--", "--", "--", "--", "--", "bR"],
+            ["wK", "wR", "--", "--", "wp", "bp", "--", "bK"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "wp", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"]
+        ]
+        for game_state in self.game_states(new_board, white_to_move=False, enpassant_possible=(5, 4),
+                                           can_castle=False):
+            moves = [move.get_chess_notation() for move in game_state.get_valid_moves()]
+            self.assertNotIn("f4e3", moves)
+            self.assertIn("f4f3", moves)
+
+    # en passant can capture the pawn that gives check
+    def test_enpassant_captures_checking_pawn(self):
+        new_board = [
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "bK", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "wp", "bp", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "wK", "--", "--", "--"]
+        ]
+        for game_state in self.game_states(new_board, white_to_move=False, enpassant_possible=(5, 3),
+                                           can_castle=False):
+            moves = [move.get_chess_notation() for move in game_state.get_valid_moves()]
+            self.assertTrue(game_state.is_king_in_check)
+            self.assertIn("e4d3", moves)
+            self.assertIn("c5d4", moves)
+
+    # kings can never stand next to each other
+    def test_kings_not_adjacent(self):
+        new_board = [
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "bK", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "wK", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"]
+        ]
+        for game_state in self.game_states(new_board, can_castle=False):
+            moves = [move.get_chess_notation() for move in game_state.get_valid_moves()]
+            self.assertEqual(sorted(moves), ["d4c3", "d4c4", "d4d3", "d4e3", "d4e4"])
@@ -0,0 +1,48 @@
+import unittest
+
+from Chess import engine, zobrist
+from Chess.castleRights import ALL_CASTLING_RIGHTS, WHITE_KING_SIDE, WHITE_QUEEN_SIDE, BLACK_KING_SIDE, \
+    BLACK_QUEEN_SIDE, castling_masks
+from Chess.tests.helpers import play
+
+
+class TestCastleRights(unittest.TestCase):
+
+    # only the king and rook squares lose rights
+    def test_masks(self):
+        self.assertEqual(castling_masks[7 * 8 + 4], BLACK_KING_SIDE | BLACK_QUEEN_SIDE)
+        self.assertEqual(castling_masks[7 * 8 + 7], ALL_CASTLING_RIGHTS & ~WHITE_KING_SIDE)
+        self.assertEqual(castling_masks[0], ALL_CASTLING_RIGHTS & ~BLACK_QUEEN_SIDE)
+        self.assertEqual(sum(mask != ALL_CASTLING_RIGHTS for mask in castling_masks), 6)
+
+    # a rook move, a rook capture and a king move each lose their rights, undo gives them back
+    def test_make_and_undo(self):
+        game_state = engine.GameState.from_fen("r3k2r/8/8/8/8/8/6B1/R3K2R w KQkq - 0 1")
+        play(game_state, "g2a8")
+        self.assertEqual(game_state.castling_rights, WHITE_KING_SIDE | WHITE_QUEEN_SIDE | BLACK_KING_SIDE)
+        play(game_state, "h8h1")
+        self.assertEqual(game_state.castling_rights, WHITE_QUEEN_SIDE)
+        play(game_state, "e1d2")
+        self.assertEqual(game_state.castling_rights, 0)
+        self.assertEqual(game_state.to_fen().split()[2], '-')
+        self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+        for _ in range(3):
+            game_state.undo_move()
+        self.assertEqual(game_state.castling_rights, ALL_CASTLING_RIGHTS)
+        self.assertEqual(game_state.to_fen(), "r3k2r/8/8/8/8/8/6B1/R3K2R w KQkq - 0 1")
+
+    # the rights can still be read and written one at a time
+    def test_castle_rights_view(self):
+        game_state = engine.GameState()
+        castle_rights = game_state.current_castling_rights
+        castle_rights.white_queen_side = False
+        castle_rights.black_king_side = False
+        self.assertEqual(game_state.castling_rights, WHITE_KING_SIDE | BLACK_QUEEN_SIDE)
+        self.assertTrue(castle_rights.white_king_side)
+        self.assertFalse(castle_rights.black_king_side)
+        castle_rights.black_king_side = True
+        self.assertEqual(game_state.castling_rights, WHITE_KING_SIDE | BLACK_KING_SIDE | BLACK_QUEEN_SIDE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from Chess import aiMoveFinder, engine
+from Chess.tests.helpers import play
+
+
+class TestDraw(unittest.TestCase):
+
+    # the clock counts the moves since the last capture or pawn move and undo gives back the previous count
+    def test_halfmove_clock(self):
+        game_state = engine.GameState()
+        play(game_state, "g1f3", "g8f6", "f3g1")
+        self.assertEqual(game_state.halfmove_clock, 3)
+        play(game_state, "e7e5")
+        self.assertEqual(game_state.halfmove_clock, 0)
+        game_state.undo_move()
+        self.assertEqual(game_state.halfmove_clock, 3)
+        self.assertTrue(game_state.to_fen().startswith("rnbqkb1r/pppppppp/5n2/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 3 "))
+        game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/8/R3K3 w Q - 37 60")
+        self.assertEqual(game_state.halfmove_clock, 37)
+        self.assertEqual(game_state.to_fen(), "4k3/8/8/8/8/8/8/R3K3 w Q - 37 60")
+
+    # the third time the same position comes back the game is drawn
+    def test_threefold_repetition(self):
+        game_state = engine.GameState()
+        play(game_state, "g1f3", "g8f6", "f3g1", "f6g8")
+        self.assertEqual(game_state.repetition_count(), 1)
+        self.assertFalse(game_state.is_draw())
+        play(game_state, "g1f3", "g8f6", "f3g1", "f6g8")
+        self.assertEqual(game_state.repetition_count(), 2)
+        game_state.get_valid_moves()
+        game_state.update_draw()
+        self.assertTrue(game_state.draw)
+        game_state.undo_move()
+        self.assertFalse(game_state.draw)
+        # positions before a pawn move never come back
+        game_state = engine.GameState()
+        play(game_state, "g1f3", "g8f6", "f3g1", "f6g8", "e2e4", "g8f6", "g1f3", "f6g8", "f3g1")
+        self.assertEqual(game_state.repetition_count(), 0)
+
+    # the fifty-move rule and the positions where nobody can checkmate anymore
+    def test_draw_rules(self):
+        self.assertTrue(engine.GameState.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 100 80").is_draw())
+        self.assertFalse(engine.GameState.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 99 80").is_draw())
+        for fen, insufficient in [("4k3/8/8/8/8/8/8/4K3 w - - 0 1", True),
+                                  ("4k3/8/8/8/8/8/8/2B1K3 w - - 0 1", True),
+                                  ("4k3/8/8/8/8/8/8/1N2K3 w - - 0 1", True),
+                                  ("2b1k3/8/8/8/8/8/8/4KB2 w - - 0 1", True),
+                                  ("1b2k3/8/8/8/8/8/8/4KB2 w - - 0 1", False),
+                                  ("4k3/8/8/8/8/8/8/1NB1K3 w - - 0 1", False),
+                                  ("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1", False)]:
+            self.assertEqual(engine.GameState.from_fen(fen).has_insufficient_material(), insufficient, fen)
+
+    # the search scores a repeated position as a draw, even a side a queen up does not get more
+    def test_search_repetition(self):
+        game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+        play(game_state, "e1f1", "e8f8", "f1e1", "f8e8")
+        searcher = aiMoveFinder.Searcher()
+        searcher.start_search(game_state)
+        # the repeated position is searched as if a move was made before it
+        searcher.root_ply -= 1
+        self.assertEqual(searcher.alpha_beta(game_state, None, 3, -aiMoveFinder.CHECKMATE, aiMoveFinder.CHECKMATE, 1),
+                         aiMoveFinder.DRAW)
+        self.assertEqual(searcher.nodes_searched, 1)
+        # a capture leaving bare kings is a draw too
+        game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/3q4/4K3 w - - 0 1")
+        searcher = aiMoveFinder.Searcher()
+        self.assertEqual(aiMoveFinder.find_move_negamax_alpha_beta(game_state, game_state.get_valid_moves(), 3,
+                                                                   -aiMoveFinder.CHECKMATE, aiMoveFinder.CHECKMATE, 1,
+                                                                   searcher), aiMoveFinder.DRAW)
+        self.assertEqual(searcher.best_move.get_chess_notation(), "e1d2")
+
+
+if __name__ == "__main__":
+    unittest.main()
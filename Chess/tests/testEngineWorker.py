@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from Chess import engine, engineWorker, perft
+
+
+class TestEngineWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = engineWorker.EngineWorker(transposition_table_size_mb=1)
+
+    def tearDown(self):
+        self.worker.close()
+        self.assertFalse(self.worker.process.is_alive())
+
+    # the worker follows the game from the moves made and undone, and finds a checkmate in one from a FEN
+    def test_search(self):
+        game_state = engine.GameState(use_bitboards=True)
+        for _ in range(3):
+            self.worker.start_search(game_state, time_limit=0.2)
+            move = self.worker.get_best_move(game_state.get_valid_moves())
+            self.assertIn(move, game_state.get_valid_moves())
+            game_state.make_move(move)
+        # after an undo only the undone move is sent again
+        game_state.undo_move()
+        self.worker.start_search(game_state, time_limit=0.2)
+        self.assertEqual(self.worker.moves_sent, [move.move_id for move in game_state.move_log])
+        self.assertIn(self.worker.get_best_move(game_state.get_valid_moves()), game_state.get_valid_moves())
+
+        fen = "7k/8/6K1/8/8/8/8/5Q2 w - - 0 1"
+        self.worker.new_game(fen)
+        game_state = engine.GameState.from_fen(fen, use_bitboards=True)
+        self.worker.start_search(game_state, time_limit=1.0)
+        move = self.worker.get_best_move(game_state.get_valid_moves())
+        game_state.make_move(move)
+        game_state.get_valid_moves()
+        self.assertTrue(game_state.checkmate)
+
+    # a stopped search does not keep the worker busy and its move is never given
+    def test_stop(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards=True)
+        self.worker.new_game(perft.REFERENCE_POSITIONS[1][1])
+        self.worker.start_search(game_state, time_limit=30.0)
+        self.assertFalse(self.worker.is_search_done())
+        self.worker.stop()
+        self.assertTrue(self.worker.is_search_done())
+        start_time = time.perf_counter()
+        self.worker.start_search(game_state, time_limit=0.2)
+        move = self.worker.get_best_move(game_state.get_valid_moves())
+        self.assertLess(time.perf_counter() - start_time, 5.0)
+        self.assertIn(move, game_state.get_valid_moves())
+
+
+if __name__ == "__main__":
+    unittest.main()
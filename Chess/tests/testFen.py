@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from Chess import engine, perft, zobrist
+
+
+class TestFen(unittest.TestCase):
+
+    # the FEN written for a loaded position is the one it was loaded from
+    def test_round_trip(self):
+        for name, fen, counts in perft.REFERENCE_POSITIONS:
+            fields = fen.split()
+            self.assertEqual(engine.GameState.from_fen(fen).to_fen(), " ".join(fields[:4] + ['0', fields[5]]), name)
+
+    # everything derived from the position is set, not only the board
+    def test_derived_state(self):
+        game_state = engine.GameState.from_fen("r3k3/8/8/3pP3/8/8/8/R3K2R w Kq d6 0 12", use_bitboards=True)
+        self.assertEqual(game_state.white_king_location, (7, 4))
+        self.assertEqual(game_state.black_king_location, (0, 4))
+        self.assertEqual(game_state.enpassant_possible, (2, 3))
+        castle_rights = game_state.current_castling_rights
+        self.assertEqual((castle_rights.white_king_side, castle_rights.white_queen_side, castle_rights.black_king_side,
+                          castle_rights.black_queen_side), (True, False, False, True))
+        self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+        self.assertEqual(game_state.zobrist_key_log, [game_state.zobrist_key])
+        moves = sorted(move.get_chess_notation() for move in game_state.get_valid_moves())
+        self.assertIn("e5d6", moves)
+        self.assertIn("e1g1", moves)
+        self.assertNotIn("e1c1", moves)
+
+    # a position reached by playing moves and the same position loaded from its FEN are the same
+    def test_played_positions(self):
+        generator = random.Random(3)
+        game_state = engine.GameState(use_bitboards=True)
+        for _ in range(80):
+            valid_moves = game_state.get_valid_moves()
+            if len(valid_moves) == 0:
+                break
+            game_state.make_move(generator.choice(valid_moves))
+            loaded_state = engine.GameState.from_fen(game_state.to_fen(), use_bitboards=True)
+            self.assertEqual(loaded_state.to_fen(), game_state.to_fen())
+            self.assertEqual(loaded_state.zobrist_key, game_state.zobrist_key)
+            self.assertEqual((loaded_state.material_score, loaded_state.position_score),
+                             (game_state.material_score, game_state.position_score))
+            self.assertEqual(sorted(move.move_id for move in loaded_state.get_valid_moves()),
+                             sorted(move.move_id for move in game_state.get_valid_moves()))
+        self.assertTrue(game_state.to_fen().endswith(" " + str(1 + len(game_state.move_log) // 2)))
+
+    # FEN strings which do not describe a position are refused
+    def test_invalid_fen(self):
+        for fen in ["", "8/8/8/8/8/8/8/8 w - - 0 1", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+                    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQxq - 0 1",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1",
+                    # 2 white kings, and a black king which white could take
+                    "4k3/8/8/8/8/8/8/3KK3 w - - 0 1", "4k3/8/8/8/8/8/4R3/4K3 w - - 0 1",
+                    # en passant squares of the wrong side to move, and with no pawn which has just moved 2 squares
+                    "4k3/8/8/8/8/8/3PP3/4K3 w - e3 0 1", "4k3/8/8/8/3p4/8/8/4K3 b - e3 0 1",
+                    "4k3/8/4p3/8/8/8/8/4K3 w - e6 0 1", "4k3/4p3/8/4p3/8/8/8/4K3 w - e6 0 1"]:
+            with self.assertRaises(ValueError, msg=fen):
+                engine.GameState.from_fen(fen)
+
+    # castling rights are only kept for a king and rook on their starting squares
+    def test_castling_without_pieces(self):
+        for use_bitboards in (False, True):
+            game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/8/4K3 w K - 0 1", use_bitboards=use_bitboards)
+            self.assertEqual(game_state.castling_rights, 0)
+            self.assertNotIn("e1g1", [move.get_chess_notation() for move in game_state.get_valid_moves()])
+            self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+        game_state = engine.GameState.from_fen("r3k2r/8/8/8/8/8/8/4K2R w KQkq - 0 1")
+        self.assertEqual(game_state.to_fen(), "r3k2r/8/8/8/8/8/8/4K2R w Kkq - 0 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
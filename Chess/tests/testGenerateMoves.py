@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from Chess import aiMoveFinder, engine, perft
+
+
+class TestGenerateMoves(unittest.TestCase):
+
+    # moves compared by their move ids
+    @staticmethod
+    def move_ids(moves):
+        return sorted(move.move_id for move in moves)
+
+    # the stages give every valid move exactly once, for both move generators
+    def test_same_moves_as_valid_moves(self):
+        for use_bitboards in [False, True]:
+            generator = random.Random(5)
+            game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards)
+            for _ in range(40):
+                valid_moves = game_state.get_valid_moves()
+                self.assertEqual(self.move_ids(game_state.generate_moves()), self.move_ids(valid_moves))
+                if len(valid_moves) == 0:
+                    break
+                game_state.make_move(generator.choice(valid_moves))
+
+    # captures and promotions come before the quiet moves and castling comes last
+    def test_stage_order(self):
+        for use_bitboards in [False, True]:
+            game_state = engine.GameState.from_fen("r3k3/1P6/8/8/8/3p4/8/R3K2R w KQq - 0 1", use_bitboards)
+            moves = list(game_state.generate_moves())
+            is_capture_stage = [move.is_capture or move.is_pawn_promotion or move.is_enpassant_move
+                                for move in moves]
+            self.assertEqual(is_capture_stage, sorted(is_capture_stage, reverse=True))
+            self.assertEqual(is_capture_stage.count(True), 3)
+            self.assertTrue(moves[-1].is_castle_move)
+
+    # the hash move is given first and not repeated, a hash move that is not valid is ignored
+    def test_hash_move(self):
+        for use_bitboards in [False, True]:
+            game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards)
+            valid_moves = game_state.get_valid_moves()
+            for hash_move in valid_moves:
+                moves = list(game_state.generate_moves(hash_move.move_id))
+                self.assertEqual(moves[0], hash_move)
+                self.assertEqual(moves[0].is_castle_move, hash_move.is_castle_move)
+                self.assertEqual(self.move_ids(moves), self.move_ids(valid_moves))
+            # a1 to h8 is not a move of this position
+            moves = list(game_state.generate_moves((7 * 8) << 6 | 7))
+            self.assertEqual(self.move_ids(moves), self.move_ids(valid_moves))
+
+    # only check evasions are generated when the king is in check
+    def test_check_evasions(self):
+        for use_bitboards in [False, True]:
+            game_state = engine.GameState.from_fen("4k3/8/8/8/1b6/8/2P5/4K1N1 w - - 0 1", use_bitboards)
+            moves = [move.get_chess_notation() for move in game_state.generate_moves()]
+            self.assertTrue(game_state.is_king_in_check)
+            self.assertEqual(sorted(moves), ["c2c3", "e1d1", "e1e2", "e1f1", "e1f2"])
+
+    # the game is over when the side to move has no valid moves
+    def test_update_game_over(self):
+        for use_bitboards in [False, True]:
+            game_state = engine.GameState.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", use_bitboards)
+            game_state.update_game_over()
+            self.assertTrue(game_state.stalemate)
+            self.assertFalse(game_state.checkmate)
+            game_state = engine.GameState.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", use_bitboards)
+            game_state.update_game_over()
+            self.assertTrue(game_state.checkmate)
+            self.assertFalse(game_state.stalemate)
+
+    # a position without valid moves is scored as a draw by the search unless the king is in check
+    def test_search_stalemate_score(self):
+        game_state = engine.GameState.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        aiMoveFinder.transposition_table.clear()
+        score = aiMoveFinder.find_move_negamax_alpha_beta(game_state, None, 2, -aiMoveFinder.CHECKMATE,
+                                                          aiMoveFinder.CHECKMATE, -1)
+        self.assertEqual(score, aiMoveFinder.STALEMATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
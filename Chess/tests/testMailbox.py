@@ -0,0 +1,39 @@
+import unittest
+
+from Chess import engine
+from Chess.mailbox import PAWN, QUEEN, KING, TYPE_MASK, WHITE, BLACK, COLOUR_MASK, OFF_BOARD, piece_codes, \
+    piece_names, coordinates, board_squares, square_of, squares_from_board
+from Chess.tests.helpers import play
+
+
+class TestMailbox(unittest.TestCase):
+
+    def test_codes(self):
+        self.assertEqual(piece_codes["bQ"] & COLOUR_MASK, BLACK)
+        self.assertEqual(piece_codes["bQ"] & TYPE_MASK, QUEEN)
+        self.assertEqual(piece_codes["wp"], WHITE | PAWN)
+        self.assertEqual(piece_names[WHITE | KING], "wK")
+        self.assertEqual(len(board_squares), 64)
+        # a step off any edge of the board is found by the same test
+        self.assertTrue((square_of(0, 7) + 1) & OFF_BOARD)
+        self.assertTrue((square_of(0, 0) - 1) & OFF_BOARD)
+        self.assertTrue((square_of(0, 3) - 16) & OFF_BOARD)
+        self.assertTrue((square_of(7, 3) + 16) & OFF_BOARD)
+        self.assertEqual(coordinates[square_of(6, 2)], (6, 2))
+        self.assertIsNone(coordinates[8])
+
+    # castling, en passant and promotion move 2 pieces or change one, the 0x88 board follows the board of strings
+    def test_follows_board(self):
+        game_state = engine.GameState.from_fen("r3k3/7P/8/8/3pP3/8/8/R3K2R b KQq e3 0 1")
+        for notation in ("d4e3", "e1g1", "e8c8", "h7h8"):
+            play(game_state, notation)
+            self.assertEqual(game_state.squares, squares_from_board(game_state.board))
+        self.assertEqual(game_state.squares[square_of(0, 7)], WHITE | QUEEN)
+        for _ in range(4):
+            game_state.undo_move()
+            self.assertEqual(game_state.squares, squares_from_board(game_state.board))
+        self.assertEqual(game_state.to_fen(), "r3k3/7P/8/8/3pP3/8/8/R3K2R b KQq e3 0 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import pickle
+import unittest
+
+from Chess import engine
+from Chess.move import Move
+
+
+class TestMove(unittest.TestCase):
+
+    # moves with the same start and end squares are equal and have the same hash
+    def test_equality_and_hash(self):
+        game_state = engine.GameState()
+        first_move = Move((6, 4), (4, 4), game_state.board)
+        second_move = Move((6, 4), (4, 4), game_state.board)
+        other_move = Move((6, 3), (4, 3), game_state.board)
+        self.assertEqual(first_move, second_move)
+        self.assertNotEqual(first_move, other_move)
+        self.assertEqual(hash(first_move), hash(second_move))
+        self.assertEqual(len({first_move, second_move, other_move}), 2)
+        valid_moves = set(game_state.get_valid_moves())
+        self.assertIn(first_move, valid_moves)
+        self.assertEqual(len(valid_moves), 20)
+
+    # pieces are read from the board the first time they are needed and kept after that
+    def test_lazy_pieces(self):
+        game_state = engine.GameState()
+        move = Move((6, 4), (4, 4), game_state.board)
+        game_state.make_move(move)
+        self.assertEqual(move.piece_moved, 'wp')
+        self.assertEqual(move.piece_captured, '--')
+        self.assertFalse(move.is_capture)
+        game_state.undo_move()
+        self.assertEqual(game_state.board[6][4], 'wp')
+        self.assertEqual(game_state.board[4][4], '--')
+
+    # the packed move keeps the squares and the special move flags in 16 bits
+    def test_packed_move(self):
+        board = [
+            ["--", "--", "--", "--", "bK", "--", "--", "--"],
+            ["--", "wp", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["wR", "--", "--", "--", "wK", "--", "--", "--"]
+        ]
+        promotion = Move((1, 1), (0, 1), board)
+        castle = Move((7, 4), (7, 2), board, is_castle_move=True)
+        self.assertTrue(promotion.is_pawn_promotion)
+        self.assertEqual(promotion.get_packed(), (1 << 14) | (9 << 6) | 1)
+        self.assertEqual(castle.get_packed(), (1 << 13) | (60 << 6) | 58)
+        self.assertLess(castle.get_packed(), 1 << 16)
+
+    # moves sent to other processes keep their pieces but not the board
+    def test_pickle(self):
+        game_state = engine.GameState()
+        move = game_state.get_valid_moves()[0]
+        copied_move = pickle.loads(pickle.dumps(move))
+        self.assertEqual(copied_move, move)
+        self.assertEqual(copied_move.piece_moved, move.piece_moved)
+        self.assertEqual(copied_move.piece_captured, move.piece_captured)
+        self.assertEqual(str(copied_move), str(move))
+        self.assertIsNone(copied_move.board)
@@ -0,0 +1,94 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Chess import engine, openingBook
+from Chess.tests.helpers import play
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "book.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # the entries are sorted by key and the weight of a move is the number of games playing it
+    def test_build_and_probe(self):
+        games = [["e2e4", "e7e5", "g1f3"], ["e2e4", "c7c5"], ["d2d4", "d7d5"], ["e2e4", "e7e5", "f1c4"]]
+        self.assertEqual(openingBook.build_book(games, self.path), 7)
+        self.assertEqual(os.path.getsize(self.path), 7 * openingBook.BOOK_ENTRY.size)
+        book = openingBook.OpeningBook(self.path)
+        game_state = engine.GameState()
+        self.assertEqual(sorted((move.get_chess_notation(), weight) for move, weight in book.get_moves(game_state)),
+                         [("d2d4", 1), ("e2e4", 3)])
+        play(game_state, "e2e4")
+        self.assertEqual(sorted(move.get_chess_notation() for move, weight in book.get_moves(game_state)),
+                         ["c7c5", "e7e5"])
+        # a position reached by another move order is the same position for the book
+        game_state = engine.GameState.from_fen("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2")
+        self.assertEqual(sorted(move.get_chess_notation() for move, weight in book.get_moves(game_state)),
+                         ["f1c4", "g1f3"])
+        self.assertIsNone(book.pick_move(engine.GameState.from_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1")))
+        book.close()
+
+    # a move is picked as often as its weight says
+    def test_weighted_pick(self):
+        openingBook.build_book([["e2e4"]] * 3 + [["d2d4"]], self.path)
+        book = openingBook.OpeningBook(self.path)
+        generator = random.Random(1)
+        picks = [book.pick_move(engine.GameState(), generator=generator).get_chess_notation() for _ in range(400)]
+        self.assertAlmostEqual(picks.count("e2e4") / len(picks), 0.75, delta=0.07)
+        book.close()
+
+    # keys of the Polyglot book format specification, the last ones with en passant files and lost castling rights
+    def test_polyglot_keys(self):
+        game_state = engine.GameState()
+        self.assertEqual(openingBook.polyglot_key(game_state), 0x463B96181691FC9C)
+        for notation, key in [("e2e4", 0x823C9B50FD114196), ("d7d5", 0x0756B94461C50FB0),
+                              ("e4e5", 0x662FAFB965DB29D4), ("f7f5", 0x22A48B5A8E47FF78),
+                              ("e1e2", 0x652A607CA3F242C1), ("e8f7", 0x00FDD303C946BDD9)]:
+            play(game_state, notation)
+            self.assertEqual(openingBook.polyglot_key(game_state), key, notation)
+        # the en passant square after b5b4 and c2c4 counts, no pawn can take on h3 after h2h4
+        game_state = engine.GameState.from_fen("rnbqkbnr/p1pppppp/8/8/PpP4P/8/1P1PPPP1/RNBQKBNR b KQkq c3 0 3")
+        self.assertEqual(openingBook.polyglot_key(game_state), 0x3C8123EA7B067637)
+        game_state = engine.GameState.from_fen("rnbqkbnr/p1pppppp/8/8/P6P/R1p5/1P1PPPP1/1NBQKBNR b Kkq - 0 4")
+        self.assertEqual(openingBook.polyglot_key(game_state), 0x5C3F9B829B279560)
+
+    # a book castling move, the king taking its rook, is played as the castle move
+    def test_castle_entry(self):
+        game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1")
+        with open(self.path, "wb") as book_file:
+            book_file.write(openingBook.BOOK_ENTRY.pack(openingBook.polyglot_key(game_state), 4 << 6 | 7, 1, 0))
+        book = openingBook.OpeningBook(self.path)
+        move = book.pick_move(game_state)
+        self.assertEqual(move.get_chess_notation(), "e1g1")
+        self.assertTrue(move.is_castle_move)
+        book.close()
+
+    # castling is written as the king taking its rook, like the Polyglot books do
+    def test_castle_move_code(self):
+        game_state = engine.GameState.from_fen("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1")
+        codes = {move.get_chess_notation(): openingBook.encode_book_move(move)
+                 for move in game_state.get_valid_moves()}
+        # from e1 (file 4, rank 0) to h1 and a1
+        self.assertEqual(codes["e1g1"], 4 << 6 | 7)
+        self.assertEqual(codes["e1c1"], 4 << 6 | 0)
+        self.assertEqual(codes["a1a8"], 7 << 3)
+
+    # the book shipped with the engine knows the first moves and is not empty after building it again
+    def test_default_book(self):
+        book = openingBook.OpeningBook()
+        self.assertIn("e2e4", [move.get_chess_notation() for move, weight in book.get_moves(engine.GameState())])
+        book.close()
+        games_path = os.path.join(os.path.dirname(openingBook.DEFAULT_BOOK_PATH), "openings.txt")
+        self.assertEqual(openingBook.build_book(openingBook.read_games(games_path), self.path),
+                         os.path.getsize(openingBook.DEFAULT_BOOK_PATH) // openingBook.BOOK_ENTRY.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import multiprocessing
+import random
+import time
+import unittest
+
+from Chess import aiMoveFinder, benchmark, engine, parallelSearch
+from Chess.transpositionTable import SharedTranspositionTable, EXACT, LOWER_BOUND
+
+
+# probe a shared table from another process
+def probe_in_process(table_name, size_mb, key, result_queue):
+    table = SharedTranspositionTable(size_mb, table_name)
+    result_queue.put((table.probe(key), table.age))
+    table.store(key + 1, 4, -2.5, LOWER_BOUND, None)
+    table.close()
+
+
+class TestParallelSearch(unittest.TestCase):
+
+    # entries stored by one process are found by the others
+    def test_shared_table(self):
+        table = SharedTranspositionTable(1)
+        try:
+            table.new_search()
+            move = engine.GameState().get_valid_moves()[0]
+            table.store(1234, 3, 1.5, EXACT, move)
+            result_queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=probe_in_process, args=(table.name, 1, 1234, result_queue))
+            process.start()
+            entry, age = result_queue.get(timeout=10)
+            process.join()
+            self.assertEqual(entry, (3, 1.5, EXACT, move.move_id))
+            self.assertEqual(age, 1)
+            self.assertEqual(table.probe(1235), (4, -2.5, LOWER_BOUND, None))
+            table.clear()
+            self.assertIsNone(table.probe(1234))
+        finally:
+            table.close()
+
+    # an entry with the key of one write and the information or score of another does not match any position
+    def test_torn_entry(self):
+        table = SharedTranspositionTable(1)
+        try:
+            table.store(1234, 3, 1.5, EXACT, None)
+            slot = (1234 % table.number_of_buckets) * 2
+            information = table.information[slot]
+            table.store(1234, 5, 0.5, LOWER_BOUND, None)
+            table.information[slot] = information
+            self.assertIsNone(table.probe(1234))
+            # the same with the score of another write
+            table.store(1234, 5, 0.5, LOWER_BOUND, None)
+            table.scores[slot] = 1.5
+            self.assertIsNone(table.probe(1234))
+        finally:
+            table.close()
+
+    # the main search and its helpers find the checkmate in one
+    def test_parallel_search(self):
+        game_state = engine.GameState.from_fen("7k/8/6K1/8/8/8/8/5Q2 w - - 0 1", use_bitboards=True)
+        valid_moves = game_state.get_valid_moves()
+        result_queue = multiprocessing.Queue()
+        best_move = parallelSearch.find_best_move(game_state, valid_moves, result_queue, time_limit=None,
+                                                  max_depth=4, workers=3)
+        self.assertIn(best_move, valid_moves)
+        self.assertEqual(result_queue.get(timeout=10), best_move)
+        game_state.make_move(best_move)
+        game_state.get_valid_moves()
+        self.assertTrue(game_state.checkmate)
+
+    # the same helper processes search every move of a game
+    def test_helpers_kept(self):
+        table = SharedTranspositionTable(1)
+        helpers = parallelSearch.SearchHelpers(table, 3)
+        try:
+            game_state = engine.GameState(use_bitboards=True)
+            for _ in range(3):
+                valid_moves = game_state.get_valid_moves()
+                best_move = parallelSearch.find_best_move(game_state, valid_moves, time_limit=None, max_depth=2,
+                                                          transposition_table=table, helpers=helpers)
+                self.assertIn(best_move, valid_moves)
+                game_state.make_move(best_move)
+            self.assertFalse(helpers.broken)
+            self.assertTrue(all(process.is_alive() for process in helpers.processes))
+        finally:
+            helpers.close()
+            table.close()
+        self.assertFalse(any(process.is_alive() for process in helpers.processes))
+
+    # the root split finds the move the single process search finds with the same seed, whatever the order in which
+    # the processes finish
+    def test_root_split_same_move(self):
+        for name, fen in benchmark.BENCHMARK_POSITIONS[1:4]:
+            game_state = engine.GameState.from_fen(fen, use_bitboards=True)
+            valid_moves = game_state.get_valid_moves()
+            best_move = aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=3, workers=2, seed=3)
+            root_moves = list(valid_moves)
+            random.Random(3).shuffle(root_moves)
+            searcher = aiMoveFinder.Searcher(**aiMoveFinder.ROOT_SPLIT_SEARCHER_OPTIONS)
+            aiMoveFinder.find_move_negamax_alpha_beta(game_state, root_moves, 3, -aiMoveFinder.CHECKMATE,
+                                                      aiMoveFinder.CHECKMATE, 1 if game_state.white_to_move else -1,
+                                                      searcher)
+            self.assertEqual(best_move, searcher.best_move, name)
+            self.assertEqual(len(game_state.move_log), 0)
+
+    # one pool searches every move of a game, a search cut off by its time limit still gives a move
+    def test_root_split_pool(self):
+        pool = aiMoveFinder.RootSplitPool(workers=2)
+        try:
+            game_state = engine.GameState.from_fen(benchmark.BENCHMARK_POSITIONS[1][1], use_bitboards=True)
+            valid_moves = game_state.get_valid_moves()
+            best_move = aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=2, pool=pool)
+            self.assertEqual(best_move, aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=2,
+                                                                               workers=2))
+            game_state.make_move(best_move)
+            valid_moves = game_state.get_valid_moves()
+            self.assertIn(aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=2, pool=pool),
+                          valid_moves)
+            # a depth 8 search would take minutes, the time limit ends it
+            start = time.time()
+            self.assertIn(aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=8, time_limit=0.5,
+                                                                 pool=pool), valid_moves)
+            self.assertLess(time.time() - start, 5)
+            # no time at all: no move is searched and the first move in the search order is played
+            self.assertIn(aiMoveFinder.find_best_move_root_split(game_state, valid_moves, depth=8, time_limit=0,
+                                                                 pool=pool), valid_moves)
+            self.assertTrue(all(score is None for move_index, score in
+                                pool.search_root_moves(game_state, valid_moves, 8, deadline=0.001)))
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
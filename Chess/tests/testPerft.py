@@ -0,0 +1,34 @@
+import unittest
+
+from Chess import engine, perft
+
+
+class TestPerft(unittest.TestCase):
+
+    # known leaf counts of the reference positions, board walking move generator
+    def test_reference_positions(self):
+        for name, depth, expected_nodes, nodes, seconds in perft.run_suite(use_bitboards=False, max_nodes=100000):
+            self.assertEqual(nodes, expected_nodes, name + " depth " + str(depth))
+
+    # known leaf counts of the reference positions, bitboard move generator
+    def test_reference_positions_bitboards(self):
+        for name, depth, expected_nodes, nodes, seconds in perft.run_suite(use_bitboards=True, max_nodes=100000):
+            self.assertEqual(nodes, expected_nodes, name + " depth " + str(depth))
+
+    # divide gives the leaves of every root move, they add up to the perft count
+    def test_divide(self):
+        game_state = engine.GameState.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+        results = dict((move.get_chess_notation(), nodes) for move, nodes in perft.divide(game_state, 2))
+        self.assertEqual(len(results), 14)
+        self.assertEqual(results["g2g4"], 17)
+        self.assertEqual(sum(results.values()), 191)
+
+    # the game state is the same after perft, every move was undone
+    def test_position_restored(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1])
+        board = [list(row) for row in game_state.board]
+        key = game_state.zobrist_key
+        perft.perft(game_state, 2)
+        self.assertEqual(game_state.board, board)
+        self.assertEqual(game_state.zobrist_key, key)
+        self.assertEqual(len(game_state.move_log), 0)
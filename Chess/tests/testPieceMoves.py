@@ -136,3 +136,23 @@ class TestPiecesMoves(unittest.TestCase):
         game_state.get_pawn_moves(6, 5, moves)
         for move in moves:
             self.assertTrue(expected_moves.__contains__(str(move)))
+
+    # king in check from a rook cannot step back along the rook ray, nor next to the other king
+    def test_king_moves_in_check(self):
+        game_state = engine.GameState()
+        game_state.white_to_move = True
+        new_board = [
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "bK", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["bR", "--", "--", "wK", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"]
+        ]
+        game_state.set_board(new_board)
+        moves = []
+        expected_moves = ["Kc2", "Kc4", "Kd2", "Ke2"]
+        game_state.get_king_moves(5, 3, moves)
+        self.assertEqual(sorted(str(move) for move in moves), expected_moves)
@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from Chess import aiMoveFinder, engine, perft, pieceScores
+
+
+class TestPieceScores(unittest.TestCase):
+
+    # score of the position computed the slow way, looking at every square of the board
+    @staticmethod
+    def scan_score(game_state):
+        score = 0
+        for row in range(8):
+            for column in range(8):
+                square = game_state.board[row][column]
+                if square != "--" and square[1] != 'K':
+                    position_scores = pieceScores.piece_position_scores[square if square[1] == 'p' else square[1]]
+                    piece_value = pieceScores.piece_score[square[1]] + position_scores[row][column] * .1
+                    score += piece_value if square[0] == 'w' else -piece_value
+        return score
+
+    # the starting position is symmetric
+    def test_initial_position(self):
+        game_state = engine.GameState()
+        self.assertEqual((game_state.material_score, game_state.position_score), (0, 0))
+        self.assertEqual(aiMoveFinder.score_board(game_state), 0)
+
+    # the totals kept by make_move and undo_move are the same as the ones computed from the board
+    def test_incremental_scores_random_games(self):
+        generator = random.Random(1)
+        special_moves = set()
+        for game in range(20):
+            game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[game % 3][1], use_bitboards=True)
+            for _ in range(150):
+                valid_moves = game_state.get_valid_moves()
+                if len(valid_moves) == 0:
+                    break
+                move = generator.choice(valid_moves)
+                special_moves.add((move.is_castle_move, move.is_enpassant_move, move.is_pawn_promotion))
+                game_state.make_move(move)
+                if generator.random() < 0.1:
+                    game_state.undo_move()
+                self.assertEqual((game_state.material_score, game_state.position_score),
+                                 pieceScores.compute_scores(game_state.board))
+                self.assertAlmostEqual(aiMoveFinder.score_board(game_state), self.scan_score(game_state))
+        # castling, en passant and promotion were all played
+        self.assertEqual(len(special_moves), 4)
+
+    # a promotion to a queen gains the material difference and undo gives it back
+    def test_promotion(self):
+        game_state = engine.GameState.from_fen("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        scores = (game_state.material_score, game_state.position_score)
+        self.assertEqual(game_state.material_score, 1)
+        game_state.make_move(engine.Move((1, 1), (0, 1), game_state.board))
+        self.assertEqual(game_state.material_score, 9)
+        self.assertEqual(game_state.position_score, pieceScores.queen_scores[0][1])
+        game_state.undo_move()
+        self.assertEqual((game_state.material_score, game_state.position_score), scores)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -102,3 +102,41 @@ class TestPinsChecks(unittest.TestCase):
         self.assertEqual(checking_piece_row, 4)
         self.assertEqual(checking_piece_column, 1)
         self.assertEqual(check_direction, (-1, -1))
+
+    # attackers of a square are found by looking outwards from the square
+    def test_square_attackers(self):
+        game_state = engine.GameState()
+        game_state.white_to_move = True
+        new_board = [
+            ["bR", "--", "bB", "bQ", "bK", "--", "bN", "bR"],
+            ["bp", "bp", "bp", "--", "--", "bp", "bp", "bp"],
+            ["--", "--", "bN", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "bp", "--", "--", "--"],
+            ["--", "bB", "--", "wp", "wp", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "wN", "--", "--"],
+            ["wp", "wp", "wp", "--", "--", "wp", "wp", "wp"],
+            ["wR", "wN", "wB", "wQ", "wK", "wB", "--", "wR"]
+        ]
+        game_state.set_board(new_board)
+        # d4 pawn is attacked by the e5 pawn, the c6 knight and the d8 queen through the open file
+        attackers = game_state.get_square_attackers(4, 3, 'b')
+        self.assertEqual(sorted(attackers), [(0, 3), (2, 2), (3, 4)])
+        self.assertTrue(game_state.square_under_attack(4, 3))
+        # e2 is not attacked by black, only defended by the white queen, king and bishop
+        self.assertEqual(game_state.get_square_attackers(6, 4, 'b'), [])
+        self.assertEqual(sorted(game_state.get_square_attackers(6, 4, 'w')), [(7, 3), (7, 4), (7, 5)])
+        # g3 is not attacked, d2 is attacked by the bishop on b4 through the empty c3 square
+        self.assertFalse(game_state.square_under_attack(5, 6))
+        self.assertEqual(game_state.get_square_attackers(6, 3, 'b'), [(4, 1)])
+
+    # the pin of every piece is found by its square, a pinned piece only moves along its pin
+    def test_pin_directions(self):
+        game_state = engine.GameState.from_fen("4k3/4r3/8/b7/8/2N5/4R3/4K3 w - - 0 1")
+        moves = [move.get_chess_notation() for move in game_state.get_valid_moves()]
+        self.assertEqual(game_state.pin_directions[6 * 16 + 4], -16)
+        self.assertEqual(game_state.pin_directions[5 * 16 + 2], -17)
+        self.assertEqual(sum(direction != 0 for direction in game_state.pin_directions), 2)
+        # the rook stays on the e file, the knight cannot move at all
+        self.assertEqual(sorted(move for move in moves if move.startswith("e2")),
+                         ["e2e3", "e2e4", "e2e5", "e2e6", "e2e7"])
+        self.assertFalse(any(move.startswith("c3") for move in moves))
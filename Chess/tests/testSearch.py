@@ -0,0 +1,161 @@
+import random
+import time
+import unittest
+
+from Chess import aiMoveFinder, benchmark, engine, perft
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        self.searcher = aiMoveFinder.Searcher()
+
+    # the search stops when the node budget runs out and leaves the position as it was
+    def test_node_limit(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards=True)
+        key = game_state.zobrist_key
+        valid_moves = game_state.get_valid_moves()
+        best_move = self.searcher.search(game_state, valid_moves, time_limit=None, node_limit=2000)
+        self.assertIn(best_move, valid_moves)
+        self.assertLessEqual(self.searcher.nodes_searched, 2001)
+        self.assertGreaterEqual(self.searcher.completed_depth, 2)
+        self.assertEqual(game_state.zobrist_key, key)
+        self.assertEqual(len(game_state.move_log), 0)
+
+    # the search stops close to its time budget
+    def test_time_limit(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[3][1], use_bitboards=True)
+        start_time = time.perf_counter()
+        best_move = self.searcher.search(game_state, game_state.get_valid_moves(), time_limit=0.3)
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+        self.assertIsNotNone(best_move)
+        self.assertGreaterEqual(self.searcher.completed_depth, 1)
+
+    # the move of the last completed iteration starts its principal variation
+    def test_principal_variation(self):
+        game_state = engine.GameState.from_fen(perft.INITIAL_POSITION, use_bitboards=True)
+        best_move = self.searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=3)
+        self.assertEqual(self.searcher.completed_depth, 3)
+        self.assertEqual(len(self.searcher.principal_variation), 3)
+        self.assertEqual(self.searcher.principal_variation[0], best_move)
+
+    # a checkmate in one move is found and the deepening stops there
+    def test_checkmate_in_one(self):
+        game_state = engine.GameState.from_fen("7k/8/6K1/8/8/8/8/5Q2 w - - 0 1", use_bitboards=True)
+        best_move = self.searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=6)
+        self.assertLess(self.searcher.completed_depth, 6)
+        game_state.make_move(best_move)
+        game_state.get_valid_moves()
+        self.assertTrue(game_state.checkmate)
+
+    # captures come first, the most valuable victim first and for the same victim the least valuable attacker
+    def test_capture_order(self):
+        game_state = engine.GameState.from_fen("4k3/8/2q1r3/3P4/1N6/8/8/K7 w - - 0 1", use_bitboards=True)
+        moves = [move.get_chess_notation() for move in self.searcher.order_moves(game_state, None, 0)]
+        self.assertEqual(moves[:3], ["d5c6", "b4c6", "d5e6"])
+
+    # a quiet move which caused a cutoff is tried first among the quiet moves of its ply
+    def test_killer_moves(self):
+        game_state = engine.GameState.from_fen(perft.INITIAL_POSITION, use_bitboards=True)
+        killer = [move for move in game_state.get_valid_moves() if move.get_chess_notation() == "g1f3"][0]
+        self.searcher.update_killers_and_history(killer, 3, 2)
+        self.assertEqual(next(self.searcher.order_moves(game_state, None, 2)), killer)
+        self.assertEqual(self.searcher.history[killer.move_id], 9)
+        self.assertNotIn(1, self.searcher.killer_moves)
+
+    # ordering the moves searches fewer nodes for the same depth and the same best moves
+    def test_ordering_saves_nodes(self):
+        results = benchmark.run_benchmark(3)
+        unordered_results = benchmark.run_benchmark(3, disabled=["ordering"])
+        self.assertLess(benchmark.totals(results)[0], benchmark.totals(unordered_results)[0])
+
+    # the capture search sees that the pawn is defended, without it the queen takes the pawn at depth 1
+    def test_quiescence_sees_recapture(self):
+        fen = "4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1"
+        game_state = engine.GameState.from_fen(fen, use_bitboards=True)
+        best_move = self.searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=1)
+        self.assertNotEqual(best_move.get_chess_notation(), "d1d5")
+        searcher = aiMoveFinder.Searcher(quiescence=False)
+        best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=1)
+        self.assertEqual(best_move.get_chess_notation(), "d1d5")
+
+    # positions without valid moves at the horizon are still scored as checkmate or stalemate
+    def test_quiescence_game_over(self):
+        game_state = engine.GameState.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", use_bitboards=True)
+        self.assertEqual(self.searcher.quiescence_search(game_state, -aiMoveFinder.CHECKMATE, aiMoveFinder.CHECKMATE,
+                                                         -1, True), aiMoveFinder.STALEMATE)
+        game_state = engine.GameState.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", use_bitboards=True)
+        self.assertEqual(self.searcher.quiescence_search(game_state, -aiMoveFinder.CHECKMATE, aiMoveFinder.CHECKMATE,
+                                                         -1, True), -aiMoveFinder.CHECKMATE)
+
+    # the null move only passes the turn, undoing it gives back the same position
+    def test_null_move(self):
+        game_state = engine.GameState.from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", use_bitboards=True)
+        key = game_state.zobrist_key
+        game_state.make_null_move()
+        self.assertFalse(game_state.white_to_move)
+        self.assertEqual(game_state.enpassant_possible, ())
+        self.assertEqual(len(game_state.move_log), 1)
+        self.assertEqual(game_state.zobrist_key,
+                         engine.GameState.from_fen("4k3/8/8/3pP3/8/8/8/4K3 b - - 0 1").zobrist_key)
+        # undo_move also undoes a null move, like after a search is stopped
+        game_state.undo_move()
+        self.assertTrue(game_state.white_to_move)
+        self.assertEqual(game_state.enpassant_possible, (2, 3))
+        self.assertEqual(game_state.zobrist_key, key)
+        self.assertEqual(len(game_state.move_log), 0)
+        self.assertFalse(game_state.has_non_pawn_material())
+
+    # principal variation search, null move pruning and late move reductions search fewer nodes for the same depth
+    def test_pruning_saves_nodes(self):
+        positions = benchmark.BENCHMARK_POSITIONS[3:5]
+        results = benchmark.run_benchmark(4, positions=positions)
+        full_results = benchmark.run_benchmark(4, disabled=["pvs", "null-move", "lmr"], positions=positions)
+        self.assertLess(benchmark.totals(results)[0], benchmark.totals(full_results)[0])
+
+    # two searchers share nothing, a search started inside another one does not change its result
+    def test_searchers_are_independent(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards=True)
+        expected_move = aiMoveFinder.Searcher().search(game_state, game_state.get_valid_moves(), time_limit=None,
+                                                       max_depth=3, randomize_root=False)
+        other_game_state = engine.GameState.from_fen("7k/8/6K1/8/8/8/8/5Q2 w - - 0 1", use_bitboards=True)
+        other_searcher = aiMoveFinder.Searcher()
+        searcher = self.searcher
+        count_node = searcher.count_node
+
+        # the other search runs in the middle of the first one
+        def count_node_and_search():
+            if searcher.nodes_searched == 100:
+                other_searcher.search(other_game_state, other_game_state.get_valid_moves(), time_limit=None,
+                                      max_depth=2)
+            count_node()
+
+        searcher.count_node = count_node_and_search
+        best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=3,
+                                    randomize_root=False)
+        self.assertEqual(best_move, expected_move)
+        self.assertEqual(searcher.completed_depth, 3)
+        self.assertEqual(other_searcher.completed_depth, 1)
+        self.assertEqual(other_searcher.best_move.get_chess_notation(), "f1f8")
+
+    # a search asked to stop gives the best move found so far and leaves the position as it was
+    def test_stop(self):
+        game_state = engine.GameState.from_fen(perft.REFERENCE_POSITIONS[1][1], use_bitboards=True)
+        searcher = self.searcher
+        count_node = searcher.count_node
+
+        def count_node_and_stop():
+            if searcher.nodes_searched == 3000:
+                searcher.stop()
+            count_node()
+
+        searcher.count_node = count_node_and_stop
+        best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit=None)
+        self.assertIsNotNone(best_move)
+        self.assertLess(searcher.nodes_searched, 3000 + aiMoveFinder.TIME_CHECK_INTERVAL + 1)
+        self.assertEqual(len(game_state.move_log), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Chess import aiMoveFinder, engine, tablebase
+
+
+class TestTablebase(unittest.TestCase):
+
+    # KRK is built once for all the tests, it is the quickest table to build without another one
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(cls.directory.name, "KRK" + tablebase.TABLE_SUFFIX), "wb") as table_file:
+            table_file.write(tablebase.build_table('R'))
+        cls.tablebase = tablebase.Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def probe(self, fen):
+        return self.tablebase.probe(engine.GameState.from_fen(fen))
+
+    def test_known_positions(self):
+        # Rh8 mates
+        self.assertEqual(self.probe("k7/8/1K6/8/8/8/8/7R w - - 0 1"), (tablebase.WIN, 1))
+        self.assertEqual(self.probe("k6R/8/1K6/8/8/8/8/8 b - - 0 1"), (tablebase.LOSS, 0))
+        # stalemate, and a rook which can be taken
+        self.assertEqual(self.probe("k7/8/K7/8/8/8/8/1R6 b - - 0 1"), (tablebase.DRAW, 0))
+        self.assertEqual(self.probe("8/8/8/8/8/8/8/kR5K b - - 0 1"), (tablebase.DRAW, 0))
+        # the longest KRK win is a mate in 16
+        table = self.tablebase.tables["KRK"]
+        self.assertEqual(max(table[:tablebase.SIDE_TO_MOVE_SIZE]), 31)
+
+    # a position with the rook on the black side is the same position upside down
+    def test_black_stronger(self):
+        self.assertEqual(self.probe("7r/8/8/8/8/1k6/8/K7 b - - 0 1"), (tablebase.WIN, 1))
+        self.assertEqual(self.probe("7r/8/8/8/8/1k6/8/K7 w - - 0 1"),
+                         self.probe("k7/8/1K6/8/8/8/8/7R b - - 0 1"))
+
+    def test_not_in_tables(self):
+        self.assertIsNone(self.probe("k7/8/1K6/8/8/8/8/6QR w - - 0 1"))
+        self.assertIsNone(self.probe("k7/8/1K6/8/8/8/7Q/8 w - - 0 1"))
+        self.assertIsNone(self.probe("k7/8/8/8/8/8/8/R3K3 b Q - 0 1"))
+        self.assertIsNone(tablebase.Tablebase(os.path.join(self.directory.name, "missing")).probe(
+            engine.GameState.from_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1")))
+
+    # the result of a position follows from the results after its moves, as given by the move generator of the engine
+    def test_agrees_with_move_generator(self):
+        generator = random.Random(3)
+        checked = 0
+        while checked < 60:
+            white_king, black_king, rook = generator.sample(range(64), 3)
+            black_to_move = checked % 2
+            if not tablebase.is_legal('R', black_to_move, white_king, black_king, rook):
+                continue
+            # every empty square is written as a 1
+            squares = ['1'] * 64
+            squares[white_king], squares[black_king], squares[rook] = 'K', 'k', 'R'
+            game_state = engine.GameState.from_fen("/".join("".join(squares[row * 8:row * 8 + 8]) for row in range(8)) +
+                                                   (" b" if black_to_move else " w"))
+            result = self.tablebase.probe(game_state)
+            children = []
+            for move in game_state.get_valid_moves():
+                game_state.make_move(move)
+                children.append(self.tablebase.probe(game_state) if move.piece_captured == "--" else
+                                (tablebase.DRAW, 0))
+                game_state.undo_move()
+            losses = [plies for outcome, plies in children if outcome == tablebase.LOSS]
+            if len(losses) != 0:
+                self.assertEqual(result, (tablebase.WIN, min(losses) + 1))
+            elif len(children) != 0 and all(outcome == tablebase.WIN for outcome, plies in children):
+                self.assertEqual(result, (tablebase.LOSS, max(plies for outcome, plies in children) + 1))
+            elif len(children) == 0 and game_state.king_in_check():
+                self.assertEqual(result, (tablebase.LOSS, 0))
+            else:
+                self.assertEqual(result, (tablebase.DRAW, 0))
+            checked += 1
+
+    # the search takes the results from the tables and plays the fastest mate
+    def test_search_probes(self):
+        searcher = aiMoveFinder.Searcher(endgame_tablebase=False)
+        searcher.tablebase = self.tablebase
+        game_state = engine.GameState.from_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1", use_bitboards=True)
+        best_move = searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=3,
+                                    randomize_root=False)
+        self.assertEqual(best_move.get_chess_notation(), "h1h8")
+        self.assertEqual(searcher.score, aiMoveFinder.CHECKMATE)
+        self.assertEqual(searcher.completed_depth, 1)
+        # every position after a root move is found in the table, nothing below them is searched
+        self.assertEqual(searcher.tablebase_hits, searcher.nodes_searched - 1)
+
+        # a longer win is scored below a checkmate, less for every ply to the checkmate
+        game_state = engine.GameState.from_fen("8/8/8/3k4/8/8/8/R3K3 w - - 0 1", use_bitboards=True)
+        searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=3, randomize_root=False)
+        plies = self.tablebase.probe(game_state)[1]
+        self.assertEqual(searcher.score, round(aiMoveFinder.TABLEBASE_WIN - (plies - 1) / 10, 1))
+
+        searcher.tablebase = None
+        searcher.search(game_state, game_state.get_valid_moves(), time_limit=None, max_depth=3, randomize_root=False)
+        self.assertEqual(searcher.tablebase_hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
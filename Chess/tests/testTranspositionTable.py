@@ -0,0 +1,86 @@
+import unittest
+from multiprocessing import Queue
+
+from Chess import engine, aiMoveFinder
+from Chess.transpositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, encode_move, \
+    BYTES_PER_ENTRY, SLOTS_PER_BUCKET
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    # stored entries are found again with all their information
+    def test_store_and_probe(self):
+        table = TranspositionTable(1)
+        game_state = engine.GameState()
+        move = game_state.get_valid_moves()[0]
+        table.store(12345, 3, 1.5, LOWER_BOUND, move)
+        table.store(54321, 2, -0.5, UPPER_BOUND, None)
+        self.assertEqual(table.probe(12345), (3, 1.5, LOWER_BOUND, encode_move(move)))
+        self.assertEqual(table.probe(54321), (2, -0.5, UPPER_BOUND, None))
+        self.assertIsNone(table.probe(99999))
+        statistics = table.get_statistics()
+        self.assertEqual(statistics["hits"], 2)
+        self.assertEqual(statistics["misses"], 1)
+        self.assertEqual(statistics["stores"], 2)
+
+    # the number of entries is bounded by the memory given
+    def test_memory_cap(self):
+        table = TranspositionTable(2)
+        self.assertEqual(table.number_of_buckets, 2 * 1024 * 1024 // (BYTES_PER_ENTRY * SLOTS_PER_BUCKET))
+        self.assertEqual(len(table.keys), table.number_of_buckets * SLOTS_PER_BUCKET)
+
+    # deep entries stay in the depth-preferred slot, shallow ones go to the always-replace slot
+    def test_replacement_policy(self):
+        table = TranspositionTable(1)
+        buckets = table.number_of_buckets
+        # 3 different positions sharing the same bucket
+        first_key, second_key, third_key = 5, 5 + buckets, 5 + 2 * buckets
+        table.store(first_key, 5, 1.0, EXACT, None)
+        table.store(second_key, 1, 2.0, EXACT, None)
+        table.store(third_key, 2, 3.0, EXACT, None)
+        # the deep entry survived, the always-replace slot kept the latest shallow one
+        self.assertEqual(table.probe(first_key)[1], 1.0)
+        self.assertIsNone(table.probe(second_key))
+        self.assertEqual(table.probe(third_key)[1], 3.0)
+        self.assertGreaterEqual(table.get_statistics()["collisions"], 1)
+        # a deeper search takes the depth-preferred slot, the previous entry is demoted
+        table.store(second_key, 6, 4.0, EXACT, None)
+        self.assertEqual(table.probe(second_key)[1], 4.0)
+        self.assertEqual(table.probe(first_key)[1], 1.0)
+        self.assertIsNone(table.probe(third_key))
+        # entries of an older search lose the depth-preferred slot
+        table.new_search()
+        table.store(third_key, 1, 5.0, EXACT, None)
+        self.assertEqual(table.probe(third_key)[1], 5.0)
+        self.assertEqual(table.probe(second_key)[1], 4.0)
+
+    # the search with the transposition table still finds a mate in one and fills the table
+    def test_search_uses_table(self):
+        game_state = engine.GameState()
+        game_state.white_to_move = True
+        # black king is not on its initial square and white has no king side rook
+        castle_rights = game_state.current_castling_rights
+        castle_rights.white_king_side = False
+        castle_rights.black_king_side = False
+        castle_rights.black_queen_side = False
+        new_board = [
+            ["--", "--", "--", "--", "--", "--", "bK", "--"],
+            ["--", "--", "--", "--", "--", "bp", "bp", "bp"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["wR", "--", "--", "--", "wK", "--", "--", "--"]
+        ]
+        game_state.set_board(new_board)
+        game_state.black_king_location = (0, 6)
+        aiMoveFinder.transposition_table.clear()
+        return_queue = Queue()
+        aiMoveFinder.find_best_move(game_state, game_state.get_valid_moves(), return_queue)
+        self.assertEqual(return_queue.get().get_chess_notation(), "a1a8")
+        self.assertGreater(aiMoveFinder.transposition_table.get_statistics()["stores"], 0)
+        # a second search of the same position reuses the entries of the first one
+        aiMoveFinder.find_best_move(game_state, game_state.get_valid_moves(), return_queue)
+        self.assertEqual(return_queue.get().get_chess_notation(), "a1a8")
+        self.assertGreater(aiMoveFinder.transposition_table.get_statistics()["hits"], 0)
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from Chess import engine, zobrist
+from Chess.tests.helpers import play
+
+
+class TestZobrist(unittest.TestCase):
+
+    # the incremental hash must always be equal to the hash computed from scratch, both after moves and undos
+    def test_incremental_hash_matches_full_hash(self):
+        game_state = engine.GameState()
+        generator = random.Random(7)
+        keys = [game_state.zobrist_key]
+        for _ in range(120):
+            moves = game_state.get_valid_moves()
+            if len(moves) == 0:
+                break
+            game_state.make_move(generator.choice(moves))
+            self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+            keys.append(game_state.zobrist_key)
+        while len(game_state.move_log) != 0:
+            keys.pop()
+            game_state.undo_move()
+            self.assertEqual(game_state.zobrist_key, keys[-1])
+            self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+
+    # castling, en passant and promotion move more than one piece, so check them one by one
+    def test_special_moves(self):
+        game_state = engine.GameState()
+        game_state.white_to_move = True
+        new_board = [
+            ["bR", "--", "--", "--", "bK", "--", "--", "bR"],
+            ["bp", "wp", "--", "--", "--", "bp", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "wp", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["--", "--", "--", "--", "--", "--", "--", "--"],
+            ["wR", "--", "--", "--", "wK", "--", "--", "wR"]
+        ]
+        game_state.set_board(new_board)
+        initial_key = game_state.zobrist_key
+        for notation in ["e1g1", "f7f5", "e5f6", "e8g8", "b7a8"]:
+            play(game_state, notation)
+            self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+        for _ in range(5):
+            game_state.undo_move()
+        self.assertEqual(game_state.zobrist_key, initial_key)
+        self.assertEqual(game_state.zobrist_key, zobrist.compute_hash(game_state))
+
+    # the same position reached through different move orders has the same hash
+    def test_transposition_same_key(self):
+        first_game_state = engine.GameState()
+        for notation in ["g1f3", "g8f6", "b1c3", "b8c6"]:
+            play(first_game_state, notation)
+        second_game_state = engine.GameState()
+        for notation in ["b1c3", "b8c6", "g1f3", "g8f6"]:
+            play(second_game_state, notation)
+        self.assertEqual(first_game_state.zobrist_key, second_game_state.zobrist_key)
+
+    # side to move, castling rights and en passant square are part of the hash
+    def test_state_changes_key(self):
+        game_state = engine.GameState()
+        play(game_state, "e2e4")
+        en_passant_key = game_state.zobrist_key
+        play(game_state, "g8f6")
+        play(game_state, "g1f3")
+        play(game_state, "f6g8")
+        play(game_state, "f3g1")
+        # same pieces and side to move as after e2e4, but en passant is not possible anymore
+        self.assertNotEqual(game_state.zobrist_key, en_passant_key)
+        self.assertNotEqual(engine.GameState().zobrist_key, game_state.zobrist_key)
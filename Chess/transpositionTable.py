@@ -0,0 +1,258 @@
+"""
+fixed size transposition table used by the alpha beta search
+positions are identified by their zobrist key and every entry keeps the depth it was searched at, its score,
+the type of the score (exact, lower bound or upper bound) and the best move found
+the table is split into buckets of 2 slots:
+    - the first slot is depth-preferred: it only gets replaced by a deeper search (or by any search of a newer move)
+    - the second slot is always-replace: it keeps the most recent entry that did not fit in the first slot
+the entries are kept in flat typed arrays, so the memory used is bounded by the size given in MB
+the key of an entry is stored xor-ed with its packed information and the bits of its score, so an entry half
+written by another process sharing the table (SharedTranspositionTable) does not match any position instead of
+giving a wrong move, bound or score
+"""
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+# type of the score stored in an entry
+EXACT = 1
+# score is at least the stored one (the search failed high, beta cutoff)
+LOWER_BOUND = 2
+# score is at most the stored one (the search failed low, no move raised alpha)
+UPPER_BOUND = 3
+
+SLOTS_PER_BUCKET = 2
+# key (8 bytes) + score (8 bytes) + packed depth, age, bound type and move (8 bytes)
+BYTES_PER_ENTRY = 24
+
+# layout of the packed information of an entry
+MOVE_MASK = 0xFFF
+HAS_MOVE_BIT = 1 << 12
+FLAG_SHIFT = 13
+FLAG_MASK = 0x3
+AGE_SHIFT = 16
+AGE_MASK = 0xFF
+DEPTH_SHIFT = 24
+DEPTH_MASK = 0xFF
+
+# the 64 bits of a score read as an unsigned integer and back, in the layout of the arrays of the table
+score_bits_format = struct.Struct('Q')
+score_format = struct.Struct('d')
+
+"""
+score of the bits read from the score_bits view of a table
+"""
+
+
+def score_from_bits(bits):
+    return score_format.unpack(score_bits_format.pack(bits))[0]
+
+
+"""
+encode the start and end squares of a move in 12 bits
+"""
+
+
+def encode_move(move):
+    return move.move_id
+
+
+"""
+check if a move has the start and end squares given by the encoded move
+"""
+
+
+def move_matches(move, move_code):
+    return move.move_id == move_code
+
+
+class TranspositionTable:
+    def __init__(self, size_mb):
+        self.size_mb = size_mb
+        self.number_of_buckets = max(1, int(size_mb * 1024 * 1024) // (BYTES_PER_ENTRY * SLOTS_PER_BUCKET))
+        number_of_entries = self.number_of_buckets * SLOTS_PER_BUCKET
+        self.keys = array('Q', bytes(8 * number_of_entries))
+        self.scores = array('d', bytes(8 * number_of_entries))
+        # the same scores seen as 64-bit integers, for the check of the key
+        self.score_bits = memoryview(self.scores).cast('B').cast('Q')
+        # packed information, 0 means an empty slot because every stored entry has a non-zero bound type
+        self.information = array('q', bytes(8 * number_of_entries))
+        # the age changes with every new search so entries of older searches can be replaced first
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    """
+    prepare the table for a new search (a new move in the game)
+    entries of older searches are kept, but they lose their priority in the depth-preferred slots
+    """
+
+    def new_search(self):
+        self.age = (self.age + 1) & AGE_MASK
+
+    """
+    remove all the entries and reset the counters
+    """
+
+    def clear(self):
+        number_of_entries = self.number_of_buckets * SLOTS_PER_BUCKET
+        self.keys = array('Q', bytes(8 * number_of_entries))
+        self.scores = array('d', bytes(8 * number_of_entries))
+        self.score_bits = memoryview(self.scores).cast('B').cast('Q')
+        self.information = array('q', bytes(8 * number_of_entries))
+        self.age = 0
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    """
+    look for the position with the given key
+    returns a tuple (depth, score, flag, move code) or None if the position is not in the table
+    move code is None if the entry has no best move
+    """
+
+    def probe(self, key):
+        index = (key % self.number_of_buckets) * SLOTS_PER_BUCKET
+        keys = self.keys
+        information = self.information
+        for slot in range(index, index + SLOTS_PER_BUCKET):
+            entry_information = information[slot]
+            if entry_information == 0:
+                continue
+            # the score is read once, the one checked against the key is the one returned
+            bits = self.score_bits[slot]
+            if keys[slot] ^ entry_information ^ bits == key:
+                self.hits += 1
+                move_code = entry_information & MOVE_MASK if entry_information & HAS_MOVE_BIT else None
+                return (entry_information >> DEPTH_SHIFT & DEPTH_MASK, score_from_bits(bits),
+                        entry_information >> FLAG_SHIFT & FLAG_MASK, move_code)
+        self.misses += 1
+        # the bucket is used by other positions which share the same index
+        if information[index] != 0:
+            self.collisions += 1
+        return None
+
+    """
+    store the result of a search of the position with the given key
+    best_move can be None, for example when no move raised alpha
+    """
+
+    def store(self, key, depth, score, flag, best_move):
+        index = (key % self.number_of_buckets) * SLOTS_PER_BUCKET
+        information = self.information
+        keys = self.keys
+        score_bits = self.score_bits
+        depth_preferred_information = information[index]
+        depth_preferred_key = keys[index] ^ depth_preferred_information ^ score_bits[index]
+        # depth-preferred slot: empty, same position, older search or at least as deep search
+        if depth_preferred_information == 0 or depth_preferred_key == key or \
+                (depth_preferred_information >> AGE_SHIFT & AGE_MASK) != self.age or \
+                depth >= (depth_preferred_information >> DEPTH_SHIFT & DEPTH_MASK):
+            slot = index
+            # an entry of another position gets demoted to the always-replace slot instead of being lost
+            if depth_preferred_information != 0 and depth_preferred_key != key:
+                if information[index + 1] != 0:
+                    self.overwrites += 1
+                keys[index + 1] = keys[index]
+                self.scores[index + 1] = self.scores[index]
+                information[index + 1] = depth_preferred_information
+                information[index] = 0
+        # always-replace slot
+        else:
+            slot = index + 1
+
+        if information[slot] != 0 and keys[slot] ^ information[slot] ^ score_bits[slot] != key:
+            self.overwrites += 1
+        entry_information = min(depth, DEPTH_MASK) << DEPTH_SHIFT | self.age << AGE_SHIFT | flag << FLAG_SHIFT
+        if best_move is not None:
+            entry_information |= HAS_MOVE_BIT | encode_move(best_move)
+        self.scores[slot] = score
+        keys[slot] = key ^ entry_information ^ score_bits[slot]
+        information[slot] = entry_information
+        self.stores += 1
+
+    """
+    counters used to size the table
+    usage is the fraction of used slots, estimated from the first 1000 buckets
+    """
+
+    def get_statistics(self):
+        sample = self.information[:1000 * SLOTS_PER_BUCKET]
+        used = sum(1 for entry_information in sample if entry_information != 0)
+        probes = self.hits + self.misses
+        return {
+            "size_mb": self.size_mb,
+            "entries": self.number_of_buckets * SLOTS_PER_BUCKET,
+            "usage": used / len(sample),
+            "probes": probes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes != 0 else 0.0,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites
+        }
+
+
+"""
+transposition table in shared memory, used by several processes searching the same position at once
+the process creating the table owns it, the others attach to it by its name and size
+the entries are written without locks: two processes writing the same slot at once can leave an entry that does
+not match any position (see the key xor above), which only loses that entry - whichever of the key, score and
+information come from the other write
+the age of the entries is shared too: only the owner starts a new search, the attached tables follow its age
+"""
+
+
+class SharedTranspositionTable(TranspositionTable):
+    def __init__(self, size_mb, name=None):
+        self.size_mb = size_mb
+        self.number_of_buckets = max(1, int(size_mb * 1024 * 1024) // (BYTES_PER_ENTRY * SLOTS_PER_BUCKET))
+        number_of_entries = self.number_of_buckets * SLOTS_PER_BUCKET
+        # the age comes first, then the keys, the scores and the packed information of all the entries
+        size = 8 + BYTES_PER_ENTRY * number_of_entries
+        self.owner = name is None
+        if self.owner:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shared_memory = shared_memory.SharedMemory(name=name)
+        self.name = self.shared_memory.name
+        buffer = self.shared_memory.buf
+        self.shared_age = buffer[:8].cast('q')
+        self.keys = buffer[8:8 + 8 * number_of_entries].cast('Q')
+        self.scores = buffer[8 + 8 * number_of_entries:8 + 16 * number_of_entries].cast('d')
+        self.score_bits = buffer[8 + 8 * number_of_entries:8 + 16 * number_of_entries].cast('Q')
+        self.information = buffer[8 + 16 * number_of_entries:size].cast('q')
+        self.age = self.shared_age[0]
+        self.reset_statistics()
+
+    def new_search(self):
+        if self.owner:
+            self.shared_age[0] = (self.shared_age[0] + 1) & AGE_MASK
+        self.age = self.shared_age[0]
+
+    def clear(self):
+        # the buffer is shared, so it is emptied in place
+        self.shared_memory.buf[:] = bytes(len(self.shared_memory.buf))
+        self.age = 0
+        self.reset_statistics()
+
+    """
+    release the shared memory of this process, the owner also frees it for all the processes
+    the table cannot be used anymore
+    """
+
+    def close(self):
+        for view in [self.shared_age, self.keys, self.scores, self.score_bits, self.information]:
+            view.release()
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
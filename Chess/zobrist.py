@@ -0,0 +1,53 @@
+"""
+zobrist hashing for chess positions
+every (piece, square) pair, the side to move, every castling rights combination and every en passant file
+gets a fixed random 64-bit number, the hash of a position is the XOR of the numbers of all its features
+this way a move only XORs in and out the few features it changes, instead of rescanning the whole board
+"""
+import random
+
+# fixed seed so the keys (and everything cached by them) are the same between runs and processes
+ZOBRIST_SEED = 2021
+
+pieces = ['wp', 'wR', 'wN', 'wB', 'wQ', 'wK', 'bp', 'bR', 'bN', 'bB', 'bQ', 'bK']
+
+_random = random.Random(ZOBRIST_SEED)
+
+# piece_keys[piece][row][column]
+piece_keys = {piece: [[_random.getrandbits(64) for _ in range(8)] for _ in range(8)] for piece in pieces}
+# XORed in when it is black to move
+black_to_move_key = _random.getrandbits(64)
+# castling_keys[castling rights], the 4 rights as bits of the game state's castling_rights - see castleRights.py
+castling_keys = [_random.getrandbits(64) for _ in range(16)]
+# enpassant_keys[column of the en passant square]
+enpassant_keys = [_random.getrandbits(64) for _ in range(8)]
+
+"""
+key of the en passant square, 0 if en passant is not possible
+"""
+
+
+def enpassant_key(enpassant_possible):
+    if enpassant_possible == ():
+        return 0
+    return enpassant_keys[enpassant_possible[1]]
+
+
+"""
+compute the hash of the game state from scratch
+used for the initial position, after the board is replaced and to verify the incremental updates
+"""
+
+
+def compute_hash(game_state):
+    key = 0
+    for row in range(8):
+        for column in range(8):
+            square = game_state.board[row][column]
+            if square != "--":
+                key ^= piece_keys[square][row][column]
+    if not game_state.white_to_move:
+        key ^= black_to_move_key
+    key ^= castling_keys[game_state.castling_rights]
+    key ^= enpassant_key(game_state.enpassant_possible)
+    return key